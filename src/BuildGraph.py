@@ -3,16 +3,40 @@ import json
 import networkx as nx
 from classes.LLMUser import LLMUser
 from classes.ServerOllama import OllamaServer, OllamaChat
-from Uncertainpy.src.uncertainpy.gradual import Argument, BAG, semantics, algorithms
+from Uncertainpy.src.uncertainpy.gradual import Argument, BAG, semantics, algorithms, saveSnapshot, loadSnapshot
 
 # ======================================================
 # ARGUMENTATION GRAPH CLASS
 # ======================================================
 class ArgumentationGraph:
-    def __init__(self):
+    # incremental: re-solve only the part of the graph affected by new arguments/relations,
+    # starting from the previous strengths (see algorithms.IncrementalSolver)
+    # metrics: optional sink (e.g. algorithms.JSONLinesSink) receiving the counters and timings of every solve
+    # confidence_threshold: stop solves as soon as the ranking of the hypotheses and whether their top-2 gap exceeds
+    # this threshold are settled (see Model.solve_query, with the estimated bound where the semantics is no
+    # contraction); None solves to epsilon. Incremental re-solves start from the previous strengths and need them at
+    # epsilon, so the two cannot be combined
+    # relevant_only: solve only arguments with a path to a hypothesis; all others are reported at their base score
+    # memo: optional algorithms.StrengthMemo shared between graphs (and runs, if it has a directory); graphs with the
+    # same structure as an earlier solve reuse its strengths, and an unchanged graph is never solved twice
+    def __init__(self, incremental: bool = False, metrics=None, confidence_threshold: float = None, relevant_only: bool = False,
+                 memo=None):
         self.G = nx.DiGraph()
         self.bag = BAG()
         self.node_text_map = {}  # node_id -> text
+        if incremental and confidence_threshold is not None:
+            raise ValueError("confidence_threshold stops solves early, which incremental re-solves cannot start from")
+
+        self.incremental_solver = None
+        self.incremental = incremental
+        self.metrics = metrics
+        self.last_result = None  # algorithms.SolveResult of the last strength computation
+        self.confidence_threshold = confidence_threshold
+        self.relevant_only = relevant_only
+        self.last_bound = 0.0  # bound on the remaining change of the strengths of the last computation
+        self.last_bound_estimated = False  # whether last_bound is the heuristic estimate rather than a proven bound
+        self.memo = memo
+        self.last_key = None  # structural hash of the graph and configuration of the last strength computation
 
     # Add a node
     def add_argument(self, arg_id: str, text: str, node_type: str = "argument", initial_strength: float = 0.5):
@@ -31,16 +55,60 @@ class ArgumentationGraph:
             self.bag.add_attack(self.bag.arguments[src], self.bag.arguments[tgt])
 
     # Compute strengths using BAG
-    def compute_strengths(self, delta=1e-2, epsilon=1e-4):
-
-
-        arg_model = semantics.QuadraticEnergyModel()
-        arg_model.BAG = self.bag
-        arg_model.approximator = algorithms.RK4(arg_model)
-
-        # Run the model
-        arg_model.solve(delta=delta, epsilon=epsilon, verbose=True)
-
+    # approximator: "RK4" (fixed step), "DormandPrince" (adaptive step with iteration cap and cycle detection)
+    # "SCCHybrid" (exact forward pass outside cycles, Equilibrium only inside strongly connected components)
+    # or "Equilibrium" (fixed-point iteration with Anderson acceleration / Newton, RK4 as fallback)
+    def compute_strengths(self, delta=1e-2, epsilon=1e-4, approximator="RK4"):
+        approximators = {
+            "RK4": algorithms.RK4,
+            "DormandPrince": algorithms.DormandPrince,
+            "SCCHybrid": algorithms.SCCHybrid,
+            "Equilibrium": algorithms.Equilibrium,
+        }
+        if approximator not in approximators:
+            raise ValueError(f"Unknown approximator '{approximator}', expected one of {list(approximators)}")
+
+        hypotheses = [n for n, data in self.G.nodes(data=True) if data.get("type") == "hypothesis"]
+        targets = hypotheses if self.relevant_only and hypotheses else None
+
+        solved_bag = self.bag if targets is None else self.bag.slice(targets)
+        mode = "incremental" if self.incremental else (approximator, self.confidence_threshold)
+        key = algorithms.structuralHash(solved_bag, semantics.QuadraticEnergyModel(), mode, delta, epsilon)
+
+        if key == self.last_key:
+            # nothing changed since the last computation, the arguments still hold its strengths
+            print("♻️ Graph unchanged, keeping the previous strengths")
+        elif self.memo is not None and (cached := self.memo.get(key)) is not None:
+            for name, strength in cached.strengths.items():
+                if name in self.bag.arguments:
+                    self.bag.arguments[name].strength = strength
+            if targets is not None:
+                self.bag.merge_slice_strengths(solved_bag)
+            if self.incremental:
+                # the next incremental re-solve starts from the memoized strengths, not from the last solve
+                self.get_incremental_solver(delta, epsilon).rebase(solved_bag, cached.strengths)
+            self.last_result = cached
+            self.last_bound = 0.0
+            self.last_bound_estimated = False
+            print("♻️ Graph solved before, reusing the memoized strengths")
+        else:
+            self.run_solver(solved_bag, targets, hypotheses, delta, epsilon, approximators[approximator])
+            # early-stopped (partial) strengths are not memoized
+            if self.memo is not None and self.last_result.status == "converged":
+                self.memo.put(key, self.last_result)
+        self.last_key = key
+
+        status = self.last_result.status
+        if status == "decided":
+            estimated = ", estimated" if self.last_bound_estimated else ""
+            print(f"⏱️ Hypothesis ranking settled after {self.last_result.steps} steps (strengths within ±{self.last_bound:.3f}{estimated})")
+        elif status != "converged":
+            print(f"⚠️ Strength computation stopped without converging: {status}")
+
+        return self.current_strengths()
+
+    # Strength values currently held by the arguments (also stored as node attribute "strength")
+    def current_strengths(self):
         strengths = {}
         try:
             # ✅ Directly read .strength from each Argument in the BAG
@@ -58,6 +126,57 @@ class ArgumentationGraph:
         print("✅ Computed strengths:", strengths)
         return strengths
 
+    # IncrementalSolver holding the strengths the next incremental re-solve starts from, created on first use
+    def get_incremental_solver(self, delta, epsilon):
+        if self.incremental_solver is None:
+            self.incremental_solver = algorithms.IncrementalSolver(semantics.QuadraticEnergyModel(), delta=delta, epsilon=epsilon)
+        return self.incremental_solver
+
+    # Run the solver selected by compute_strengths on the (sliced) BAG and store its SolveResult in last_result
+    def run_solver(self, solved_bag, targets, hypotheses, delta, epsilon, approximator):
+        if self.incremental:
+            # the incremental solver integrates cyclic parts of the affected region with its own SCCHybrid approximator;
+            # it always solves to epsilon, as later re-solves start from these strengths
+            # the slice only grows as arguments and relations are added, so it is a valid incremental sequence
+            self.get_incremental_solver(delta, epsilon).solve(solved_bag)
+            if targets is not None:
+                self.bag.merge_slice_strengths(solved_bag)
+            print(f"♻️ Re-solved {self.incremental_solver.region_size} of {len(self.bag.arguments)} arguments")
+            self.last_result = self.incremental_solver.result
+            if self.metrics is not None:
+                self.metrics(self.last_result.as_dict())
+        else:
+            arg_model = semantics.QuadraticEnergyModel()
+            arg_model.BAG = self.bag
+            arg_model.approximator = approximator(arg_model)
+
+            # Run the model (the per-argument printout of verbose=True dominates the solve on large graphs)
+            if self.confidence_threshold is not None and hypotheses:
+                # the pipeline only compares the top-2 gap of the hypotheses with the threshold and the top one with 0.9;
+                # hypotheses with many attackers and supporters make the semantics no contraction, so without the
+                # estimated bound these solves would rarely stop early
+                query = arg_model.solve_query(hypotheses, delta, epsilon, margin=self.confidence_threshold, level=0.9,
+                                              top=1, estimate=True, metrics=self.metrics)
+                self.last_bound = query.bound
+                self.last_bound_estimated = query.estimated
+            else:
+                arg_model.solve(delta=delta, epsilon=epsilon, verbose=False, metrics=self.metrics, targets=targets)
+                self.last_bound = 0.0
+                self.last_bound_estimated = False
+            self.last_result = arg_model.result
+
+    # Which base scores and edges drive each hypothesis (H0..Hn): gradients of the hypothesis strengths
+    # at the current equilibrium, ranked by magnitude (call compute_strengths first)
+    def explain_hypotheses(self, top: int = 5):
+        hypotheses = [n for n, data in self.G.nodes(data=True) if data.get("type") == "hypothesis"]
+        if not hypotheses:
+            return {}
+
+        arg_model = semantics.QuadraticEnergyModel()
+        arg_model.BAG = self.bag
+        sensitivity = arg_model.sensitivity(hypotheses)
+        return {h: sensitivity.ranking(h, top) for h in hypotheses}
+
 
 
     # Build graph from hypotheses + text
@@ -107,6 +226,7 @@ class ArgumentationGraph:
         if max_arguments:
             new_arguments = new_arguments[:max_arguments]
 
+        relation_count = len(self.bag.attacks) + len(self.bag.supports)
         node_offset = len(self.G.nodes)
         for i, arg_text in enumerate(new_arguments):
             arg_id = f"A{i+node_offset}"
@@ -125,7 +245,12 @@ class ArgumentationGraph:
                     continue
                 self.add_relation(i, j, rel)
 
-        strengths = self.compute_strengths()
+        if self.last_result is not None and len(self.bag.attacks) + len(self.bag.supports) == relation_count:
+            # new arguments without relations keep their base score, which is their strength; nothing else changed
+            print("♻️ No new relations, keeping the previous strengths")
+            strengths = self.current_strengths()
+        else:
+            strengths = self.compute_strengths()
         return {"graph": self.G, "strengths": strengths, "node_text_map": self.node_text_map}
 
     # Utility
@@ -139,6 +264,75 @@ class ArgumentationGraph:
         return None
 
 
+# ======================================================
+# RE-SCORING SAVED GRAPHS
+# ======================================================
+def load_saved_bag(graph_file: str, initial_strength: float = 0.5):
+    """Rebuild the BAG of a graph saved with nx.node_link_data (results/<model>/graph_question_*.json)."""
+    with open(graph_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    bag = BAG()
+    for node in data["nodes"]:
+        bag.arguments[node["id"]] = Argument(node["id"], initial_weight=initial_strength)
+
+    for link in data.get("links", data.get("edges", [])):
+        src = bag.arguments[link["source"]]
+        tgt = bag.arguments[link["target"]]
+        if link.get("relation") == "support":
+            bag.add_support(src, tgt)
+        elif link.get("relation") == "attack":
+            bag.add_attack(src, tgt)
+    return bag
+
+
+def saved_graph_files(results_dir: str):
+    """graph_question_*.json files of results_dir in question order."""
+    return sorted(
+        (f for f in os.listdir(results_dir) if f.startswith("graph_question_") and f.endswith(".json")),
+        key=lambda f: int(f[len("graph_question_"):-len(".json")])
+    )
+
+
+def archive_saved_graphs(results_dir: str, snapshot_file: str, initial_strength: float = 0.5):
+    """Store all saved graphs of results_dir in one binary snapshot (in the order of saved_graph_files)."""
+    graph_files = saved_graph_files(results_dir)
+    saveSnapshot([load_saved_bag(os.path.join(results_dir, f), initial_strength) for f in graph_files], snapshot_file)
+    return graph_files
+
+
+def rescore_saved_graphs(results_dir: str, delta=1e-2, epsilon=1e-4, initial_strength: float = 0.5, snapshot_file: str = None):
+    """Recompute the strengths of all saved graphs in results_dir with a single batched solve.
+    If snapshot_file (written by archive_saved_graphs) is given, the graphs are read from it instead of the JSON files."""
+    graph_files = saved_graph_files(results_dir)
+    if snapshot_file is not None:
+        bags = loadSnapshot(snapshot_file)
+    else:
+        bags = [load_saved_bag(os.path.join(results_dir, f), initial_strength) for f in graph_files]
+
+    result = algorithms.solveBatch(semantics.QuadraticEnergyModel(), bags, delta=delta, epsilon=epsilon)
+    not_converged = [f for f, ok in zip(graph_files, result.converged) if not ok]
+    if not_converged:
+        print(f"⚠️ {len(not_converged)} graphs did not converge: {not_converged}")
+
+    return dict(zip(graph_files, result.strengths))
+
+
+def sweep_saved_graphs(results_dir: str, runs=None, initial_strength: float = 0.5, snapshot_file: str = None, processes=None):
+    """Evaluate several semantics (default: all continuous semantics) on every saved graph of results_dir,
+    to choose the semantics for a dataset. Returns an algorithms.SweepResult, graphs in the order of saved_graph_files."""
+    if runs is None:
+        runs = [semantics.QuadraticEnergyModel(), semantics.ContinuousDFQuADModel(), semantics.ContinuousEulerBasedModel(),
+                semantics.SquaredEnergyModel(), semantics.ContinuousSquaredDFQuADModel()]
+
+    if snapshot_file is not None:
+        bags = loadSnapshot(snapshot_file)
+    else:
+        bags = [load_saved_bag(os.path.join(results_dir, f), initial_strength) for f in saved_graph_files(results_dir)]
+
+    return algorithms.sweep(bags, runs, processes=processes)
+
+
 # ======================================================
 # MAIN PIPELINE
 # ======================================================
@@ -147,6 +341,12 @@ if __name__ == "__main__":
     MODEL_NAME = "gpt-oss:20b"
     RETRIEVE_VALUE = 2
     CONFIDENCE_THRESHOLD = 0.15
+    # re-solve only the part of each graph changed by an extension (algorithms.IncrementalSolver) instead of the whole graph
+    INCREMENTAL = False
+    # solve only the arguments that can reach a hypothesis; all others are then reported at their base score
+    RELEVANT_ONLY = False
+    # reuse the strengths of graphs with the same structure solved in this or earlier runs (algorithms.StrengthMemo)
+    STRENGTH_MEMO = False
 
     DATASET_FILE = "dataset/wiki_ranked_pages.json"
     OUTPUT_DIR = os.path.join("results", MODEL_NAME.replace(":", "_"))
@@ -163,6 +363,9 @@ if __name__ == "__main__":
         if isinstance(dataset, dict):
             dataset = [dataset]
 
+    # strengths of graphs solved in this or earlier runs, by structural hash
+    strength_memo = algorithms.StrengthMemo(directory=os.path.join(OUTPUT_DIR, "strength_memo")) if STRENGTH_MEMO else None
+
     y_true = []
     y_pred = []
     combined_data = []
@@ -170,7 +373,11 @@ if __name__ == "__main__":
     for idx, entry in enumerate(dataset):
 
 
-        graph_builder = ArgumentationGraph()
+        solver_metrics = algorithms.JSONLinesSink(os.path.join(OUTPUT_DIR, "solver_metrics.jsonl"), question=idx + 1)
+        # early-stopped solves are no starting point for incremental re-solves
+        graph_builder = ArgumentationGraph(incremental=INCREMENTAL, metrics=solver_metrics,
+                                           confidence_threshold=None if INCREMENTAL else CONFIDENCE_THRESHOLD,
+                                           relevant_only=RELEVANT_ONLY, memo=strength_memo)
 
         print(f"\n=== Processing Question {idx + 1} ===")
         question = entry.get("question", "")
@@ -1,4 +1,6 @@
 class Argument:
+    __slots__ = ("name", "initial_weight", "strength", "attackers", "supporters")
+
     def __init__(self, name, initial_weight, strength=None, attackers=None, supporters=None):
         self.name = name
         self.initial_weight = initial_weight
@@ -27,6 +29,12 @@ class Argument:
     def add_supporter(self, supporter, support_weight=1):
         self.supporters[supporter] = support_weight
 
+    def remove_attacker(self, attacker):
+        del self.attackers[attacker]
+
+    def remove_supporter(self, supporter):
+        del self.supporters[supporter]
+
     def get_initial_weight(self):
         return self.initial_weight
         
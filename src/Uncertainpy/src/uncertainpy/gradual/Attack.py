@@ -1,4 +1,6 @@
 class Attack:
+    __slots__ = ("attacker", "attacked", "weight")
+
     def __init__(self, attacker, attacked, weight=1) -> None:
         self.attacker = attacker
         self.attacked = attacked
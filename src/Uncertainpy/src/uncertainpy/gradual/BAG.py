@@ -1,9 +1,8 @@
-import os
-import re
-import string
 from .Argument import Argument
 from .Support import Support
 from .Attack import Attack
+from .CompiledBAG import CompiledBAG
+from .Parser import readBAG
 
 
 class BAG:
@@ -19,26 +18,7 @@ class BAG:
         if (path is None):
             pass
         else:
-            with open(os.path.abspath(path), "r") as f:
-                for line in f.readlines():
-                    k_name = line.split("(")[0]
-                    if k_name in string.whitespace:
-                        pass
-                    else:
-                        k_args = re.findall(rf"{k_name}\((.*?)\)", line)[0].replace(" ", "").split(",")
-                        if k_name == "arg":
-                            argument = Argument(k_args[0], float(k_args[1]))
-                            self.arguments[argument.name] = argument
-
-                        elif k_name == "att":
-                            attacker = self.arguments[k_args[0]]
-                            attacked = self.arguments[k_args[1]]
-                            self.add_attack(attacker, attacked)
-
-                        elif k_name == "sup":
-                            supporter = self.arguments[k_args[0]]
-                            supported = self.arguments[k_args[1]]
-                            self.add_support(supporter, supported)
+            readBAG(path, self)
 
     def add_attack(self, attacker, attacked, attack_weight=1):
         if type(attacker) != Argument:
@@ -82,6 +62,46 @@ class BAG:
 
         self.supports.append(Support(supporter, supported, support_weight))
 
+    def _argument(self, argument):
+        name = argument.name if isinstance(argument, Argument) else argument
+        if name not in self.arguments:
+            raise KeyError(f"unknown argument {name}")
+        return self.arguments[name]
+
+    def remove_attack(self, attacker, attacked):
+        """Removes the attack of attacked by attacker (Arguments or names)"""
+        attacker = self._argument(attacker)
+        attacked = self._argument(attacked)
+        if attacker not in attacked.attackers:
+            raise KeyError(f"{attacker.name} does not attack {attacked.name}")
+
+        attacked.remove_attacker(attacker)
+        self.attacks = [a for a in self.attacks if a.attacker is not attacker or a.attacked is not attacked]
+
+    def remove_support(self, supporter, supported):
+        """Removes the support of supported by supporter (Arguments or names)"""
+        supporter = self._argument(supporter)
+        supported = self._argument(supported)
+        if supporter not in supported.supporters:
+            raise KeyError(f"{supporter.name} does not support {supported.name}")
+
+        supported.remove_supporter(supporter)
+        self.supports = [s for s in self.supports if s.supporter is not supporter or s.supported is not supported]
+
+    def remove_argument(self, argument):
+        """Removes the argument (Argument or name) together with all attacks and supports it takes part in"""
+        argument = self._argument(argument)
+        for other in self.arguments.values():
+            other.attackers.pop(argument, None)
+            other.supporters.pop(argument, None)
+
+        self.attacks = [a for a in self.attacks if a.attacker is not argument and a.attacked is not argument]
+        self.supports = [s for s in self.supports if s.supporter is not argument and s.supported is not argument]
+        del self.arguments[argument.name]
+        # the removed Argument keeps no references into the BAG
+        argument.attackers = {}
+        argument.supporters = {}
+
     def reset_strength_values(self):
         for a in list(self.arguments.values()):
             a.strength = a.initial_weight
@@ -89,6 +109,70 @@ class BAG:
     def get_arguments(self):
         return list(self.arguments.values())
 
+    def ancestors(self, targets):
+        """Names of the target arguments (names or Arguments) and of all arguments that attack or support them, transitively"""
+        names = [t.name if isinstance(t, Argument) else t for t in targets]
+        for name in names:
+            if name not in self.arguments:
+                raise KeyError(f"unknown argument {name}")
+
+        seen = set(names)
+        stack = [self.arguments[name] for name in names]
+        while stack:
+            argument = stack.pop()
+            for parent in list(argument.attackers) + list(argument.supporters):
+                if parent.name not in seen:
+                    seen.add(parent.name)
+                    stack.append(parent)
+
+        return [name for name in self.arguments if name in seen]
+
+    def slice(self, targets):
+        """
+        The sub-BAG induced by the ancestors of the targets, which determine their strength values completely.
+        It shares the Argument objects with this BAG, so strength values computed on the slice are set here as well.
+        """
+        names = set(self.ancestors(targets))
+
+        sliced = BAG()
+        sliced.path = self.path
+        sliced.arguments = {name: argument for name, argument in self.arguments.items() if name in names}
+        sliced.attacks = [attack for attack in self.attacks if attack.attacked.name in names]
+        sliced.supports = [support for support in self.supports if support.supported.name in names]
+        return sliced
+
+    def merge_slice_strengths(self, sliced):
+        """Keeps the strength values computed on a slice of this BAG and resets all other arguments to their base score"""
+        for name, argument in self.arguments.items():
+            if name not in sliced.arguments:
+                argument.strength = argument.initial_weight
+
+    def __getstate__(self):
+        # Arguments reference each other through their attacker/supporter dictionaries, which pickle recursively
+        # (and overflow the stack for long chains); store a flat list of arguments and relations by name instead
+        return {
+            "path": self.path,
+            "arguments": [(a.name, a.initial_weight, a.strength) for a in self.arguments.values()],
+            "attacks": [(a.attacker.name, a.attacked.name, a.weight) for a in self.attacks],
+            "supports": [(s.supporter.name, s.supported.name, s.weight) for s in self.supports],
+        }
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self.arguments = {name: Argument(name, initial_weight, strength) for name, initial_weight, strength in state["arguments"]}
+        self.attacks = []
+        self.supports = []
+
+        for attacker, attacked, weight in state["attacks"]:
+            self.add_attack(self.arguments[attacker], self.arguments[attacked], weight)
+
+        for supporter, supported, weight in state["supports"]:
+            self.add_support(self.arguments[supporter], self.arguments[supported], weight)
+
+    def compile(self):
+        """Returns an integer-indexed, array-backed CompiledBAG of the current arguments and relations"""
+        return CompiledBAG.from_bag(self)
+
     def __str__(self) -> str:
         return f"BAG set to read from {self.path} with arguments: {self.arguments}, attacks: {self.attacks} and supports: {self.supports}"
 
@@ -0,0 +1,412 @@
+import numpy as np
+from .Argument import Argument
+from .CompiledBAG import CompiledBAG
+from .Parser import readBAG
+
+
+ATTACK = 0
+SUPPORT = 1
+
+
+class ArgumentView:
+    """Light-weight view of argument number id of a CompactBAG with the interface of Argument"""
+
+    __slots__ = ("bag", "id")
+
+    def __init__(self, bag, id) -> None:
+        self.bag = bag
+        self.id = id
+
+    @property
+    def name(self):
+        return self.bag.names[self.id]
+
+    @property
+    def initial_weight(self):
+        return float(self.bag.base_scores[self.id])
+
+    @property
+    def strength(self):
+        return float(self.bag.strengths[self.id])
+
+    @strength.setter
+    def strength(self, value):
+        self.bag.strengths[self.id] = value
+
+    @property
+    def attackers(self):
+        return self.bag.incoming(self.id, ATTACK)
+
+    @property
+    def supporters(self):
+        return self.bag.incoming(self.id, SUPPORT)
+
+    def get_name(self):
+        return self.name
+
+    def get_initial_weight(self):
+        return self.initial_weight
+
+    def reset_initial_weight(self, weight):
+        self.bag.base_scores[self.id] = weight
+        self.bag._compiled = None
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ArgumentView) and other.bag is self.bag and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash((id(self.bag), self.id))
+
+    def __repr__(self) -> str:
+        return f"ArgumentView {self.name}: initial weight {self.initial_weight}, strength {self.strength}"
+
+    def __str__(self) -> str:
+        return f"Argument(name={self.name}, weight={self.initial_weight}, strength={self.strength})"
+
+
+class EdgeView:
+    """Light-weight view of edge number id of a CompactBAG with the interface of Attack and Support"""
+
+    __slots__ = ("bag", "id")
+
+    def __init__(self, bag, id) -> None:
+        self.bag = bag
+        self.id = id
+
+    def get_source(self):
+        return ArgumentView(self.bag, int(self.bag.sources[self.id]))
+
+    def get_target(self):
+        return ArgumentView(self.bag, int(self.bag.targets[self.id]))
+
+    def get_weight(self):
+        return float(self.bag.weights[self.id])
+
+    get_attacker = get_supporter = get_source
+    get_attacked = get_supported = get_target
+
+    def __repr__(self) -> str:
+        kind = "Attack" if self.bag.kinds[self.id] == ATTACK else "Support"
+        return f"{kind}({self.get_source().name}, {self.get_target().name}, weight={self.get_weight()})"
+
+
+class EdgeList:
+    """Sequence of the attacks or supports of a CompactBAG, created on access"""
+
+    __slots__ = ("bag", "ids")
+
+    def __init__(self, bag, kind) -> None:
+        self.bag = bag
+        self.ids = np.flatnonzero(bag.kinds == kind)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        return EdgeView(self.bag, int(self.ids[i]))
+
+    def __iter__(self):
+        for i in self.ids:
+            yield EdgeView(self.bag, int(i))
+
+
+class ArgumentMap:
+    """Read-only mapping from argument names to ArgumentViews, mirroring BAG.arguments"""
+
+    __slots__ = ("bag",)
+
+    def __init__(self, bag) -> None:
+        self.bag = bag
+
+    def __len__(self) -> int:
+        return self.bag.n
+
+    def __contains__(self, name) -> bool:
+        return name in self.bag.index
+
+    def __getitem__(self, name):
+        return ArgumentView(self.bag, self.bag.index[name])
+
+    def __iter__(self):
+        return iter(self.bag.names)
+
+    def keys(self):
+        return list(self.bag.names)
+
+    def values(self):
+        return [ArgumentView(self.bag, i) for i in range(self.bag.n)]
+
+    def items(self):
+        return [(name, ArgumentView(self.bag, i)) for i, name in enumerate(self.bag.names)]
+
+
+class CompactBAG:
+    """
+    Memory-compact BAG for very large graphs. Arguments are integer ids with parallel base score and
+    strength arrays; relations are stored in typed source/target/weight/kind arrays (17 bytes per edge)
+    instead of Attack/Support objects and per-argument dictionaries. The object interface of BAG
+    (arguments, attacks, supports, add_attack, add_support, ...) is provided through views that are
+    created on access. Adding the same relation twice keeps the last weight, as in BAG.
+    """
+
+    def __init__(self, path=None, capacity=16, edge_capacity=16) -> None:
+        self.names = []
+        self.index = {}
+        self.n = 0
+        self.m = 0
+        self.path = None
+
+        self._base_scores = np.empty(capacity, dtype=np.float64)
+        self._strengths = np.empty(capacity, dtype=np.float64)
+        self._sources = np.empty(edge_capacity, dtype=np.int32)
+        self._targets = np.empty(edge_capacity, dtype=np.int32)
+        self._weights = np.empty(edge_capacity, dtype=np.float64)
+        self._kinds = np.empty(edge_capacity, dtype=np.int8)
+
+        self._compiled = None
+
+        if path is not None:
+            self.path = path
+            readBAG(path, self)
+
+    base_scores = property(lambda self: self._base_scores[:self.n])
+    strengths = property(lambda self: self._strengths[:self.n])
+    sources = property(lambda self: self._sources[:self.m])
+    targets = property(lambda self: self._targets[:self.m])
+    weights = property(lambda self: self._weights[:self.m])
+    kinds = property(lambda self: self._kinds[:self.m])
+
+    @property
+    def arguments(self):
+        return ArgumentMap(self)
+
+    @property
+    def attacks(self):
+        return EdgeList(self, ATTACK)
+
+    @property
+    def supports(self):
+        return EdgeList(self, SUPPORT)
+
+    def __getstate__(self):
+        # only the used part of the buffers is pickled, the compiled form is rebuilt on demand
+        state = dict(self.__dict__)
+        for key in ("_base_scores", "_strengths"):
+            state[key] = state[key][:self.n].copy()
+        for key in ("_sources", "_targets", "_weights", "_kinds"):
+            state[key] = state[key][:self.m].copy()
+        state["_compiled"] = None
+        return state
+
+    @staticmethod
+    def _grown(array, size):
+        if size <= len(array):
+            return array
+        new = np.empty(max(size, 2 * len(array)), dtype=array.dtype)
+        new[:len(array)] = array
+        return new
+
+    def _reserve(self, arguments, edges):
+        if arguments > len(self._base_scores):
+            self._base_scores = self._grown(self._base_scores, arguments)
+            self._strengths = self._grown(self._strengths, arguments)
+
+        if edges > len(self._sources):
+            self._sources = self._grown(self._sources, edges)
+            self._targets = self._grown(self._targets, edges)
+            self._weights = self._grown(self._weights, edges)
+            self._kinds = self._grown(self._kinds, edges)
+
+    def add_argument(self, name, initial_weight, strength=None):
+        """Adds an argument (or resets base score and strength of an existing one) and returns its id"""
+        if type(initial_weight) != int and type(initial_weight) != float:
+            raise TypeError("initial_weight must be of type integer or float")
+
+        self._compiled = None
+        id = self.index.get(name)
+        if id is None:
+            id = self.n
+            self._reserve(self.n + 1, self.m)
+            self.names.append(name)
+            self.index[name] = id
+            self.n += 1
+
+        self._base_scores[id] = initial_weight
+        self._strengths[id] = initial_weight if strength is None else strength
+        return id
+
+    def add_arguments(self, names, initial_weights):
+        """Bulk version of add_argument for new names; returns the array of ids"""
+        names = list(names)
+        initial_weights = np.asarray(initial_weights, dtype=np.float64)
+        if any(name in self.index for name in names) or len(set(names)) != len(names):
+            raise ValueError("add_arguments expects new, distinct argument names")
+
+        self._compiled = None
+        ids = np.arange(self.n, self.n + len(names))
+        self._reserve(self.n + len(names), self.m)
+        self._base_scores[ids] = initial_weights
+        self._strengths[ids] = initial_weights
+        self.index.update(zip(names, ids.tolist()))
+        self.names.extend(names)
+        self.n += len(names)
+        return ids
+
+    def argument_id(self, argument):
+        """Id of an ArgumentView, Argument or argument name; Arguments that are not in the BAG yet are added"""
+        if isinstance(argument, ArgumentView):
+            if argument.bag is not self:
+                return self.argument_id(argument.name)
+            return argument.id
+
+        if isinstance(argument, Argument):
+            if argument.name in self.index:
+                return self.index[argument.name]
+            return self.add_argument(argument.name, argument.initial_weight, argument.strength)
+
+        return self.index[argument]
+
+    def add_edges(self, sources, targets, kind, weights=1):
+        """Bulk insertion of relations of one kind (ATTACK or SUPPORT) between argument ids"""
+        sources = np.asarray(sources, dtype=np.int32)
+        targets = np.asarray(targets, dtype=np.int32)
+        if len(sources) != len(targets):
+            raise ValueError("sources and targets must have the same length")
+        if len(sources) > 0 and (max(sources.max(), targets.max()) >= self.n or min(sources.min(), targets.min()) < 0):
+            raise IndexError("argument id out of range")
+
+        self._compiled = None
+        edges = slice(self.m, self.m + len(sources))
+        self._reserve(self.n, self.m + len(sources))
+        self._sources[edges] = sources
+        self._targets[edges] = targets
+        self._weights[edges] = weights
+        self._kinds[edges] = kind
+        self.m += len(sources)
+
+    def add_attack(self, attacker, attacked, attack_weight=1):
+        self.add_edges([self.argument_id(attacker)], [self.argument_id(attacked)], ATTACK, attack_weight)
+
+    def add_support(self, supporter, supported, support_weight=1):
+        self.add_edges([self.argument_id(supporter)], [self.argument_id(supported)], SUPPORT, support_weight)
+
+    def incoming(self, id, kind):
+        """Dictionary {ArgumentView: weight} of the attackers (kind ATTACK) or supporters (kind SUPPORT) of argument id"""
+        compiled = self._compiled if self._compiled is not None else self.compile()
+        if kind == ATTACK:
+            indptr, indices, weights = compiled.att_indptr, compiled.att_indices, compiled.att_weights
+        else:
+            indptr, indices, weights = compiled.sup_indptr, compiled.sup_indices, compiled.sup_weights
+
+        edges = slice(indptr[id], indptr[id + 1])
+        return {ArgumentView(self, int(j)): float(w) for j, w in zip(indices[edges], weights[edges])}
+
+    def compile(self):
+        """Returns the CompiledBAG of the current graph (cached until the graph changes)"""
+        if self._compiled is not None:
+            # base scores and strengths can be written through their array views without invalidating the cache
+            self._compiled.base_scores = self.base_scores.copy()
+            self._compiled.strengths = self.strengths.copy()
+            return self._compiled
+
+        def csr(kind):
+            mask = self.kinds == kind
+            sources = self.sources[mask].astype(np.int64)
+            targets = self.targets[mask].astype(np.int64)
+            weights = self.weights[mask]
+
+            # sort by target, then source; for duplicate relations the last one wins
+            keys = targets * max(self.n, 1) + sources
+            unique_keys, last = np.unique(keys[::-1], return_index=True)
+            last = len(keys) - 1 - last
+
+            indptr = np.concatenate(([0], np.cumsum(np.bincount(targets[last], minlength=self.n))))
+            return indptr, sources[last], weights[last]
+
+        att_indptr, att_indices, att_weights = csr(ATTACK)
+        sup_indptr, sup_indices, sup_weights = csr(SUPPORT)
+
+        self._compiled = CompiledBAG(self.names, self.base_scores.copy(), att_indptr, att_indices, att_weights,
+                                     sup_indptr, sup_indices, sup_weights, strengths=self.strengths.copy())
+        return self._compiled
+
+    def ancestors(self, targets):
+        """Names of the target arguments and of all arguments that attack or support them, transitively"""
+        compiled = self.compile()
+        rows = np.array([self.argument_id(t) for t in targets], dtype=np.int64)
+        return [compiled.names[i] for i in compiled.ancestors(rows).tolist()]
+
+    def slice(self, targets):
+        """The CompactBAG induced by the ancestors of the targets, which determine their strength values completely"""
+        compiled = self.compile()
+        rows = np.array([self.argument_id(t) for t in targets], dtype=np.int64)
+        return CompactBAG.from_compiled(compiled.subgraph(compiled.ancestors(rows)))
+
+    def merge_slice_strengths(self, sliced):
+        """Takes the strength values computed on a slice of this bag and resets all other arguments to their base score"""
+        self.reset_strength_values()
+        ids = np.array([self.index[name] for name in sliced.names], dtype=np.int64)
+        self.strengths[ids] = sliced.strengths
+
+    def set_strengths(self, strengths):
+        self.strengths[:] = strengths
+
+    def reset_strength_values(self):
+        self.strengths[:] = self.base_scores
+
+    def get_arguments(self):
+        return self.arguments.values()
+
+    def memory_usage(self):
+        """Approximate number of bytes used by the array storage (excluding the argument names)"""
+        arrays = (self._base_scores, self._strengths, self._sources, self._targets, self._weights, self._kinds)
+        return sum(array.nbytes for array in arrays)
+
+    @classmethod
+    def from_bag(cls, bag, prefix=""):
+        """Converts a BAG (or CompactBAG) into a CompactBAG, optionally prefixing all argument names"""
+        return cls.from_compiled(bag.compile(), prefix)
+
+    @classmethod
+    def from_compiled(cls, compiled, prefix=""):
+        """Converts a CompiledBAG (e.g. loaded with loadSnapshot) into a CompactBAG"""
+        compact = cls(capacity=max(compiled.n, 1), edge_capacity=max(len(compiled.att_indices) + len(compiled.sup_indices), 1))
+        compact.add_arguments([f"{prefix}{name}" for name in compiled.names], compiled.base_scores)
+        compact.strengths[:] = compiled.strengths
+        compact.add_edges(compiled.att_indices, compiled.att_targets, ATTACK, compiled.att_weights)
+        compact.add_edges(compiled.sup_indices, compiled.sup_targets, SUPPORT, compiled.sup_weights)
+        return compact
+
+    @classmethod
+    def merge(cls, bags, prefixes=None):
+        """
+        Merges BAGs (or CompactBAGs) into one CompactBAG. Argument names are prefixed with prefixes[k]
+        (default "k:") to keep the graphs apart; pass empty prefixes to identify arguments with the same name.
+        """
+        if prefixes is None:
+            prefixes = [f"{k}:" for k in range(len(bags))]
+
+        merged = cls()
+        for bag, prefix in zip(bags, prefixes):
+            compiled = bag.compile()
+            names = [f"{prefix}{name}" for name in compiled.names]
+
+            new = [i for i, name in enumerate(names) if name not in merged.index]
+            merged.add_arguments([names[i] for i in new], compiled.base_scores[new])
+            if new:
+                merged.strengths[len(merged) - len(new):] = compiled.strengths[new]
+
+            ids = np.array([merged.index[name] for name in names], dtype=np.int64)
+            merged.add_edges(ids[compiled.att_indices], ids[compiled.att_targets], ATTACK, compiled.att_weights)
+            merged.add_edges(ids[compiled.sup_indices], ids[compiled.sup_targets], SUPPORT, compiled.sup_weights)
+
+        return merged
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __str__(self) -> str:
+        return f"CompactBAG with {self.n} arguments, {len(self.attacks)} attacks and {len(self.supports)} supports"
+
+    def __repr__(self) -> str:
+        return f"CompactBAG(arguments={self.n}, edges={self.m})"
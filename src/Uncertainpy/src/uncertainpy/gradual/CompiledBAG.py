@@ -0,0 +1,299 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import breadth_first_order
+
+
+class CompiledBAG:
+    """
+    Integer-indexed, array-backed form of a BAG used by the vectorised derivative kernels.
+
+    Argument i has base score base_scores[i]. The attackers of argument i are
+    att_indices[att_indptr[i]:att_indptr[i+1]] with weights att_weights[att_indptr[i]:att_indptr[i+1]]
+    (CSR layout, one row per attacked argument), and analogously for supporters.
+    """
+
+    def __init__(self, names, base_scores, att_indptr, att_indices, att_weights,
+                 sup_indptr, sup_indices, sup_weights, strengths=None, arguments=None) -> None:
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.n = len(self.names)
+
+        self.base_scores = np.asarray(base_scores, dtype=np.float64)
+        if strengths is None:
+            strengths = self.base_scores
+        self.strengths = np.array(strengths, dtype=np.float64)
+
+        self.att_indptr = np.asarray(att_indptr, dtype=np.int64)
+        self.att_indices = np.asarray(att_indices, dtype=np.int64)
+        self.att_weights = np.asarray(att_weights, dtype=np.float64)
+        self.sup_indptr = np.asarray(sup_indptr, dtype=np.int64)
+        self.sup_indices = np.asarray(sup_indices, dtype=np.int64)
+        self.sup_weights = np.asarray(sup_weights, dtype=np.float64)
+
+        # row (attacked/supported argument) of every edge, used for segment sums
+        self.att_targets = np.repeat(np.arange(self.n), np.diff(self.att_indptr))
+        self.sup_targets = np.repeat(np.arange(self.n), np.diff(self.sup_indptr))
+
+        # Argument objects the arrays were compiled from (None for graphs built from arrays)
+        self.arguments = arguments
+
+        if len(self.base_scores) != self.n or len(self.att_indptr) != self.n + 1 or len(self.sup_indptr) != self.n + 1:
+            raise ValueError("array lengths do not match the number of arguments")
+
+    @classmethod
+    def from_bag(cls, bag):
+        arguments = list(bag.arguments.values())
+        index = {arg: i for i, arg in enumerate(arguments)}
+
+        att_indptr = [0]
+        att_indices = []
+        att_weights = []
+        sup_indptr = [0]
+        sup_indices = []
+        sup_weights = []
+
+        for arg in arguments:
+            for attacker, weight in arg.attackers.items():
+                att_indices.append(index[attacker])
+                att_weights.append(weight)
+            att_indptr.append(len(att_indices))
+
+            for supporter, weight in arg.supporters.items():
+                sup_indices.append(index[supporter])
+                sup_weights.append(weight)
+            sup_indptr.append(len(sup_indices))
+
+        return cls([arg.name for arg in arguments],
+                   [arg.initial_weight for arg in arguments],
+                   att_indptr, att_indices, att_weights,
+                   sup_indptr, sup_indices, sup_weights,
+                   strengths=[arg.strength for arg in arguments],
+                   arguments=arguments)
+
+    @classmethod
+    def concatenate(cls, graphs):
+        """
+        Block-diagonal union of compiled graphs, so that several BAGs can be integrated as one system.
+        Argument names become (graph number, name) pairs; graph k occupies indices offsets[k]:offsets[k+1].
+        """
+        sizes = [g.n for g in graphs]
+        offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+
+        def stack_indptr(indptrs):
+            ends = np.cumsum([indptr[-1] for indptr in indptrs])
+            starts = np.concatenate(([0], ends[:-1]))
+            return np.concatenate([[0]] + [indptr[1:] + start for indptr, start in zip(indptrs, starts)])
+
+        compiled = cls([(k, name) for k, g in enumerate(graphs) for name in g.names],
+                       np.concatenate([g.base_scores for g in graphs] + [np.zeros(0)]),
+                       stack_indptr([g.att_indptr for g in graphs]),
+                       np.concatenate([g.att_indices + o for g, o in zip(graphs, offsets)] + [np.zeros(0, np.int64)]),
+                       np.concatenate([g.att_weights for g in graphs] + [np.zeros(0)]),
+                       stack_indptr([g.sup_indptr for g in graphs]),
+                       np.concatenate([g.sup_indices + o for g, o in zip(graphs, offsets)] + [np.zeros(0, np.int64)]),
+                       np.concatenate([g.sup_weights for g in graphs] + [np.zeros(0)]),
+                       strengths=np.concatenate([g.strengths for g in graphs] + [np.zeros(0)]))
+        compiled.offsets = offsets
+        return compiled
+
+    def _row_edges(self, indptr, rows):
+        """Positions of the edges stored in the given CSR rows and the (local) row each of them belongs to"""
+        counts = indptr[rows + 1] - indptr[rows]
+        local_rows = np.repeat(np.arange(len(rows)), counts)
+        offsets = np.repeat(indptr[rows] - (np.cumsum(counts) - counts), counts)
+        return offsets + np.arange(counts.sum()), local_rows
+
+    def parents(self, rows):
+        """Sorted indices of all attackers and supporters of the given arguments"""
+        rows = np.asarray(rows, dtype=np.int64)
+        att_edges, _ = self._row_edges(self.att_indptr, rows)
+        sup_edges, _ = self._row_edges(self.sup_indptr, rows)
+        return np.unique(np.concatenate((self.att_indices[att_edges], self.sup_indices[sup_edges])))
+
+    def with_parents(self, rows):
+        """The given arguments followed by those of their attackers and supporters that are not among them"""
+        rows = np.asarray(rows, dtype=np.int64)
+        return np.concatenate((rows, np.setdiff1d(self.parents(rows), rows)))
+
+    def children(self, rows):
+        """Sorted indices of all arguments attacked or supported by the given arguments"""
+        adjacency = self.adjacency()
+        rows = np.asarray(rows, dtype=np.int64)
+        edges, _ = self._row_edges(adjacency.indptr, rows)
+        return np.unique(adjacency.indices[edges])
+
+    def _reachable(self, adjacency, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return rows
+
+        if len(rows) == 1:
+            return np.sort(breadth_first_order(adjacency, rows[0], directed=True, return_predecessors=False))
+
+        # breadth-first search from a virtual argument n that points to all given arguments
+        extended = sp.vstack((sp.hstack((adjacency, sp.csr_matrix((self.n, 1)))),
+                              sp.csr_matrix((np.ones(len(rows)), (np.zeros(len(rows), dtype=np.int64), rows)), shape=(1, self.n + 1))))
+        reached = breadth_first_order(extended.tocsr(), self.n, directed=True, return_predecessors=False)
+        return np.sort(reached[reached != self.n])
+
+    def descendants(self, rows):
+        """Sorted indices of all arguments reachable from the given arguments via attacks and supports (including them)"""
+        return self._reachable(self.adjacency(), rows)
+
+    def ancestors(self, rows):
+        """Sorted indices of all arguments from which the given arguments are reachable via attacks and supports (including them)"""
+        return self._reachable(self.adjacency().T.tocsr(), rows)
+
+    def adjacency(self):
+        """Sparse (n x n) matrix with entry (i, j) = 1 if argument i attacks or supports argument j; cached"""
+        if getattr(self, "_adjacency", None) is None:
+            sources = np.concatenate((self.att_indices, self.sup_indices))
+            targets = np.concatenate((self.att_targets, self.sup_targets))
+            adjacency = sp.csr_matrix((np.ones(len(sources)), (sources, targets)), shape=(self.n, self.n))
+            adjacency.sum_duplicates()
+            self._adjacency = adjacency
+
+        return self._adjacency
+
+    def subgraph(self, indices):
+        """Induced CompiledBAG on the given argument indices (in the given order); edges leaving the set are dropped"""
+        indices = np.asarray(indices, dtype=np.int64)
+        position = np.full(self.n, -1, dtype=np.int64)
+        position[indices] = np.arange(len(indices))
+
+        def restrict(indptr, sources, weights):
+            edges, local_rows = self._row_edges(indptr, indices)
+            local_sources = position[sources[edges]]
+            keep = local_sources >= 0
+            counts = np.bincount(local_rows[keep], minlength=len(indices))
+            return np.concatenate(([0], np.cumsum(counts))), local_sources[keep], weights[edges][keep]
+
+        att_indptr, att_indices, att_weights = restrict(self.att_indptr, self.att_indices, self.att_weights)
+        sup_indptr, sup_indices, sup_weights = restrict(self.sup_indptr, self.sup_indices, self.sup_weights)
+
+        arguments = None if self.arguments is None else [self.arguments[i] for i in indices]
+        return CompiledBAG([self.names[i] for i in indices], self.base_scores[indices],
+                           att_indptr, att_indices, att_weights, sup_indptr, sup_indices, sup_weights,
+                           strengths=self.strengths[indices], arguments=arguments)
+
+    def without_edges(self, attacks=(), supports=()):
+        """Copy without the attacks and supports at the given edge positions (in the order of att_indices and sup_indices)"""
+        def drop(indptr, indices, weights, targets, edges):
+            keep = np.ones(len(indices), dtype=bool)
+            keep[np.asarray(edges, dtype=np.int64)] = False
+            counts = np.bincount(targets[keep], minlength=self.n)
+            return np.concatenate(([0], np.cumsum(counts))), indices[keep], weights[keep]
+
+        return CompiledBAG(self.names, self.base_scores,
+                           *drop(self.att_indptr, self.att_indices, self.att_weights, self.att_targets, attacks),
+                           *drop(self.sup_indptr, self.sup_indices, self.sup_weights, self.sup_targets, supports),
+                           strengths=self.strengths, arguments=self.arguments)
+
+    def _segment_sum(self, targets, indices, weights, values):
+        return np.bincount(targets, weights=values[indices] * weights, minlength=self.n)
+
+    def _edges(self):
+        """
+        Attacks followed by supports as (sources, targets, rows, signed weights, weights, signs), where rows puts supports
+        into n..2n-1 so that one bincount over 2n rows separates them; cached as long as the weight arrays are not replaced
+        """
+        cache = getattr(self, "_edge_cache", None)
+        if cache is None or cache[0] is not self.att_weights or cache[1] is not self.sup_weights:
+            sources = np.concatenate((self.att_indices, self.sup_indices))
+            targets = np.concatenate((self.att_targets, self.sup_targets))
+            rows = np.concatenate((self.att_targets, self.sup_targets + self.n))
+            signed_weights = np.concatenate((-self.att_weights, self.sup_weights))
+            weights = np.concatenate((self.att_weights, self.sup_weights))
+            signs = np.concatenate((np.full(len(self.att_weights), -1.0), np.ones(len(self.sup_weights))))
+            cache = (self.att_weights, self.sup_weights, sources, targets, rows, signed_weights, weights, signs)
+            self._edge_cache = cache
+
+        return cache[2:]
+
+    def edges(self):
+        """Sources, targets, weights and signs (-1 for attacks, 1 for supports) of all attacks followed by all supports"""
+        sources, targets, _, _, weights, signs = self._edges()
+        return sources, targets, weights, signs
+
+    def net_sum(self, values, weighted=True):
+        """
+        Sum of values over the supporters minus that over the attackers of every argument, in one pass; each value is
+        multiplied by the weight of its edge if weighted.
+        """
+        sources, targets, _, signed_weights, _, signs = self._edges()
+        return np.bincount(targets, weights=values[sources] * (signed_weights if weighted else signs), minlength=self.n)
+
+    def incoming_weight(self, weighted=True):
+        """Sum of the absolute weights of the attacks and supports of every argument (their number if not weighted)"""
+        _, targets, _, _, weights, _ = self._edges()
+        return np.bincount(targets, weights=np.abs(weights) if weighted else None, minlength=self.n).astype(np.float64)
+
+    def products(self, values, power=1, weighted=True):
+        """
+        Products of (1 - weight * value)**power (1 - value if not weighted) over the attackers and over the supporters
+        of every argument. Computed as exp of segment sums of log1p(-weight * value), so high in-degrees neither
+        underflow in intermediate products nor need a Python loop; factors equal to 0 give a product of 0.
+        """
+        sources, _, rows, _, weights, _ = self._edges()
+        scaled = weights * values[sources] if weighted else values[sources]
+
+        with np.errstate(divide="ignore"):
+            logs = np.log1p(-np.minimum(scaled, 1.0))
+            negative = scaled > 1
+            if negative.any():
+                logs[negative] = np.log(scaled[negative] - 1)
+
+        products = np.exp(power * np.bincount(rows, weights=logs, minlength=2 * self.n))
+        if power % 2 == 1 and negative.any():
+            products[np.bincount(rows, weights=negative, minlength=2 * self.n) % 2 == 1] *= -1
+
+        return products[:self.n], products[self.n:]
+
+    def edge_products(self, values, power=1, weighted=True):
+        """
+        For every edge (attacks followed by supports), the product of the factors (1 - weight * value)**power of products
+        over the other edges of the same relation into the same argument, i.e. the derivative of that product with respect
+        to the (powered) factor of the edge. Zero factors are counted instead of taken into the log-sum, so the products of the other
+        factors stay exact.
+        """
+        sources, _, rows, _, weights, _ = self._edges()
+        factors = 1 - (weights * values[sources] if weighted else values[sources])
+        if power != 1:
+            factors = factors**power
+
+        zero = factors == 0
+        negative = factors < 0
+        logs = np.log(np.abs(np.where(zero, 1.0, factors)))
+
+        others_logs = np.bincount(rows, weights=logs, minlength=2 * self.n)[rows] - logs
+        others_zeros = np.bincount(rows, weights=zero, minlength=2 * self.n)[rows] - zero
+        others_negative = np.bincount(rows, weights=negative, minlength=2 * self.n)[rows] - negative
+
+        products = np.where(others_zeros > 0, 0.0, np.exp(others_logs))
+        products[others_negative % 2 == 1] *= -1
+        return products
+
+    def attack_sum(self, values):
+        """Weighted sum of values over the attackers of every argument."""
+        return self._segment_sum(self.att_targets, self.att_indices, self.att_weights, values)
+
+    def support_sum(self, values):
+        """Weighted sum of values over the supporters of every argument."""
+        return self._segment_sum(self.sup_targets, self.sup_indices, self.sup_weights, values)
+
+    def attack_product(self, values):
+        """Product of (1 - weight * value) over the attackers of every argument."""
+        return self.products(values)[0]
+
+    def support_product(self, values):
+        """Product of (1 - weight * value) over the supporters of every argument."""
+        return self.products(values)[1]
+
+    def strength_dict(self, state):
+        return {name: float(s) for name, s in zip(self.names, state)}
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __repr__(self) -> str:
+        return f"CompiledBAG(arguments={self.n}, attacks={len(self.att_indices)}, supports={len(self.sup_indices)})"
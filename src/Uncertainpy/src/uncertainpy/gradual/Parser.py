@@ -0,0 +1,81 @@
+import os
+import re
+from .Argument import Argument
+
+
+# arg(name, base score), att(attacker, attacked[, weight]), sup(supporter, supported[, weight]); the final period is optional
+STATEMENT = re.compile(r"\s*(arg|att|sup)\s*\(\s*([^,()\s]+)\s*,\s*([^,()\s]+)\s*(?:,\s*([^,()\s]+)\s*)?\)\s*\.?\s*")
+
+
+class BAGSyntaxError(ValueError):
+    def __init__(self, message, path=None, line_number=None, line=None) -> None:
+        self.path = path
+        self.line_number = line_number
+        self.line = line
+        location = f"{path or '<input>'}, line {line_number}"
+        super().__init__(f"{location}: {message}" + (f"\n    {line.strip()}" if line else ""))
+
+
+def parseBAG(lines, path=None):
+    """
+    Parses the statements of a .bag file one line at a time. Yields (line number, kind, first, second, weight)
+    where kind is "arg", "att" or "sup"; for "arg", first is the name and weight the base score, otherwise first and
+    second are the names of the related arguments and weight the relation weight (1 if omitted). Empty lines are skipped.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line or line.isspace():
+            continue
+
+        match = STATEMENT.fullmatch(line)
+        if match is None:
+            raise BAGSyntaxError("expected arg(name, weight), att(attacker, attacked) or sup(supporter, supported)",
+                                 path, line_number, line)
+
+        kind, first, second, weight = match.groups()
+        if kind == "arg":
+            if weight is not None:
+                raise BAGSyntaxError("arg takes a name and a base score", path, line_number, line)
+            weight, second = second, None
+
+        try:
+            weight = 1 if weight is None else float(weight)
+        except ValueError:
+            raise BAGSyntaxError(f"weight {weight} is not a number", path, line_number, line) from None
+
+        yield line_number, kind, first, second, weight
+
+
+def readBAG(path, bag):
+    """Reads the .bag file at path into bag (a BAG or CompactBAG); attacks and supports must refer to declared arguments"""
+    # CompactBAGs are filled by name and receive their relations in bulk, BAGs get Argument objects
+    compact = hasattr(bag, "add_argument")
+    relations = {"att": ([], [], []), "sup": ([], [], [])}
+
+    with open(os.path.abspath(path), "r") as f:
+        for line_number, kind, first, second, weight in parseBAG(f, path):
+            if kind == "arg":
+                if compact:
+                    bag.add_argument(first, weight)
+                else:
+                    bag.arguments[first] = Argument(first, weight)
+                continue
+
+            for name in (first, second):
+                if name not in bag.arguments:
+                    raise BAGSyntaxError(f"argument {name} is used before it is declared", path, line_number)
+
+            if compact:
+                sources, targets, weights = relations[kind]
+                sources.append(bag.index[first])
+                targets.append(bag.index[second])
+                weights.append(weight)
+            elif kind == "att":
+                bag.add_attack(bag.arguments[first], bag.arguments[second], weight)
+            else:
+                bag.add_support(bag.arguments[first], bag.arguments[second], weight)
+
+    if compact:
+        bag.add_edges(*relations["att"][:2], 0, relations["att"][2])
+        bag.add_edges(*relations["sup"][:2], 1, relations["sup"][2])
+
+    return bag
@@ -0,0 +1,69 @@
+import numpy as np
+from .CompiledBAG import CompiledBAG
+
+
+SNAPSHOT_VERSION = 1
+
+
+def saveSnapshot(bags, path, compressed=False):
+    """
+    Writes one or several BAGs (BAG, CompactBAG or CompiledBAG) to a single .npz file: base scores, strengths
+    and the CSR attack/support arrays of all graphs concatenated, plus the argument and edge offsets of every graph.
+    Argument names are stored as strings. Uncompressed files (the default) are read back without decoding.
+    """
+    single = not isinstance(bags, (list, tuple))
+    graphs = [bags] if single else list(bags)
+    graphs = [g if isinstance(g, CompiledBAG) else g.compile() for g in graphs]
+
+    def join(key, dtype):
+        return np.concatenate([getattr(g, key) for g in graphs] + [np.zeros(0, dtype)]).astype(dtype)
+
+    def offsets(sizes):
+        return np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+
+    arrays = {key: join(key, np.float64) for key in ("base_scores", "strengths", "att_weights", "sup_weights")}
+    arrays.update({key: join(key, np.int64) for key in ("att_indices", "sup_indices")})
+
+    # indptr arrays are stored per graph (local edge positions), so graph k has n_k + 1 entries in them
+    arrays["att_indptr"] = join("att_indptr", np.int64)
+    arrays["sup_indptr"] = join("sup_indptr", np.int64)
+    arrays["offsets"] = offsets([g.n for g in graphs])
+    arrays["att_offsets"] = offsets([len(g.att_indices) for g in graphs])
+    arrays["sup_offsets"] = offsets([len(g.sup_indices) for g in graphs])
+    arrays["names"] = np.array([str(name) for g in graphs for name in g.names], dtype=np.str_)
+    arrays["header"] = np.array([SNAPSHOT_VERSION, int(single)], dtype=np.int64)
+
+    with open(path, "wb") as f:
+        (np.savez_compressed if compressed else np.savez)(f, **arrays)
+
+
+def loadSnapshot(path):
+    """
+    Reads a file written by saveSnapshot. Returns a CompiledBAG if a single BAG was saved and a list of CompiledBAGs
+    otherwise; they can be solved directly (e.g. with solveBatch) or converted with CompactBAG.from_compiled.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+
+    version, single = arrays["header"].tolist()
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {version}")
+
+    names = arrays["names"].tolist()
+    offsets = arrays["offsets"]
+    att_offsets = arrays["att_offsets"]
+    sup_offsets = arrays["sup_offsets"]
+
+    graphs = []
+    for k in range(len(offsets) - 1):
+        nodes = slice(offsets[k], offsets[k + 1])
+        indptr = slice(offsets[k] + k, offsets[k + 1] + k + 1)
+        attacks = slice(att_offsets[k], att_offsets[k + 1])
+        supports = slice(sup_offsets[k], sup_offsets[k + 1])
+
+        graphs.append(CompiledBAG(names[nodes], arrays["base_scores"][nodes],
+                                  arrays["att_indptr"][indptr], arrays["att_indices"][attacks], arrays["att_weights"][attacks],
+                                  arrays["sup_indptr"][indptr], arrays["sup_indices"][supports], arrays["sup_weights"][supports],
+                                  strengths=arrays["strengths"][nodes]))
+
+    return graphs[0] if single else graphs
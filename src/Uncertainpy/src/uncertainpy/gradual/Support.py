@@ -1,4 +1,6 @@
 class Support:
+    __slots__ = ("supporter", "supported", "weight")
+
     def __init__(self, supporter, supported, weight=1) -> None:
         self.supporter = supporter
         self.supported = supported
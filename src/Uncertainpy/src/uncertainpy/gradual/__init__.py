@@ -1,4 +1,8 @@
 from .algorithms import *
 from .BAG import *
+from .CompiledBAG import *
+from .CompactBAG import *
+from .Parser import *
+from .Snapshot import *
 from .plotting import *
 from .semantics import *
\ No newline at end of file
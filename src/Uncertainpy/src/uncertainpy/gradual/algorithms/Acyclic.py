@@ -1,11 +1,13 @@
+from collections import deque
 
-def computeStrengthValues(bag, agg_f, inf_f):
+
+def computeStrengthValues(bag, agg_f, inf_f, verbose=True):
     """
     Computes strength values in acyclic BAGs using a topological ordering and forward propagation
     of the base scores. If the graph contains cycles, None will be returned
     """
     
-    order = computeTopOrder(bag)
+    order = computeTopOrder(bag, verbose)
     if order == None:
         return None
     
@@ -23,7 +25,7 @@ def computeStrengthValues(bag, agg_f, inf_f):
     
 
     
-def computeTopOrder(bag):
+def computeTopOrder(bag, verbose=True):
     """
     Compute topological order for given bag or return None if bag is cyclic.
     """
@@ -45,7 +47,7 @@ def computeTopOrder(bag):
         supports[sup.get_supporter()].append(sup.get_supported())
 
     #determine source arguments
-    source_args = []
+    source_args = deque()
     for arg in args:
         if indeg[arg] == 0:
             source_args.append(arg)
@@ -55,7 +57,7 @@ def computeTopOrder(bag):
 
     while(len(source_args) > 0):
 
-        arg = source_args.pop(0)
+        arg = source_args.popleft()
         order.append(arg)
 
         #update children
@@ -70,8 +72,9 @@ def computeTopOrder(bag):
                 source_args.append(c)
 
     #if node is missing in order, the bag must be cyclic
-    if len(order) != len(args):   
-        print(f"Graph contains cycles. Found partial topological order {[arg.name for arg in order]}.")
+    if len(order) != len(args):
+        if verbose:
+            print(f"Graph contains cycles. Found partial topological order {[arg.name for arg in order]}.")
         return None
           
     return order
@@ -1,85 +1,190 @@
-class Approximator:
-    graph_data = {}
+import numpy as np
+from .Instrumentation import PhaseTimer, SolveResult
+from .Trajectory import TrajectoryRecorder
+
 
-    def __init__(self, ads, time=0, arguments=[], argument_strength={}, attacker={}, supporter={}, name="") -> None:
+class Approximator:
+    def __init__(self, ads, time=0, arguments=None, argument_strength=None, attacker=None, supporter=None, name="", recorder=None, max_time=None) -> None:
         self.ads = ads
         self.time = time
-        self.arguments = arguments
-        self.argument_strength = argument_strength
-        self.attacker = attacker
-        self.supporter = supporter
+        self.arguments = [] if arguments is None else arguments
+        self.argument_strength = {} if argument_strength is None else argument_strength
+        self.attacker = {} if attacker is None else attacker
+        self.supporter = {} if supporter is None else supporter
         self.name = name
+        self.status = None
+        self.recorder = TrajectoryRecorder() if recorder is None else recorder
+        # integration time after which integrate gives up (status "max_time"); None integrates until convergence
+        self.max_time = max_time
+
+        # instrumentation: callback(approximator, compiled, time, state, max_derivative) is called after every accepted
+        # step and stops the integration (status "stopped") by returning True
+        self.callbacks = []
+        self.accepted_steps = 0
+        self.derivative_evaluations = 0
+        self.result = None
+
+    def sub_approximators(self):
+        """Approximators this one delegates to; they share its recorder and callbacks"""
+        return []
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def reset_counters(self):
+        self.accepted_steps = 0
+        self.derivative_evaluations = 0
+        for approximator in self.sub_approximators():
+            approximator.reset_counters()
+
+    def total_steps(self):
+        return self.accepted_steps + sum(a.total_steps() for a in self.sub_approximators())
+
+    def total_derivative_evaluations(self):
+        return self.derivative_evaluations + sum(a.total_derivative_evaluations() for a in self.sub_approximators())
+
+    def after_step(self, compiled, time, state, max_derivative, generate_plot=False):
+        """Bookkeeping after an accepted step; returns True if a callback asks to stop"""
+        self.accepted_steps += 1
+        if generate_plot:
+            self.update_graph_data(time, state)
 
-    def initialise_arrays(self):
-        argument_set = list(self.ads.BAG.arguments.values())
-        arguments = []
-        argument_strength = {}
+        stop = False
+        for callback in self.callbacks:
+            if callback(self, compiled, time, state, max_derivative):
+                stop = True
 
-        for a in argument_set:
-            arguments.append(a)
-            argument_strength[a] = a.strength
+        return stop
 
-        attacker = {}
-        supporter = {}
+    def initialise_arrays(self):
+        compiled = self.ads.BAG.compile()
 
-        for a in argument_set:
+        self.ads.compiled = compiled
+        self.ads.state = compiled.strengths.copy()
+        self.ads.arguments = compiled.arguments
 
-            attacker_child = {}
-            for b in a.attackers:
-                attacker_child[b] = a.attackers[b]
+        if self.ads.has_kernel():
+            return
 
-            attacker[a] = attacker_child
+        if compiled.arguments is None:
+            # compact BAGs keep no Argument objects, the dictionary fallback runs on their views
+            compiled.arguments = self.ads.BAG.get_arguments()
+            self.ads.arguments = compiled.arguments
 
-            supporter_child = {}
-            for b in a.supporters:
-                supporter_child[b] = a.supporters[b]
+        # models without a vectorised kernel evaluate compute_derivative_at on dictionaries
+        attacker = {}
+        supporter = {}
 
-            supporter[a] = supporter_child
+        for a in compiled.arguments:
+            attacker[a] = dict(a.attackers)
+            supporter[a] = dict(a.supporters)
 
-        self.ads.arguments = arguments
-        self.ads.argument_strength = argument_strength
         self.ads.attacker = attacker
         self.ads.supporter = supporter
 
     def rewrite_arrays(self):
-        for a in self.ads.arguments:
-            a.strength = self.ads.argument_strength[a]
+        if self.ads.arguments is None:
+            # compact BAGs store strengths in an array instead of Argument objects
+            self.ads.BAG.set_strengths(self.ads.state)
+            self.ads.argument_strength = self.ads.compiled.strength_dict(self.ads.state)
+            return
 
-    def perform_iteration(delta, epsilon):
-        return None
+        argument_strength = {}
+        for a, strength in zip(self.ads.arguments, self.ads.state):
+            a.strength = float(strength)
+            argument_strength[a] = a.strength
 
-    def initialise_graph_data(self):
-        for argument in self.ads.arguments:
-            self.graph_data[argument.name] = [(0, argument.initial_weight)]
+        self.ads.argument_strength = argument_strength
 
-    def update_graph_data(self, time):
-        for argument in self.ads.arguments:
-            self.graph_data[argument.name].append((time, self.ads.argument_strength[argument]))
+    def compute_derivatives(self, compiled, state, free=None):
+        """Derivatives of all arguments at state; arguments outside the boolean mask free are kept fixed"""
+        self.derivative_evaluations += 1
+        derivatives = self.ads.compute_derivatives(compiled, state)
+        if free is not None:
+            derivatives = np.where(free, derivatives, 0.0)
 
-    def approximate_solution(self, delta, epsilon, verbose=False, generate_plot=False):
-        self.initialise_arrays()
+        return derivatives
 
-        if generate_plot:
-            self.initialise_graph_data()
+    def step(self, compiled, state, delta, free=None):
+        """Returns the state after one step of size delta and the derivative estimate the step followed"""
+        raise NotImplementedError
 
+    def perform_iteration(self, delta, epsilon):
+        self.ads.state, derivatives = self.step(self.ads.compiled, self.ads.state, delta)
+
+        if len(derivatives) == 0:
+            return 0
+
+        return float(np.max(np.abs(derivatives)))
+
+    @property
+    def graph_data(self):
+        """Trajectory of the last solve with generate_plot=True as {name: [(time, strength), ...]}"""
+        return self.recorder.as_dict()
+
+    def initialise_graph_data(self):
+        # plots start at the initial weights, also when a re-solve integrates from the previous strengths
+        self.recorder.start(self.ads.compiled.names, self.ads.compiled.base_scores)
+
+    def update_graph_data(self, time, state=None):
+        if state is None:
+            state = self.ads.state
+
+        self.recorder.record(time, state)
+
+    def integrate(self, compiled, state, delta, epsilon, free=None, generate_plot=False):
+        """
+        Advances state until the maximum derivative drops below epsilon; arguments outside the boolean mask free stay fixed.
+        Returns the final state, the integration time and the last maximum derivative and sets self.status.
+        """
         time = 0
-        time_limit = 99999999999
+        max_time = np.inf if self.max_time is None else self.max_time
         max_derivative = 0
 
         while True:
-            max_derivative = self.perform_iteration(delta, epsilon)
+            state, derivatives = self.step(compiled, state, delta, free)
+            max_derivative = float(np.max(np.abs(derivatives))) if len(derivatives) > 0 else 0
             time += delta
 
-            if generate_plot:
-                self.update_graph_data(time)
+            stopped = self.after_step(compiled, time, state, max_derivative, generate_plot)
 
-            if(max_derivative < epsilon or time >= time_limit):
+            if(max_derivative < epsilon or time >= max_time or stopped):
                 break
 
-        self.rewrite_arrays()
+        if max_derivative < epsilon:
+            self.status = "converged"
+        else:
+            self.status = "stopped" if stopped else "max_time"
+        return state, time, max_derivative
+
+    def approximate_solution(self, delta, epsilon, verbose=False, generate_plot=False):
+        timer = PhaseTimer()
+        self.reset_counters()
+
+        with timer.phase("compile"):
+            self.initialise_arrays()
+
+        if generate_plot:
+            self.initialise_graph_data()
+
+        with timer.phase("integrate"):
+            self.ads.state, time, max_derivative = self.integrate(self.ads.compiled, self.ads.state, delta, epsilon,
+                                                                  generate_plot=generate_plot)
+
+        if generate_plot:
+            self.recorder.finish(time, self.ads.state)
+
+        with timer.phase("write_back"):
+            self.rewrite_arrays()
+
+        compiled = self.ads.compiled
+        self.result = SolveResult(self.ads.name, self.name, compiled.n, len(compiled.att_indices) + len(compiled.sup_indices),
+                                  self.status, max_derivative, time, self.total_steps(), self.total_derivative_evaluations(),
+                                  timer.times, compiled.strength_dict(self.ads.state))
 
         if (verbose):
-            print_args = '\n'.join([str(x) for x in self.ads.arguments])
-            print(f"{self.ads.name}, {self.ads.approximator.name}\nTime: {time}\n{print_args}\n")
+            with timer.phase("report"):
+                print_args = '\n'.join([str(x) for x in self.ads.BAG.get_arguments()])
+                print(f"{self.ads.name}, {self.ads.approximator.name}\nTime: {time}\n{print_args}\n")
 
         return max_derivative
@@ -0,0 +1,82 @@
+import numpy as np
+from .RK4 import RK4
+from ..CompiledBAG import CompiledBAG
+
+
+class BatchResult:
+    """Per-graph outcome of solveBatch, in the order the graphs were passed"""
+
+    def __init__(self, strengths, converged, steps, max_derivatives, states=None) -> None:
+        self.strengths = strengths
+        # strength arrays, indexed like the compiled graphs
+        self.states = states
+        self.converged = converged
+        self.steps = steps
+        self.max_derivatives = max_derivatives
+
+    def __len__(self) -> int:
+        return len(self.strengths)
+
+    def __getitem__(self, i):
+        return self.strengths[i]
+
+    def __repr__(self) -> str:
+        return f"BatchResult(graphs={len(self)}, converged={sum(self.converged)})"
+
+
+def solveBatch(model, bags, delta=1e-2, epsilon=1e-4, approximator=RK4, max_steps=1000000, free=None):
+    """
+    Computes strength values for a list of BAGs (or CompiledBAGs) under the semantics of model by packing
+    them into one block-diagonal system. Every graph is integrated until its own maximum derivative drops
+    below epsilon; converged graphs are frozen and dropped from the system once half of them are done.
+    free optionally holds one boolean mask per graph; arguments outside their mask keep their strength.
+    The BAGs are not modified, strength values are returned in a BatchResult.
+    """
+
+    if not model.has_kernel():
+        raise TypeError("solveBatch requires a model with a vectorised compute_derivatives kernel")
+
+    graphs = [bag if isinstance(bag, CompiledBAG) else bag.compile() for bag in bags]
+    integrator = approximator(model)
+
+    states = [g.strengths.copy() for g in graphs]
+    masks = [np.ones(g.n, dtype=bool) for g in graphs] if free is None else [np.asarray(f, dtype=bool) for f in free]
+    converged = np.array([not mask.any() for mask in masks], dtype=bool)
+    steps = np.zeros(len(graphs), dtype=np.int64)
+    max_derivatives = np.zeros(len(graphs))
+
+    members = np.flatnonzero(~converged)
+    total_steps = 0
+
+    while len(members) > 0 and total_steps < max_steps:
+        compiled = CompiledBAG.concatenate([graphs[k] for k in members])
+        state = np.concatenate([states[k] for k in members])
+        sizes = np.diff(compiled.offsets)
+        starts = compiled.offsets[:-1]
+
+        active = np.ones(len(members), dtype=bool)
+        member_free = np.concatenate([masks[k] for k in members])
+        free = member_free
+
+        # iterate on this packing until half of its graphs converged, then repack the remaining ones
+        while active.sum() > len(members) // 2 and total_steps < max_steps:
+            state, derivatives = integrator.step(compiled, state, delta, free)
+            total_steps += 1
+
+            graph_max = np.maximum.reduceat(np.abs(derivatives), starts)
+            steps[members[active]] = total_steps
+            max_derivatives[members[active]] = graph_max[active]
+
+            done = active & (graph_max < epsilon)
+            if done.any():
+                active &= ~done
+                free = np.repeat(active, sizes) & member_free
+
+        for i, k in enumerate(members):
+            states[k] = state[compiled.offsets[i]:compiled.offsets[i + 1]]
+
+        converged[members[~active]] = True
+        members = members[active]
+
+    strengths = [g.strength_dict(s) for g, s in zip(graphs, states)]
+    return BatchResult(strengths, converged.tolist(), steps.tolist(), max_derivatives.tolist(), states)
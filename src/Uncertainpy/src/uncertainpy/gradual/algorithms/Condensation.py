@@ -0,0 +1,139 @@
+import numpy as np
+from scipy.sparse.csgraph import connected_components
+from .Approximator import Approximator
+from .Equilibrium import Equilibrium
+
+
+def computeCondensation(compiled):
+    """
+    Condenses a CompiledBAG into its strongly connected components.
+    Returns the component label of every argument, a boolean array marking cyclic components
+    (more than one argument or a self-loop) and the topological level of every component:
+    all parents of a component lie on strictly smaller levels.
+    """
+
+    adjacency = compiled.adjacency()
+    no_components, labels = connected_components(adjacency, directed=True, connection="strong")
+
+    sources, targets = adjacency.nonzero()
+    sizes = np.bincount(labels, minlength=no_components)
+    cyclic = sizes > 1
+    cyclic[labels[sources[sources == targets]]] = True
+
+    # edges of the condensation, which is acyclic by construction
+    inter = labels[sources] != labels[targets]
+    comp_sources = labels[sources[inter]]
+    comp_targets = labels[targets[inter]]
+
+    order = np.argsort(comp_sources, kind="stable")
+    comp_sources = comp_sources[order]
+    comp_targets = comp_targets[order]
+    indptr = np.searchsorted(comp_sources, np.arange(no_components + 1))
+
+    indeg = np.bincount(comp_targets, minlength=no_components)
+    levels = np.zeros(no_components, dtype=np.int64)
+    frontier = np.flatnonzero(indeg == 0)
+    level = 0
+
+    while len(frontier) > 0:
+        levels[frontier] = level
+        counts = indptr[frontier + 1] - indptr[frontier]
+        edges = np.repeat(indptr[frontier] - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+        children = comp_targets[edges]
+
+        np.subtract.at(indeg, children, 1)
+        frontier = np.unique(children[indeg[children] == 0])
+        level += 1
+
+    return labels, cyclic, levels
+
+
+class SCCHybrid(Approximator):
+    """
+    Solves a BAG component by component in topological order of its condensation.
+    Arguments outside of cycles are computed exactly in a forward pass (one kernel call per level);
+    only strongly connected components with cycles are solved by the inner approximator (Equilibrium by default),
+    all cyclic components of a level at once, with their attackers and supporters from earlier levels fixed.
+    Errors of earlier levels carry over into later ones, so if the whole graph is not within epsilon afterwards,
+    the inner approximator finishes the solve on the whole graph and sets the status.
+    """
+
+    def __init__(self, ads, time=0, arguments=None, argument_strength=None, attacker=None, supporter=None, name="", recorder=None, inner=Equilibrium,
+                 max_time=None) -> None:
+        super().__init__(ads, time, arguments, argument_strength, attacker, supporter, recorder=recorder, max_time=max_time)
+        self.name = "SCCHybrid"
+        self.inner = inner(ads, recorder=self.recorder, max_time=max_time)
+        self.inner.callbacks = self.callbacks
+
+        self.integrated_arguments = 0
+
+    def sub_approximators(self):
+        return [self.inner]
+
+    def step(self, compiled, state, delta, free=None):
+        return self.inner.step(compiled, state, delta, free)
+
+    def integrate(self, compiled, state, delta, epsilon, free=None, generate_plot=False):
+        # the dictionary fallback of models without kernel cannot be evaluated on parts of the graph
+        if not self.ads.has_kernel() or generate_plot:
+            state, time, max_derivative = self.inner.integrate(compiled, state, delta, epsilon, free, generate_plot)
+            self.status = self.inner.status
+            self.integrated_arguments = compiled.n
+            return state, time, max_derivative
+
+        labels, cyclic, levels = computeCondensation(compiled)
+        node_levels = levels[labels]
+        node_cyclic = cyclic[labels]
+
+        todo = np.ones(compiled.n, dtype=bool) if free is None else np.array(free, dtype=bool)
+        order = np.argsort(node_levels, kind="stable")
+        bounds = np.searchsorted(node_levels[order], np.arange(levels.max(initial=-1) + 2))
+
+        state = np.array(state, dtype=np.float64)
+        total_time = 0
+        self.status = "converged"
+        self.integrated_arguments = 0
+
+        for level in range(len(bounds) - 1):
+            nodes = order[bounds[level]:bounds[level + 1]]
+            nodes = nodes[todo[nodes]]
+
+            acyclic_nodes = nodes[~node_cyclic[nodes]]
+            if len(acyclic_nodes) > 0:
+                indices = compiled.with_parents(acyclic_nodes)
+                sub = compiled.subgraph(indices)
+                sub_state = state[indices]
+
+                # the limit of ds/dt = f(s) - s with fixed inputs is f(s)
+                fixed_point = sub_state + self.compute_derivatives(sub, sub_state)
+                state[acyclic_nodes] = fixed_point[:len(acyclic_nodes)]
+
+            cyclic_nodes = nodes[node_cyclic[nodes]]
+            if len(cyclic_nodes) > 0:
+                indices = compiled.with_parents(cyclic_nodes)
+                sub = compiled.subgraph(indices)
+                sub_free = np.arange(len(indices)) < len(cyclic_nodes)
+
+                sub_state, time, _ = self.inner.integrate(sub, state[indices], delta, epsilon, sub_free)
+                state[cyclic_nodes] = sub_state[:len(cyclic_nodes)]
+                total_time += time
+                self.integrated_arguments += len(cyclic_nodes)
+
+                if self.inner.status != "converged":
+                    self.status = self.inner.status
+
+                if self.inner.status == "stopped":
+                    break
+
+        derivatives = self.compute_derivatives(compiled, state, free)
+        max_derivative = float(np.max(np.abs(derivatives))) if len(derivatives) > 0 else 0
+
+        if self.status == "converged" and max_derivative >= epsilon:
+            state, time, max_derivative = self.inner.integrate(compiled, state, delta, epsilon, free)
+            total_time += time
+            self.status = self.inner.status
+
+        return state, total_time, max_derivative
+
+    def __str__(self) -> str:
+        return __class__.__name__
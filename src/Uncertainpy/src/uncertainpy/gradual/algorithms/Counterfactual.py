@@ -0,0 +1,170 @@
+import copy
+import numpy as np
+from .Batch import solveBatch
+from .RK4 import RK4
+
+
+class CounterfactualResult:
+    """
+    Changes of the equilibrium strengths of some target arguments when single arguments or relations are removed.
+    removals holds ("argument", name), ("attack", attacker, attacked) and ("support", supporter, supported) entries;
+    deltas[r, t] is the strength of targets[t] without removals[r] minus its strength in base (nan if the removed
+    argument is the target itself). converged[r] is False if that variant did not reach epsilon within max_steps;
+    residual is the maximum derivative of the base equilibrium.
+    """
+
+    def __init__(self, targets, removals, base, deltas, converged, residual) -> None:
+        self.targets = list(targets)
+        self.removals = list(removals)
+        self.base = base
+        self.deltas = deltas
+        self.converged = converged
+        self.residual = residual
+
+    def effects(self, target):
+        """Strength change of target for every removal"""
+        column = self.deltas[:, self.targets.index(target)]
+        return dict(zip(self.removals, column.tolist()))
+
+    def ranking(self, target, k=None):
+        """Removals sorted by the absolute strength change of target they cause (the k largest if given)"""
+        entries = [entry for entry in self.effects(target).items() if not np.isnan(entry[1])]
+        entries.sort(key=lambda entry: -abs(entry[1]))
+        return entries if k is None else entries[:k]
+
+    def __repr__(self) -> str:
+        return f"CounterfactualResult(targets={self.targets}, removals={len(self.removals)}, residual={self.residual:.2e})"
+
+
+def removalCandidates(compiled, arguments=True, edges=True):
+    """All single removals of compiled: its arguments, then its attacks and supports (by name)"""
+    removals = []
+    if arguments:
+        removals += [("argument", name) for name in compiled.names]
+
+    if edges:
+        names = compiled.names
+        removals += list(dict.fromkeys(("attack", names[s], names[t]) for s, t in
+                                       zip(compiled.att_indices.tolist(), compiled.att_targets.tolist())))
+        removals += list(dict.fromkeys(("support", names[s], names[t]) for s, t in
+                                       zip(compiled.sup_indices.tolist(), compiled.sup_targets.tolist())))
+
+    return removals
+
+
+def removalVariant(graph, removal, reachable=None):
+    """
+    The part of graph that changes when removal is applied, as (region, sub, free): region holds the indices (in graph)
+    of the arguments whose strength can change, sub is the subgraph of the region followed by its attackers and
+    supporters without the removed argument or relation, free masks the region in sub. None if nothing changes.
+    reachable optionally caches graph.descendants of single arguments by index.
+    """
+    if reachable is None:
+        reachable = {}
+
+    def descendants(rows):
+        for row in rows:
+            if row not in reachable:
+                reachable[row] = graph.descendants([row])
+        return np.unique(np.concatenate([reachable[row] for row in rows] + [np.zeros(0, dtype=np.int64)]))
+
+    kind = removal[0]
+    if kind == "argument":
+        removed = graph.index[removal[1]]
+        region = descendants(np.setdiff1d(graph.children([removed]), [removed]).tolist())
+        region = region[region != removed]
+    else:
+        region = descendants([graph.index[removal[2]]])
+
+    if len(region) == 0:
+        return None
+
+    sub = graph.subgraph(graph.with_parents(region))
+    if kind == "argument":
+        q = sub.index[removal[1]]
+        sub = sub.without_edges(np.flatnonzero(sub.att_indices == q), np.flatnonzero(sub.sup_indices == q))
+    else:
+        source, target = sub.index[removal[1]], sub.index[removal[2]]
+        if kind == "attack":
+            edges = np.flatnonzero((sub.att_indices == source) & (sub.att_targets == target))
+            sub = sub.without_edges(attacks=edges)
+        else:
+            edges = np.flatnonzero((sub.sup_indices == source) & (sub.sup_targets == target))
+            sub = sub.without_edges(supports=edges)
+
+        if len(edges) == 0:
+            raise KeyError(f"there is no {kind} of {removal[2]} by {removal[1]}")
+
+    return region, sub, np.arange(sub.n) < len(region)
+
+
+def computeCounterfactuals(model, compiled, state, targets, delta=1e-2, epsilon=1e-4, removals=None, approximator=RK4,
+                           max_steps=1000000, batch_arguments=1000000):
+    """
+    Strength changes of the target arguments (names) when each single argument or relation of compiled is removed
+    (all of them, or the given removals, see removalCandidates). Only the ancestors of the targets matter, and a
+    removal only changes their descendants; each variant integrates just those arguments, with their other attackers
+    and supporters fixed, starting from the base equilibrium. The variants are packed into block-diagonal batches of
+    up to batch_arguments arguments and solved together with solveBatch. state is integrated to epsilon first (cheap if
+    it already is the equilibrium), and the results are the differences to it. Returns a CounterfactualResult.
+    """
+    if not model.has_kernel():
+        raise TypeError("computeCounterfactuals requires a model with a vectorised compute_derivatives kernel")
+
+    targets = list(targets)
+    if removals is None:
+        removals = removalCandidates(compiled)
+
+    for removal in removals:
+        if removal[0] not in ("argument", "attack", "support"):
+            raise ValueError(f"unknown removal {removal}")
+        for name in removal[1:]:
+            if name not in compiled.index:
+                raise KeyError(f"unknown argument {name}")
+
+    # the ancestors of the targets at the base equilibrium
+    graph = copy.copy(compiled)
+    graph.strengths = np.asarray(state, dtype=np.float64)
+    graph = graph.subgraph(compiled.ancestors([compiled.index[t] for t in targets]))
+    graph.strengths, _, residual = approximator(model).integrate(graph, graph.strengths.copy(), delta, epsilon)
+
+    target_rows = np.array([graph.index[t] for t in targets], dtype=np.int64)
+    base = graph.strengths[target_rows]
+
+    deltas = np.zeros((len(removals), len(targets)))
+    converged = np.ones(len(removals), dtype=bool)
+    reachable = {}
+    batch = []
+    batch_size = 0
+
+    def solve(batch):
+        result = solveBatch(model, [sub for _, _, sub, _ in batch], delta, epsilon, approximator, max_steps,
+                            free=[free for _, _, _, free in batch])
+        for (r, region, sub, _), sub_state, done in zip(batch, result.states, result.converged):
+            affected = np.isin(target_rows, region)
+            positions = [sub.index[targets[t]] for t in np.flatnonzero(affected)]
+            deltas[r, affected] = sub_state[positions] - base[affected]
+            converged[r] = done
+
+    for r, removal in enumerate(removals):
+        if removal[0] == "argument":
+            deltas[r, [t == removal[1] for t in targets]] = np.nan
+        # relations into arguments that cannot reach the targets do not matter
+        if removal[-1] not in graph.index:
+            continue
+
+        variant = removalVariant(graph, removal, reachable)
+        if variant is None or not np.isin(target_rows, variant[0]).any():
+            continue
+
+        batch.append((r, *variant))
+        batch_size += variant[1].n
+        if batch_size >= batch_arguments:
+            solve(batch)
+            batch = []
+            batch_size = 0
+
+    if batch:
+        solve(batch)
+
+    return CounterfactualResult(targets, removals, dict(zip(targets, base.tolist())), deltas, converged.tolist(), float(residual))
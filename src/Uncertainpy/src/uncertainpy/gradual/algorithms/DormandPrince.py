@@ -0,0 +1,172 @@
+import numpy as np
+from .Approximator import Approximator
+
+
+# Butcher tableau of the Dormand-Prince 5(4) pair
+C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1, 1])
+A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84],
+]
+B5 = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0])
+B4 = np.array([5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40])
+E = B5 - B4
+
+
+class DormandPrince(Approximator):
+    """
+    Adaptive-step Runge-Kutta approximator (Dormand-Prince 5(4)) with embedded error control.
+
+    The step size starts at delta and is adapted such that the estimated local error stays below
+    atol + rtol * |strength| (both at most epsilon / 10). Integration stops when the maximum derivative drops below epsilon or
+    one of the following is detected, which is reported in self.status:
+    - "max_steps": more than max_steps steps were attempted,
+    - "max_time": the integration time exceeded max_time (if not None),
+    - "limit_cycle": the trajectory returned to an earlier point without the derivatives decreasing,
+    - "diverged": the strength values became non-finite,
+    - "step_underflow": the step size became too small to make progress (stiff problem),
+    - "stopped": a step callback asked to stop.
+    """
+
+    def __init__(self, ads, time=0, arguments=None, argument_strength=None, attacker=None, supporter=None, name="", recorder=None,
+                 rtol=1e-6, atol=1e-9, max_steps=100000, max_time=None, cycle_history=64, cycle_tolerance=1e-2) -> None:
+        super().__init__(ads, time, arguments, argument_strength, attacker, supporter, recorder=recorder, max_time=max_time)
+        self.name = "DormandPrince"
+        self.rtol = rtol
+        self.atol = atol
+        self.max_steps = max_steps
+        self.cycle_history = cycle_history
+        self.cycle_tolerance = cycle_tolerance
+
+        self.steps = 0
+        self.rejected_steps = 0
+        self.converged = False
+
+    def stages(self, compiled, state, h, free=None, k1=None):
+        """Evaluates the seven stages of a step of size h; k1 may be reused from the previous step (FSAL)"""
+        k = [k1 if k1 is not None else self.compute_derivatives(compiled, state, free)]
+        for i in range(1, 7):
+            y = state + h * sum(a * k[j] for j, a in enumerate(A[i]) if a != 0)
+            k.append(self.compute_derivatives(compiled, y, free))
+
+        return k
+
+    def step(self, compiled, state, delta, free=None):
+        k = self.stages(compiled, state, delta, free)
+        derivatives = sum(b * k[i] for i, b in enumerate(B5) if b != 0)
+        return state + delta * derivatives, derivatives
+
+    def error_norm(self, state, new_state, k, h, atol, rtol):
+        error = h * sum(e * k[i] for i, e in enumerate(E) if e != 0)
+        scale = atol + rtol * np.maximum(np.abs(state), np.abs(new_state))
+        return float(np.sqrt(np.mean((error / scale)**2))) if len(state) > 0 else 0.0
+
+    def integrate(self, compiled, state, delta, epsilon, free=None, generate_plot=False):
+        self.steps = 0
+        self.rejected_steps = 0
+        self.converged = False
+
+        time = 0
+        max_time = np.inf if self.max_time is None else self.max_time
+        # local errors above epsilon would keep the derivatives from dropping below it (and look like a limit cycle)
+        atol = min(self.atol, 0.1 * epsilon)
+        rtol = min(self.rtol, 0.1 * epsilon)
+        h = delta
+        k1 = self.compute_derivatives(compiled, state, free)
+        max_derivative = float(np.max(np.abs(k1))) if len(state) > 0 else 0.0
+
+        # limit cycle detection works on a random low-dimensional sketch of the trajectory
+        sketch = np.random.default_rng(0).standard_normal((8, len(state)))
+        projection = sketch @ state
+        path_length = 0.0
+        history = []
+
+        status = "converged" if max_derivative < epsilon else None
+
+        while status is None:
+            if self.steps >= self.max_steps:
+                status = "max_steps"
+                break
+
+            if time >= max_time:
+                status = "max_time"
+                break
+
+            if h < 1e-12 * max(1.0, time):
+                status = "step_underflow"
+                break
+
+            self.steps += 1
+            k = self.stages(compiled, state, h, free, k1=k1)
+            new_state = state + h * sum(b * k[i] for i, b in enumerate(B5) if b != 0)
+
+            if not np.all(np.isfinite(new_state)):
+                if not np.all(np.isfinite(k[0])):
+                    status = "diverged"
+                    break
+                self.rejected_steps += 1
+                h /= 10
+                continue
+
+            error = self.error_norm(state, new_state, k, h, atol, rtol)
+            factor = 5.0 if error == 0 else min(5.0, max(0.2, 0.9 * error**(-1/5)))
+
+            if error > 1:
+                self.rejected_steps += 1
+                h *= factor
+                continue
+
+            time += h
+            state = new_state
+            k1 = k[6]
+            h *= factor
+
+            max_derivative = float(np.max(np.abs(k1))) if len(state) > 0 else 0.0
+            stopped = self.after_step(compiled, time, state, max_derivative, generate_plot)
+
+            if max_derivative < epsilon:
+                status = "converged"
+                break
+
+            if stopped:
+                status = "stopped"
+                break
+
+            new_projection = sketch @ state
+            path_length += float(np.linalg.norm(new_projection - projection))
+            projection = new_projection
+
+            if self.detect_cycle(history, projection, path_length, max_derivative):
+                status = "limit_cycle"
+                break
+
+            history.append((projection, path_length, max_derivative))
+            if len(history) > self.cycle_history:
+                history.pop(0)
+
+        self.status = status
+        self.converged = status == "converged"
+        return state, time, max_derivative
+
+    def detect_cycle(self, history, projection, path_length, max_derivative):
+        """
+        A cycle is reported if the trajectory comes back close to a recorded point after travelling a much longer path
+        and the derivatives have not become smaller in the meantime (a damped oscillation shrinks them).
+        """
+        for old_projection, old_path_length, old_max_derivative in history:
+            travelled = path_length - old_path_length
+            if travelled <= 0 or max_derivative < 0.95 * old_max_derivative:
+                continue
+
+            if np.linalg.norm(projection - old_projection) <= self.cycle_tolerance * travelled:
+                return True
+
+        return False
+
+    def __str__(self) -> str:
+        return __class__.__name__
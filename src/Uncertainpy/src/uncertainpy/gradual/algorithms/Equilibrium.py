@@ -0,0 +1,170 @@
+import numpy as np
+import scipy.sparse.linalg as spla
+from .Approximator import Approximator
+from .Jacobian import computeJacobian, jacobianEvaluations
+from .RK4 import RK4
+
+
+class Equilibrium(Approximator):
+    """
+    Computes the limit of the strength values directly as a fixed point s = s + f(s) of the update map
+    instead of following the trajectory of the ODE ds/dt = f(s).
+
+    The fixed point is first approached by Anderson-accelerated fixed-point iteration. If that stagnates,
+    Newton steps with a sparse Jacobian (analytic or by finite differences, see computeJacobian) are taken.
+    If neither reaches a maximum derivative below epsilon, the fallback approximator (RK4 by default)
+    integrates from the best point found. self.method records which of "anderson", "newton" or "fallback" produced the result.
+    Step callbacks are called after every Anderson and Newton iteration with the iteration number as time.
+
+    Note that BAGs with several equilibria may end up in a different one than the trajectory from the base scores.
+    """
+
+    def __init__(self, ads, time=0, arguments=None, argument_strength=None, attacker=None, supporter=None, name="", recorder=None,
+                 depth=5, max_iterations=200, max_newton_iterations=20, fallback=RK4, max_time=None) -> None:
+        super().__init__(ads, time, arguments, argument_strength, attacker, supporter, recorder=recorder, max_time=max_time)
+        self.name = "Equilibrium"
+        self.depth = depth
+        self.max_iterations = max_iterations
+        self.max_newton_iterations = max_newton_iterations
+        self.fallback = fallback(ads, recorder=self.recorder, max_time=max_time)
+        self.fallback.callbacks = self.callbacks
+
+        self.method = None
+        self.iterations = 0
+        self.jacobian_evaluations = 0
+        self.stopped = False
+
+    def sub_approximators(self):
+        return [self.fallback]
+
+    def step(self, compiled, state, delta, free=None):
+        return self.fallback.step(compiled, state, delta, free)
+
+    def max_norm(self, values):
+        return float(np.max(np.abs(values))) if len(values) > 0 else 0.0
+
+    def anderson(self, compiled, state, epsilon, free):
+        """Anderson acceleration of s <- s + f(s); returns the best state, its derivatives and whether it converged"""
+        residual = self.compute_derivatives(compiled, state, free)
+        best = (state, residual)
+        stagnation = 0
+
+        states = []
+        residuals = []
+
+        for _ in range(self.max_iterations):
+            if self.max_norm(residual) < epsilon:
+                return state, residual, True
+
+            self.iterations += 1
+            states.append(state)
+            residuals.append(residual)
+            if len(states) > self.depth + 1:
+                states.pop(0)
+                residuals.pop(0)
+
+            new_state = state + residual
+            if len(states) > 1:
+                # minimise the norm of the combined residual over the last differences
+                delta_residuals = np.diff(np.array(residuals), axis=0).T
+                delta_states = np.diff(np.array(states), axis=0).T
+                gamma = np.linalg.lstsq(delta_residuals, residual, rcond=None)[0]
+                new_state = new_state - (delta_states + delta_residuals) @ gamma
+
+            new_residual = self.compute_derivatives(compiled, new_state, free)
+            if not np.all(np.isfinite(new_residual)):
+                states.clear()
+                residuals.clear()
+                new_state = state + residual
+                new_residual = self.compute_derivatives(compiled, new_state, free)
+
+            state, residual = new_state, new_residual
+            if self.after_step(compiled, self.iterations, state, self.max_norm(residual)):
+                self.stopped = True
+                return state, residual, False
+
+            if self.max_norm(residual) < 0.9 * self.max_norm(best[1]):
+                best = (state, residual)
+                stagnation = 0
+            else:
+                stagnation += 1
+                if stagnation >= 2 * self.depth:
+                    break
+
+        return best[0], best[1], False
+
+    def newton(self, compiled, state, residual, epsilon, free):
+        """Damped Newton iteration on f(s) = 0; returns the final state, its derivatives and whether it converged"""
+        active = np.ones(compiled.n, dtype=bool) if free is None else free
+
+        for _ in range(self.max_newton_iterations):
+            norm = self.max_norm(residual)
+            if norm < epsilon:
+                return state, residual, True
+
+            self.iterations += 1
+            self.jacobian_evaluations += 1
+            jacobian = computeJacobian(self.ads, compiled, state, free, residual)[active][:, active]
+            self.derivative_evaluations += jacobianEvaluations(self.ads, compiled)
+
+            try:
+                direction = np.zeros(compiled.n)
+                direction[active] = spla.spsolve(jacobian.tocsc(), -residual[active])
+            except RuntimeError:
+                return state, residual, False
+
+            if not np.all(np.isfinite(direction)):
+                return state, residual, False
+
+            # backtracking line search on the maximum derivative
+            step_size = 1.0
+            for _ in range(10):
+                candidate = state + step_size * direction
+                candidate_residual = self.compute_derivatives(compiled, candidate, free)
+                if self.max_norm(candidate_residual) < norm:
+                    break
+                step_size /= 2
+            else:
+                return state, residual, False
+
+            state, residual = candidate, candidate_residual
+            if self.after_step(compiled, self.iterations, state, self.max_norm(residual)):
+                self.stopped = True
+                return state, residual, False
+
+        return state, residual, self.max_norm(residual) < epsilon
+
+    def integrate(self, compiled, state, delta, epsilon, free=None, generate_plot=False):
+        self.iterations = 0
+        self.jacobian_evaluations = 0
+        self.stopped = False
+
+        if generate_plot:
+            # fixed-point iterates are no trajectory, plotting needs the time integration
+            self.method = "fallback"
+            state, time, max_derivative = self.fallback.integrate(compiled, state, delta, epsilon, free, generate_plot)
+            self.status = self.fallback.status
+            return state, time, max_derivative
+
+        state, residual, converged = self.anderson(compiled, state, epsilon, free)
+        self.method = "anderson"
+
+        if not converged and not self.stopped:
+            state, residual, converged = self.newton(compiled, state, residual, epsilon, free)
+            self.method = "newton"
+
+        if self.stopped:
+            self.status = "stopped"
+            return state, 0, self.max_norm(residual)
+
+        if converged:
+            self.status = "converged"
+            return state, 0, self.max_norm(residual)
+
+        self.method = "fallback"
+        state, time, max_derivative = self.fallback.integrate(compiled, state, delta, epsilon, free)
+        self.status = self.fallback.status
+        return state, time, max_derivative
+
+    def __str__(self) -> str:
+        return __class__.__name__
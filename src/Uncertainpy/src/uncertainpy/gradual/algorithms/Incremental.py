@@ -0,0 +1,133 @@
+import numpy as np
+from .Condensation import SCCHybrid
+from .Instrumentation import PhaseTimer, SolveResult
+
+
+class IncrementalSolver:
+    """
+    Recomputes strength values of a growing BAG starting from the previous equilibrium.
+
+    Each call to solve compares the BAG with the one seen in the previous call. Only arguments that are new,
+    whose base score changed or that gained/lost attackers or supporters are re-solved, with all other
+    arguments fixed at their previous strength. Whenever the re-solved strengths move the derivative of an
+    argument outside of the region above tolerance, that argument is added to the region and the region is
+    solved again. Once the region covers half of everything downstream of the changes, the whole downstream
+    part is solved in one go. Everything else stays frozen.
+    """
+
+    def __init__(self, model, delta=1e-2, epsilon=1e-4, tolerance=None, approximator=SCCHybrid) -> None:
+        if not model.has_kernel():
+            raise TypeError("IncrementalSolver requires a model with a vectorised compute_derivatives kernel")
+
+        self.model = model
+        self.delta = delta
+        self.epsilon = epsilon
+        self.tolerance = epsilon if tolerance is None else tolerance
+        self.approximator = approximator(model)
+
+        self.strengths = {}
+        self.base_scores = {}
+        self.edges = set()
+
+        self.region_size = 0
+        self.status = None
+        self.result = None
+
+    def edge_set(self, compiled):
+        names = compiled.names
+        attacks = zip(compiled.att_indices.tolist(), compiled.att_targets.tolist(), compiled.att_weights.tolist())
+        supports = zip(compiled.sup_indices.tolist(), compiled.sup_targets.tolist(), compiled.sup_weights.tolist())
+        return ({("att", names[s], names[t], w) for s, t, w in attacks} |
+                {("sup", names[s], names[t], w) for s, t, w in supports})
+
+    def changed_arguments(self, compiled, edges):
+        """Indices of arguments that are new, have a different base score or different incoming relations"""
+        changed = {name for name, base in zip(compiled.names, compiled.base_scores.tolist())
+                   if self.base_scores.get(name) != base}
+        changed.update(target for _, _, target, _ in edges ^ self.edges if target in compiled.index)
+        return np.array(sorted(compiled.index[name] for name in changed), dtype=np.int64)
+
+    def resolve(self, compiled, state, region, downstream):
+        """Solves the region (growing it as needed) with everything else fixed; returns the new state and the final region"""
+        self.status = "converged"
+
+        while len(region) > 0:
+            if 2 * len(region) > len(downstream):
+                region = downstream
+
+            indices = compiled.with_parents(region)
+            sub = compiled.subgraph(indices)
+            free = np.arange(len(indices)) < len(region)
+
+            sub_state, _, _ = self.approximator.integrate(sub, state[indices], self.delta, self.epsilon, free)
+            state[region] = sub_state[:len(region)]
+            if self.approximator.status != "converged":
+                self.status = self.approximator.status
+
+            # arguments outside of the region whose inputs changed noticeably join the region
+            outside = np.setdiff1d(compiled.children(region), region)
+            if len(outside) == 0 or len(region) == len(downstream):
+                break
+
+            indices = compiled.with_parents(outside)
+            sub = compiled.subgraph(indices)
+            derivatives = self.model.compute_derivatives(sub, state[indices])[:len(outside)]
+            affected = outside[np.abs(derivatives) > self.tolerance]
+            if len(affected) == 0:
+                break
+
+            region = np.union1d(region, affected)
+
+        return state, region
+
+    def rebase(self, bag, strengths):
+        """
+        Takes strengths (by name, e.g. those of a memoized solve of bag) as the equilibrium of bag without solving it,
+        so that the next call to solve starts from them and only re-solves what changed since bag. Arguments missing
+        from strengths start at their base score.
+        """
+        compiled = bag.compile()
+        self.strengths = {name: float(strengths.get(name, base)) for name, base in zip(compiled.names, compiled.base_scores.tolist())}
+        self.base_scores = dict(zip(compiled.names, compiled.base_scores.tolist()))
+        self.edges = self.edge_set(compiled)
+        self.region_size = 0
+
+    def solve(self, bag):
+        """
+        Computes strength values of bag, writes them to its arguments and returns them as a dictionary.
+        A SolveResult of the re-solve is stored in self.result.
+        """
+        timer = PhaseTimer()
+        self.approximator.reset_counters()
+
+        with timer.phase("compile"):
+            compiled = bag.compile()
+            edges = self.edge_set(compiled)
+
+        with timer.phase("diff"):
+            state = np.array([self.strengths.get(name, base) for name, base in zip(compiled.names, compiled.base_scores.tolist())])
+            region = self.changed_arguments(compiled, edges)
+            downstream = compiled.descendants(region)
+
+        with timer.phase("integrate"):
+            state, region = self.resolve(compiled, state, region, downstream)
+
+        self.region_size = len(region)
+        self.strengths = compiled.strength_dict(state)
+        self.base_scores = dict(zip(compiled.names, compiled.base_scores.tolist()))
+        self.edges = edges
+
+        with timer.phase("write_back"):
+            if compiled.arguments is None:
+                bag.set_strengths(state)
+            else:
+                for arg, strength in zip(compiled.arguments, state.tolist()):
+                    arg.strength = strength
+
+        derivatives = self.model.compute_derivatives(compiled, state)
+        max_derivative = float(np.max(np.abs(derivatives))) if compiled.n > 0 else 0.0
+        self.result = SolveResult(self.model.name, f"IncrementalSolver({self.approximator.name})", compiled.n,
+                                  len(edges), self.status, max_derivative, 0, self.approximator.total_steps(),
+                                  self.approximator.total_derivative_evaluations() + 1, timer.times, dict(self.strengths))
+
+        return dict(self.strengths)
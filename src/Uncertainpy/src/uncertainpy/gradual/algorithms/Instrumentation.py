@@ -0,0 +1,91 @@
+import json
+import time
+
+
+class SolveResult:
+    """
+    Report of one solve: status ("converged", "stopped", "max_time", ... see the approximators), converged flag,
+    final maximum derivative (the residual of the equilibrium condition), integration time, accepted steps,
+    derivative evaluations (kernel calls, including those of inner approximators and Jacobians), wall-clock seconds
+    per phase and the computed strength values by argument name.
+    """
+
+    def __init__(self, model, approximator, arguments, relations, status, max_derivative, time=0, steps=0,
+                 derivative_evaluations=0, phase_times=None, strengths=None) -> None:
+        self.model = model
+        self.approximator = approximator
+        self.arguments = arguments
+        self.relations = relations
+        self.status = status
+        self.converged = status == "converged"
+        self.max_derivative = max_derivative
+        self.time = time
+        self.steps = steps
+        self.derivative_evaluations = derivative_evaluations
+        self.phase_times = {} if phase_times is None else phase_times
+        self.strengths = {} if strengths is None else strengths
+
+    @property
+    def wall_time(self):
+        return sum(self.phase_times.values())
+
+    def as_dict(self):
+        """Metrics of the solve as a flat, JSON-serialisable dictionary (without the strength values)"""
+        metrics = {
+            "model": self.model,
+            "approximator": self.approximator,
+            "arguments": self.arguments,
+            "relations": self.relations,
+            "status": self.status,
+            "converged": self.converged,
+            "max_derivative": self.max_derivative,
+            "time": self.time,
+            "steps": self.steps,
+            "derivative_evaluations": self.derivative_evaluations,
+            "wall_time": self.wall_time,
+        }
+        metrics.update({f"{phase}_time": seconds for phase, seconds in self.phase_times.items()})
+        return metrics
+
+    def __repr__(self) -> str:
+        return (f"{type(self).__name__}({self.model}, {self.approximator}, status={self.status}, max_derivative={self.max_derivative:.2e}, "
+                f"steps={self.steps}, derivative_evaluations={self.derivative_evaluations}, wall_time={self.wall_time:.3f}s)")
+
+
+class PhaseTimer:
+    """Accumulates wall-clock time per phase: with timer.phase("integrate"): ..."""
+
+    def __init__(self) -> None:
+        self.times = {}
+
+    def phase(self, name):
+        return _Phase(self.times, name)
+
+
+class _Phase:
+    def __init__(self, times, name) -> None:
+        self.times = times
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.times[self.name] = self.times.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class JSONLinesSink:
+    """
+    Metrics sink that appends one JSON object per solve to a file. Extra keyword arguments (e.g. question=3) are added
+    to every record. Any callable taking the dictionary of SolveResult.as_dict can be used as a sink instead.
+    """
+
+    def __init__(self, path, **fields) -> None:
+        self.path = path
+        self.fields = fields
+
+    def __call__(self, metrics):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({**self.fields, **metrics}) + "\n")
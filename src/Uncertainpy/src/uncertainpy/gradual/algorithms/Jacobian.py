@@ -0,0 +1,121 @@
+import numpy as np
+import scipy.sparse as sp
+
+
+def computeColoring(compiled):
+    """
+    Colouring of the arguments such that no argument depends on two arguments of the same colour.
+    Perturbing all arguments of one colour at once then reveals one Jacobian column per argument.
+    Returns the colour of every argument; the result is cached on the CompiledBAG.
+
+    Colours are assigned in rounds of vectorised operations on the dependency pattern: every uncoloured argument
+    tentatively takes, over all rows it appears in, the largest of the first free colour of the row plus its rank among
+    the uncoloured arguments of the row (arguments with more dependants first). Where two arguments of a row got the same
+    colour, only the first keeps it, the others retry in the next round. The first uncoloured argument always keeps its
+    colour, and most rounds colour nearly all remaining arguments.
+    """
+
+    coloring = getattr(compiled, "_coloring", None)
+    if coloring is not None:
+        return coloring
+
+    # entry (rows[k], cols[k]): the derivative of argument rows[k] depends on argument cols[k] (a parent or itself)
+    dependency = (compiled.adjacency().T + sp.identity(compiled.n, format="csr")).tocoo()
+    rows, cols = dependency.row.astype(np.int64), dependency.col.astype(np.int64)
+
+    priority = np.empty(compiled.n, dtype=np.int64)
+    priority[np.argsort(-np.bincount(cols, minlength=compiled.n), kind="stable")] = np.arange(compiled.n)
+
+    coloring = np.full(compiled.n, -1, dtype=np.int64)
+    # first colour not used by the coloured arguments of every row
+    free_color = np.zeros(compiled.n, dtype=np.int64)
+
+    while len(rows) > 0:
+        order = np.lexsort((priority[cols], rows))
+        rows, cols = rows[order], cols[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+
+        tentative = np.zeros(compiled.n, dtype=np.int64)
+        np.maximum.at(tentative, cols, free_color[rows] + rank)
+
+        # within a row, the first argument of every tentative colour keeps it
+        colors = tentative[cols]
+        order = np.lexsort((priority[cols], colors, rows))
+        clash = (rows[order][1:] == rows[order][:-1]) & (colors[order][1:] == colors[order][:-1])
+        rejected = np.zeros(compiled.n, dtype=bool)
+        rejected[cols[order][1:][clash]] = True
+
+        accepted = ~rejected[cols]
+        coloring[cols[accepted]] = colors[accepted]
+        np.maximum.at(free_color, rows[accepted], colors[accepted] + 1)
+        rows, cols = rows[~accepted], cols[~accepted]
+
+    compiled._coloring = coloring
+    return coloring
+
+
+def differentialJacobian(compiled, differential, free=None):
+    """
+    Sparse Jacobian assembled from the analytic partials differential of Model.compute_differential:
+    df_i/ds_j = slope_i * (sum of d aggregate_i / d s_j over the edges from j to i) - [i == j].
+    Rows and columns of arguments outside free are zero.
+    """
+    slopes, _, state_partials, _ = differential
+    sources, targets, _, _ = compiled.edges()
+    diagonal = np.arange(compiled.n)
+
+    rows = np.concatenate((targets, diagonal))
+    cols = np.concatenate((sources, diagonal))
+    values = np.concatenate((slopes[targets] * state_partials, -np.ones(compiled.n)))
+    if free is not None:
+        values[~(free[rows] & free[cols])] = 0.0
+
+    return sp.csr_matrix((values, (rows, cols)), shape=(compiled.n, compiled.n))
+
+
+def computeJacobian(model, compiled, state, free=None, derivatives=None):
+    """
+    Sparse Jacobian of model.compute_derivatives at state. Models with an analytic differential (see
+    Model.compute_differential) get it in one pass over the edges; otherwise it is computed by forward differences
+    with one kernel evaluation per colour of computeColoring. Rows and columns of arguments outside free are zero.
+    """
+
+    differential = model.compute_differential(compiled, state)
+    if differential is not None:
+        return differentialJacobian(compiled, differential, free)
+
+    if derivatives is None:
+        derivatives = model.compute_derivatives(compiled, state)
+
+    coloring = computeColoring(compiled)
+    no_colors = int(coloring.max(initial=-1)) + 1
+
+    # sparsity pattern: entry (i, j) if i == j or j attacks or supports i, grouped by the colour of j
+    pattern = (compiled.adjacency().T + sp.identity(compiled.n, format="csr")).tocoo()
+    order = np.argsort(coloring[pattern.col], kind="stable")
+    rows, cols = pattern.row[order], pattern.col[order]
+    bounds = np.searchsorted(coloring[cols], np.arange(no_colors + 1))
+
+    steps = np.sqrt(np.finfo(np.float64).eps) * np.maximum(1.0, np.abs(state))
+    values = np.zeros(len(rows))
+
+    for color in range(no_colors):
+        perturbation = np.where(coloring == color, steps, 0.0)
+        if free is not None:
+            perturbation[~free] = 0.0
+        difference = model.compute_derivatives(compiled, state + perturbation) - derivatives
+
+        entries = slice(bounds[color], bounds[color + 1])
+        values[entries] = difference[rows[entries]] / steps[cols[entries]]
+
+    if free is not None:
+        values[~(free[rows] & free[cols])] = 0.0
+
+    return sp.csr_matrix((values, (rows, cols)), shape=(compiled.n, compiled.n))
+
+
+def jacobianEvaluations(model, compiled):
+    """Kernel evaluations computeJacobian takes: one for an analytic differential, one per colour otherwise"""
+    if model.has_differential():
+        return 1
+    return int(computeColoring(compiled).max(initial=-1)) + 1
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from .DormandPrince import DormandPrince
+from .Instrumentation import SolveResult
+from .Solve import StrengthResult, solve
+from ..CompiledBAG import CompiledBAG
+
+
+def describeConfig(item):
+    """
+    Canonical text of a part of a solver configuration: classes by qualified name, arrays (e.g. an initial_state) by
+    dtype, shape and SHA-256 of their bytes, objects (models, aggregation and influence functions, approximators) by
+    class and their scalar attributes (not their state arrays), containers element-wise
+    """
+    if isinstance(item, np.generic):
+        return describeConfig(item.item())
+
+    if item is None or isinstance(item, (bool, int, float, str)):
+        return repr(item)
+
+    if isinstance(item, np.ndarray):
+        if item.dtype == object:
+            return describeConfig(item.tolist())
+        data = np.ascontiguousarray(item)
+        return f"ndarray({data.dtype.str},{data.shape},{hashlib.sha256(data.tobytes()).hexdigest()})"
+
+    if isinstance(item, type):
+        return f"{item.__module__}.{item.__qualname__}"
+
+    if isinstance(item, (list, tuple)):
+        return "[" + ",".join(describeConfig(x) for x in item) + "]"
+
+    if isinstance(item, dict):
+        return "{" + ",".join(f"{k}:{describeConfig(item[k])}" for k in sorted(item)) + "}"
+
+    attributes = [f"{k}={describeConfig(v)}" for k, v in sorted(getattr(item, "__dict__", {}).items())
+                  if isinstance(v, (bool, int, float, str, np.generic))]
+    # models delegate to their aggregation and influence functions
+    for part in ("aggregation", "influence"):
+        if getattr(item, part, None) is not None:
+            attributes.append(f"{part}={describeConfig(getattr(item, part))}")
+
+    return f"{describeConfig(type(item))}({','.join(attributes)})"
+
+
+def structuralHash(bag, *config):
+    """
+    SHA-256 (hex) of the structure of bag (BAG, CompactBAG or CompiledBAG) and a solver configuration: argument names
+    with base scores, attacks and supports with weights, independent of insertion order, and describeConfig of every
+    config item (e.g. semantics, approximator, delta, epsilon, options). Current strength values are not included.
+    """
+    compiled = bag if isinstance(bag, CompiledBAG) else bag.compile()
+    names = np.array(compiled.names, dtype=object)
+    order = np.argsort(names.astype(str), kind="stable")
+    rank = np.empty(compiled.n, dtype=np.int64)
+    rank[order] = np.arange(compiled.n)
+
+    digest = hashlib.sha256()
+    digest.update("\x1f".join(names[order].tolist()).encode("utf-8"))
+    digest.update(np.ascontiguousarray(compiled.base_scores[order], dtype=np.float64).tobytes())
+
+    for relation, sources, targets, weights in (("att", compiled.att_indices, compiled.att_targets, compiled.att_weights),
+                                                ("sup", compiled.sup_indices, compiled.sup_targets, compiled.sup_weights)):
+        edges = np.lexsort((rank[sources], rank[targets]))
+        digest.update(relation.encode("ascii"))
+        digest.update(np.ascontiguousarray(rank[sources][edges], dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(rank[targets][edges], dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(weights[edges], dtype=np.float64).tobytes())
+
+    digest.update("\x1e".join(describeConfig(item) for item in config).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class StrengthMemo:
+    """
+    Memo of solved strength values by structural hash: an in-memory LRU of maxsize results, backed by one JSON file
+    per result in directory (if given), so that graphs seen in earlier runs are not solved again. Thread-safe;
+    several processes may share the directory, as files are written atomically.
+    """
+
+    def __init__(self, maxsize=256, directory=None) -> None:
+        self.maxsize = maxsize
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """The SolveResult stored under key, or None"""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+
+        result = None
+        if self.directory is not None and os.path.exists(self.path(key)):
+            with open(self.path(key), encoding="utf-8") as f:
+                result = self.decode(json.load(f))
+
+        with self.lock:
+            if result is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.remember(key, result)
+            return result
+
+    def put(self, key, result):
+        with self.lock:
+            self.remember(key, result)
+
+        if self.directory is not None:
+            temporary = f"{self.path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(self.encode(result), f)
+            os.replace(temporary, self.path(key))
+
+    def remember(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    @staticmethod
+    def encode(result):
+        return {"metrics": result.as_dict(), "phase_times": result.phase_times, "strengths": result.strengths,
+                "functional": isinstance(result, StrengthResult)}
+
+    @staticmethod
+    def decode(entry):
+        metrics = entry["metrics"]
+        strengths = entry["strengths"]
+        args = (metrics["model"], metrics["approximator"])
+        counters = (metrics["relations"], metrics["status"], metrics["max_derivative"], metrics["time"], metrics["steps"],
+                    metrics["derivative_evaluations"], entry["phase_times"])
+
+        if entry["functional"]:
+            return StrengthResult(list(strengths), np.array(list(strengths.values()), dtype=np.float64), *args, *counters)
+        return SolveResult(*args, metrics["arguments"], *counters, strengths)
+
+    def solve(self, bag, semantics, approximator=DormandPrince, delta=1e-2, epsilon=1e-4, **options):
+        """algorithms.solve with memoization; returns the StrengthResult of the first solve of an identical problem"""
+        model = semantics() if isinstance(semantics, type) else semantics
+        key = structuralHash(bag, "solve", model, approximator, delta, epsilon, options)
+        result = self.get(key)
+        if result is None:
+            result = solve(bag, model, approximator, delta, epsilon, **options)
+            self.put(key, result)
+
+        return result
+
+    def clear(self):
+        """Forgets the in-memory entries (files in directory are kept)"""
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __repr__(self) -> str:
+        return f"StrengthMemo(entries={len(self)}, hits={self.hits}, misses={self.misses}, directory={self.directory})"
@@ -0,0 +1,206 @@
+import numpy as np
+from .Equilibrium import Equilibrium
+
+
+class RankingMonitor:
+    """
+    Step callback that stops a solve once the ranking of some target arguments is decided.
+
+    After every step of the whole graph, the remaining change of all strength values is bounded by
+    max_derivative / (1 - L) if the update map s -> s + f(s) is a contraction in the maximum norm with Lipschitz
+    constant L < 1: lipschitz if given, else the constant of the model on the compiled graph (Model.lipschitz_constant),
+    if it is below 1. This is a proof. Semantics that are no contraction on the graph (e.g. arguments with many
+    attackers) give no bound and the solve runs to epsilon, unless estimate is set: then the bound is the heuristic
+    safety * max_derivative / rate, where rate is the slower exponential decay of the maximum derivative over the last
+    two windows of horizon integration time (the relaxation time of ds/dt = f(s) - s is 1). It assumes that the decay
+    continues and requires the maximum derivative to decrease monotonically over both windows (Equilibrium iterations
+    give no rate). self.estimated tells if the current bound is such an estimate. The solve stops when, within the bound,
+    - the first top positions of the ranking (all if top is None) cannot change,
+    - the gap between the first and the second target is known to be above or below margin (if given) and
+    - the strength of the first target is known to be above or below level (if given).
+    """
+
+    def __init__(self, targets, margin=None, level=None, top=None, lipschitz=None, safety=2.0, horizon=1.0, estimate=False) -> None:
+        if lipschitz is not None and not 0 <= lipschitz < 1:
+            raise ValueError("lipschitz must be in [0, 1)")
+
+        self.targets = list(targets)
+        self.margin = margin
+        self.level = level
+        self.top = top
+        self.lipschitz = lipschitz
+        self.safety = safety
+        self.horizon = horizon
+        self.estimate = estimate
+
+        # Lipschitz constant below 1 the bound is based on (lipschitz or the one of the model on the compiled graph)
+        self.contraction = lipschitz
+        self.compiled = None
+        self.rows = None
+        self.history = []
+        self.rate = None
+        self.bound = np.inf
+        self.decided = False
+
+    def bind(self, compiled, model=None):
+        self.compiled = compiled
+        self.rows = np.array([compiled.index[t] for t in self.targets], dtype=np.int64)
+        if self.lipschitz is None:
+            constant = None if model is None else model.lipschitz_constant(compiled)
+            self.contraction = constant if constant is not None and constant < 1 else None
+        self.history = []
+        self.rate = None
+        self.bound = np.inf
+        self.decided = False
+
+    def remaining_change(self, max_derivative):
+        """Bound on the change of any strength value until the equilibrium from the current maximum derivative"""
+        if max_derivative == 0:
+            return 0.0
+
+        if self.contraction is not None:
+            return max_derivative / (1 - self.contraction)
+
+        if not self.estimate or self.rate is None:
+            return np.inf
+
+        return self.safety * max_derivative / self.rate
+
+    @property
+    def estimated(self):
+        """Tests if remaining_change is the heuristic estimate from the decay rate rather than a proven bound"""
+        return self.contraction is None and self.estimate
+
+    def update_rate(self, time, max_derivative):
+        """
+        Decay rate of the maximum derivative over the last two windows of horizon integration time (the slower one);
+        None while the trajectory is shorter than that or the maximum derivative grew within the windows
+        """
+        self.history.append((time, max_derivative))
+        while len(self.history) > 1 and self.history[1][0] <= time - 2 * self.horizon:
+            del self.history[0]
+
+        self.rate = None
+        times = np.array([t for t, _ in self.history])
+        values = np.array([m for _, m in self.history])
+        if times[0] > time - 2 * self.horizon or max_derivative <= 0:
+            return
+
+        # the last points at least one and two horizons back
+        middle = np.searchsorted(times, time - self.horizon, side="right") - 1
+        if values[0] <= values[middle] or values[middle] <= max_derivative:
+            return
+
+        if np.any(np.diff(values) > 0):
+            return
+
+        self.rate = min(np.log(values[0] / values[middle]) / (times[middle] - times[0]),
+                        np.log(values[middle] / max_derivative) / (time - times[middle]))
+
+    def settled(self, values, bound):
+        """Tests if the ranking, margin and level of the target strength values cannot change by more than bound"""
+        ranked = np.sort(values)[::-1]
+        gaps = ranked[:-1] - ranked[1:]
+        positions = len(gaps) if self.top is None else min(self.top, len(gaps))
+
+        if np.any(gaps[:positions] <= 2 * bound):
+            return False
+
+        if self.margin is not None and len(gaps) > 0 and abs(gaps[0] - self.margin) <= 2 * bound:
+            return False
+
+        if self.level is not None and len(ranked) > 0 and abs(ranked[0] - self.level) <= bound:
+            return False
+
+        return True
+
+    def __call__(self, approximator, compiled, time, state, max_derivative):
+        # inner approximators of SCCHybrid integrate parts of the graph, which says nothing about the targets
+        if compiled is not approximator.ads.compiled:
+            return False
+
+        if compiled is not self.compiled:
+            self.bind(compiled, approximator.ads)
+
+        if self.contraction is None and isinstance(approximator, Equilibrium):
+            return False
+
+        self.update_rate(time, max_derivative)
+        self.bound = self.remaining_change(max_derivative)
+        self.decided = bool(np.isfinite(self.bound)) and self.settled(state[self.rows], self.bound)
+        return self.decided
+
+
+class QueryResult:
+    """
+    Strength values of a query solve (all arguments, partial if the solve was stopped early) and the bound on
+    how much any of them can still change until the equilibrium (inf if the semantics is no contraction on the graph
+    and no decay rate was estimated). estimated tells if the bound is the heuristic of RankingMonitor rather than a
+    proof. status is "decided" if the solve stopped because the target ranking was settled, otherwise the status of
+    the approximator.
+    """
+
+    def __init__(self, targets, strengths, bound, status, steps, estimated=False) -> None:
+        self.targets = list(targets)
+        self.strengths = strengths
+        self.bound = bound
+        self.status = status
+        self.steps = steps
+        self.estimated = estimated
+
+    @property
+    def target_strengths(self):
+        return {t: self.strengths[t] for t in self.targets}
+
+    @property
+    def ranking(self):
+        """Targets from strongest to weakest"""
+        return sorted(self.targets, key=lambda t: -self.strengths[t])
+
+    @property
+    def margin(self):
+        """Strength gap between the first and the second target (None for a single target)"""
+        if len(self.targets) < 2:
+            return None
+
+        first, second = self.ranking[:2]
+        return self.strengths[first] - self.strengths[second]
+
+    def __repr__(self) -> str:
+        bound = f"~{self.bound:.2e}" if self.estimated else f"{self.bound:.2e}"
+        return f"QueryResult(ranking={self.ranking}, margin={self.margin}, bound={bound}, status={self.status}, steps={self.steps})"
+
+
+def solveQuery(model, targets, delta, epsilon, margin=None, level=None, top=None, lipschitz=None, safety=2.0,
+               verbose=False, metrics=None, estimate=False):
+    """
+    Solves the slice of the BAG attached to model that can reach the target arguments (see Model.solve) with its
+    approximator until the ranking of the targets is settled (see RankingMonitor) or the solve converges. Strength
+    values are written to the BAG as usual, arguments outside the slice keep their base score.
+    Approximators that integrate the whole graph (RK4, DormandPrince) can stop early; SCCHybrid and IncrementalSolver
+    integrate parts of the graph and always solve to epsilon. Returns a QueryResult.
+    """
+    monitor = RankingMonitor(targets, margin, level, top, lipschitz, safety, estimate=estimate)
+    model.approximator.add_callback(monitor)
+    try:
+        model.solve(delta, epsilon, verbose=verbose, targets=targets)
+    finally:
+        model.approximator.callbacks.remove(monitor)
+
+    result = model.result
+    if result.approximator == "forward propagation":
+        bound = 0.0
+    else:
+        # approximators that never stepped the whole graph did not call the monitor
+        if monitor.compiled is not model.compiled:
+            monitor.bind(model.compiled, model)
+        bound = float(monitor.remaining_change(result.max_derivative))
+    estimated = bool(bound > 0 and np.isfinite(bound) and monitor.estimated)
+
+    if monitor.decided and result.status == "stopped":
+        result.status = "decided"
+
+    if metrics is not None:
+        metrics({**result.as_dict(), "bound": bound, "estimated": estimated})
+
+    return QueryResult(targets, dict(result.strengths), bound, result.status, result.steps, estimated)
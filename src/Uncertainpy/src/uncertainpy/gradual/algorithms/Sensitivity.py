@@ -0,0 +1,138 @@
+import copy
+import numpy as np
+import scipy.sparse.linalg as spla
+from .Jacobian import computeJacobian, differentialJacobian
+
+
+class SensitivityResult:
+    """
+    Gradients of the equilibrium strengths of some target arguments. Row t of base_scores holds the derivatives of
+    the strength of targets[t] with respect to the base scores of all arguments (indexed like compiled.names); rows of
+    att_weights and sup_weights hold the derivatives with respect to the weights of all attacks and supports
+    (indexed like compiled.att_indices and compiled.sup_indices). residual is the maximum derivative of the state the
+    gradients were computed at, they are only meaningful if it is close to 0.
+    """
+
+    def __init__(self, compiled, targets, base_scores, att_weights, sup_weights, residual) -> None:
+        self.compiled = compiled
+        self.targets = list(targets)
+        self.base_scores = base_scores
+        self.att_weights = att_weights
+        self.sup_weights = sup_weights
+        self.residual = residual
+
+    def base_score_gradient(self, target):
+        """Derivatives of the strength of target with respect to every base score, by argument name"""
+        row = self.base_scores[self.targets.index(target)]
+        return dict(zip(self.compiled.names, row.tolist()))
+
+    def edge_gradient(self, target):
+        """Derivatives of the strength of target with respect to every edge weight, keyed by (relation, source, target)"""
+        t = self.targets.index(target)
+        names = self.compiled.names
+        gradient = {}
+
+        for relation, sources, targets, row in (("attack", self.compiled.att_indices, self.compiled.att_targets, self.att_weights[t]),
+                                                ("support", self.compiled.sup_indices, self.compiled.sup_targets, self.sup_weights[t])):
+            for source, edge_target, value in zip(sources.tolist(), targets.tolist(), row.tolist()):
+                gradient[(relation, names[source], names[edge_target])] = value
+
+        return gradient
+
+    def ranking(self, target, k=None):
+        """Base scores and edges sorted by the absolute value of their derivative for target (the k largest if given)"""
+        entries = [(("base_score", name), value) for name, value in self.base_score_gradient(target).items()]
+        entries += list(self.edge_gradient(target).items())
+        entries.sort(key=lambda entry: -abs(entry[1]))
+        return entries if k is None else entries[:k]
+
+    def __repr__(self) -> str:
+        return f"SensitivityResult(targets={self.targets}, residual={self.residual:.2e})"
+
+
+def differentialParameterDerivatives(compiled, differential):
+    """Derivatives of every derivative f_i with respect to its base score and the weights of its incoming edges, from the
+    analytic partials of Model.compute_differential"""
+    slopes, base_derivatives, _, weight_partials = differential
+    _, targets, _, _ = compiled.edges()
+    edge_derivatives = slopes[targets] * weight_partials
+    no_attacks = len(compiled.att_indices)
+    return base_derivatives, edge_derivatives[:no_attacks], edge_derivatives[no_attacks:]
+
+
+def parameterDerivatives(model, compiled, state, derivatives):
+    """
+    Forward-difference derivatives of every derivative f_i with respect to the parameters it depends on: its own base
+    score and the weights of its incoming attacks and supports. Edges with different targets are perturbed together,
+    so this takes one kernel evaluation for the base scores plus one per rank of an edge within its row.
+    """
+    step = np.sqrt(np.finfo(np.float64).eps)
+    perturbed = copy.copy(compiled)
+
+    perturbed.base_scores = compiled.base_scores + step
+    base_derivatives = (model.compute_derivatives(perturbed, state) - derivatives) / step
+    perturbed.base_scores = compiled.base_scores
+
+    def edge_derivatives(indptr, targets, key):
+        weights = getattr(compiled, key)
+        rank = np.arange(len(targets)) - indptr[targets]
+        result = np.zeros(len(targets))
+
+        for r in range(int(rank.max(initial=-1)) + 1):
+            edges = np.flatnonzero(rank == r)
+            h = step * np.maximum(1.0, np.abs(weights[edges]))
+            shifted = weights.copy()
+            shifted[edges] += h
+            setattr(perturbed, key, shifted)
+            result[edges] = (model.compute_derivatives(perturbed, state) - derivatives)[targets[edges]] / h
+
+        setattr(perturbed, key, weights)
+        return result
+
+    att_derivatives = edge_derivatives(compiled.att_indptr, compiled.att_targets, "att_weights")
+    sup_derivatives = edge_derivatives(compiled.sup_indptr, compiled.sup_targets, "sup_weights")
+    return base_derivatives, att_derivatives, sup_derivatives
+
+
+def computeSensitivity(model, compiled, state, targets):
+    """
+    Gradients of the strengths of the target arguments (names) with respect to all base scores and edge weights
+    at the equilibrium state, by the implicit function theorem: with f(s, p) = 0 at the equilibrium,
+    ds_t/dp = lambda_t^T df/dp where J^T lambda_t = -e_t and J = df/ds. J is factorised once and solved for all
+    targets together. J and df/dp come from the analytic differential of the model if it has one (see
+    Model.compute_differential), so the cost is about that of one Newton step regardless of the number of parameters
+    and of the in-degrees; other models are differentiated by finite differences.
+    """
+    if not model.has_kernel():
+        raise TypeError("computeSensitivity requires a model with a vectorised compute_derivatives kernel")
+
+    state = np.asarray(state, dtype=np.float64)
+    rows = np.array([compiled.index[t] for t in targets], dtype=np.int64)
+
+    derivatives = model.compute_derivatives(compiled, state)
+    differential = model.compute_differential(compiled, state)
+    if differential is not None:
+        jacobian = differentialJacobian(compiled, differential)
+    else:
+        jacobian = computeJacobian(model, compiled, state, derivatives=derivatives)
+
+    unit = np.zeros((compiled.n, len(rows)))
+    unit[rows, np.arange(len(rows))] = -1.0
+    try:
+        adjoint = spla.splu(jacobian.T.tocsc()).solve(unit)
+    except RuntimeError:
+        raise ValueError("the Jacobian is singular at this state, it is not a regular equilibrium") from None
+
+    # (n x targets) -> (targets x n)
+    adjoint = adjoint.T
+    if differential is not None:
+        base_derivatives, att_derivatives, sup_derivatives = differentialParameterDerivatives(compiled, differential)
+    else:
+        base_derivatives, att_derivatives, sup_derivatives = parameterDerivatives(model, compiled, state, derivatives)
+
+    residual = float(np.max(np.abs(derivatives))) if compiled.n > 0 else 0.0
+    return SensitivityResult(compiled, targets,
+                             adjoint * base_derivatives,
+                             adjoint[:, compiled.att_targets] * att_derivatives,
+                             adjoint[:, compiled.sup_targets] * sup_derivatives,
+                             residual)
@@ -0,0 +1,75 @@
+import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from .DormandPrince import DormandPrince
+from .Instrumentation import SolveResult
+from ..CompiledBAG import CompiledBAG
+
+
+class StrengthResult(SolveResult):
+    """
+    SolveResult of the functional solve, which additionally keeps the argument names and the strength array
+    (values[i] is the strength of names[i]); result[name] looks up a single strength value.
+    """
+
+    def __init__(self, names, values, model, approximator, relations, status, max_derivative, time=0, steps=0,
+                 derivative_evaluations=0, phase_times=None) -> None:
+        super().__init__(model, approximator, len(names), relations, status, max_derivative, time, steps,
+                         derivative_evaluations, phase_times, dict(zip(names, values.tolist())))
+        self.names = names
+        self.values = values
+
+    def __getitem__(self, name):
+        return self.strengths[name]
+
+
+def solve(bag, semantics, approximator=DormandPrince, delta=1e-2, epsilon=1e-4, initial_state=None, **options):
+    """
+    Computes the strength values of bag (BAG, CompactBAG or CompiledBAG) under semantics (a model instance or class)
+    with a fresh approximator(model, **options), starting from the base scores or from initial_state (array indexed
+    like the compiled BAG or dictionary name -> strength). Neither the BAG, its Arguments nor the model are modified,
+    so calls can run concurrently in threads or processes as long as nobody changes the BAG meanwhile.
+    Returns a StrengthResult.
+    """
+    model = semantics() if isinstance(semantics, type) else semantics
+    if not model.has_kernel():
+        raise TypeError("solve requires a model with a vectorised compute_derivatives kernel")
+
+    start = time.perf_counter()
+    compiled = bag if isinstance(bag, CompiledBAG) else bag.compile()
+    # a private view of the arrays; lazily built caches (edges, adjacency) then stay private as well
+    compiled = copy.copy(compiled)
+    compiled.arguments = None
+
+    if initial_state is None:
+        state = compiled.base_scores.copy()
+    elif isinstance(initial_state, dict):
+        state = np.array([initial_state.get(name, base) for name, base in zip(compiled.names, compiled.base_scores.tolist())])
+    else:
+        state = np.array(initial_state, dtype=np.float64)
+    compile_time = time.perf_counter() - start
+
+    integrator = approximator(model, **options)
+    state, integration_time, max_derivative = integrator.integrate(compiled, state, delta, epsilon)
+
+    return StrengthResult(list(compiled.names), state, model.name, integrator.name, len(compiled.att_indices) + len(compiled.sup_indices),
+                          integrator.status, max_derivative, integration_time, integrator.total_steps(),
+                          integrator.total_derivative_evaluations(),
+                          {"compile": compile_time, "integrate": time.perf_counter() - start - compile_time})
+
+
+def solveParallel(bags, semantics, approximator=DormandPrince, delta=1e-2, epsilon=1e-4, workers=None, processes=False,
+                  **options):
+    """
+    Applies solve to every BAG with a pool of workers threads (or processes if processes is True; then semantics,
+    approximator and options must be picklable) and returns the StrengthResults in the order of bags
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with pool(max_workers=max(1, min(workers, len(bags)))) as executor:
+        futures = [executor.submit(solve, bag, semantics, approximator, delta, epsilon, **options) for bag in bags]
+        return [future.result() for future in futures]
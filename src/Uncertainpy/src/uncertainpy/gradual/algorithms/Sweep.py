@@ -0,0 +1,145 @@
+import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .DormandPrince import DormandPrince
+from ..CompiledBAG import CompiledBAG
+
+
+class SweepRun:
+    """One semantics/solver configuration of a sweep: a model, an approximator class with its options, delta and epsilon"""
+
+    def __init__(self, model, approximator=DormandPrince, delta=1e-2, epsilon=1e-4, label=None, **options) -> None:
+        if not model.has_kernel():
+            raise TypeError("sweeps require models with a vectorised compute_derivatives kernel")
+
+        self.model = model
+        self.approximator = approximator
+        self.delta = delta
+        self.epsilon = epsilon
+        self.options = options
+        self.label = label if label is not None else f"{model.name}/{approximator.__name__}"
+
+    def solve(self, compiled):
+        """Returns the strength array, status, maximum derivative and wall time of this configuration on compiled"""
+        start = time.perf_counter()
+        integrator = self.approximator(self.model, **self.options)
+        state, _, max_derivative = integrator.integrate(compiled, compiled.strengths.copy(), self.delta, self.epsilon)
+        return state, integrator.status, max_derivative, time.perf_counter() - start
+
+    def solve_packed(self, graphs):
+        """
+        Solves several graphs as one block-diagonal system and returns one solve result per graph. Graphs whose own
+        maximum derivative is below epsilon count as converged; the wall time is divided in proportion to graph size.
+        """
+        packed = CompiledBAG.concatenate(graphs)
+        state, status, _, elapsed = self.solve(packed)
+
+        derivatives = np.abs(self.model.compute_derivatives(packed, state))
+        results = []
+        for k, compiled in enumerate(graphs):
+            nodes = slice(packed.offsets[k], packed.offsets[k + 1])
+            max_derivative = float(derivatives[nodes].max(initial=0))
+            graph_status = "converged" if max_derivative < self.epsilon else status
+            share = elapsed * compiled.n / max(packed.n, 1)
+            results.append((state[nodes], graph_status, max_derivative, share))
+
+        return results
+
+    def __repr__(self) -> str:
+        return f"SweepRun({self.label})"
+
+
+class SweepResult:
+    """
+    Outcome of sweep: rows holds one dictionary per (graph, run) with keys graph, run, strengths (name -> strength),
+    status, max_derivative and time (wall time of the run in seconds).
+    """
+
+    def __init__(self, names, labels, rows) -> None:
+        self.names = names
+        self.labels = labels
+        self.rows = rows
+
+    def strength_table(self, graph=0):
+        """Argument names, run labels and the (arguments x runs) array of strength values of one graph"""
+        table = np.array([[row["strengths"][name] for name in self.names[graph]]
+                          for row in self.rows if row["graph"] == graph]).T
+        return self.names[graph], self.labels, table
+
+    def timings(self):
+        """Total wall time of every run over all graphs"""
+        totals = dict.fromkeys(self.labels, 0.0)
+        for row in self.rows:
+            totals[row["run"]] += row["time"]
+        return totals
+
+    def failures(self):
+        """(graph, run) pairs that did not converge"""
+        return [(row["graph"], row["run"]) for row in self.rows if row["status"] != "converged"]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __repr__(self) -> str:
+        return f"SweepResult(graphs={len(self.names)}, runs={len(self.labels)}, failures={len(self.failures())})"
+
+
+def sweepChunk(graphs, runs, packed=True):
+    """Solves every graph of the chunk with every run (graph-major order); the compiled structure is shared by all runs"""
+    if packed:
+        per_run = [run.solve_packed(graphs) for run in runs]
+        return [per_run[r][k] for k in range(len(graphs)) for r in range(len(runs))]
+
+    return [run.solve(compiled) for compiled in graphs for run in runs]
+
+
+def sweep(bags, runs, processes=None, chunk_size=None, packed=True):
+    """
+    Evaluates every configuration of runs (SweepRuns, or models to be solved with the SweepRun defaults) on every BAG
+    (a single BAG or a list of BAGs or CompiledBAGs). Each graph is compiled once and solved by all runs in the same
+    worker; graphs are distributed in chunks over a pool of processes (processes=1 solves everything in this process).
+    With packed=True, each run solves a whole chunk as one block-diagonal system, which is much faster for many small
+    graphs, and per-graph times are shares of the chunk time; packed=False solves and times every graph separately.
+    The BAGs are not modified. Returns a SweepResult.
+    """
+    if not isinstance(bags, (list, tuple)):
+        bags = [bags]
+
+    runs = [run if isinstance(run, SweepRun) else SweepRun(run) for run in runs]
+    labels = [run.label for run in runs]
+    if len(set(labels)) != len(labels):
+        raise ValueError("runs must have distinct labels")
+
+    # Argument objects are not needed by the kernels and would only slow down pickling
+    graphs = []
+    for bag in bags:
+        compiled = bag if isinstance(bag, CompiledBAG) else bag.compile()
+        compiled = copy.copy(compiled)
+        compiled.arguments = None
+        graphs.append(compiled)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(1, min(processes, len(graphs)))
+
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(graphs) // (4 * processes)))
+    chunks = [graphs[i:i + chunk_size] for i in range(0, len(graphs), chunk_size)]
+
+    if processes == 1:
+        outcomes = [sweepChunk(chunk, runs, packed) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            outcomes = list(pool.map(sweepChunk, chunks, [runs] * len(chunks), [packed] * len(chunks)))
+
+    rows = []
+    outcomes = (outcome for chunk in outcomes for outcome in chunk)
+    for k, compiled in enumerate(graphs):
+        for label in labels:
+            state, status, max_derivative, elapsed = next(outcomes)
+            rows.append({"graph": k, "run": label, "strengths": compiled.strength_dict(state),
+                         "status": status, "max_derivative": max_derivative, "time": elapsed})
+
+    return SweepResult([g.names for g in graphs], labels, rows)
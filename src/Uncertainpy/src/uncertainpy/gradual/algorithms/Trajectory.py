@@ -0,0 +1,114 @@
+import numpy as np
+
+
+class TrajectoryRecorder:
+    """
+    Records the strength values of all arguments over time in preallocated NumPy buffers.
+
+    Every record call is a candidate sample; only every k-th candidate is kept (every) and, if min_change is set,
+    only those where some strength moved by at least min_change since the last kept sample. The buffers grow by
+    doubling up to max_bytes. When they are full, every other sample is dropped and k is doubled, so a
+    recording never exceeds its budget and still spans the whole trajectory. The first and the final state
+    are always kept.
+    """
+
+    def __init__(self, every=1, min_change=0.0, max_bytes=2**26, capacity=256) -> None:
+        if every < 1:
+            raise ValueError("every must be at least 1")
+
+        self.every = every
+        self.min_change = min_change
+        self.max_bytes = max_bytes
+        self.capacity = capacity
+
+        self.names = []
+        self.size = 0
+        self.stride = every
+        self.candidates = 0
+        self._times = np.empty(0)
+        self._values = np.empty((0, 0))
+
+    @property
+    def times(self):
+        return self._times[:self.size]
+
+    @property
+    def values(self):
+        """Array of shape (samples, arguments)"""
+        return self._values[:self.size]
+
+    @property
+    def nbytes(self):
+        return self._times.nbytes + self._values.nbytes
+
+    def max_samples(self, n):
+        return max(2, self.max_bytes // (8 * (n + 1)))
+
+    def start(self, names, state, time=0):
+        """Discards the previous recording and starts a new one at the given initial state"""
+        self.names = list(names)
+        self.size = 0
+        self.stride = self.every
+        self.candidates = 0
+
+        samples = min(self.capacity, self.max_samples(len(self.names)))
+        self._times = np.empty(samples)
+        self._values = np.empty((samples, len(self.names)))
+        self.append(time, state)
+
+    def append(self, time, state):
+        if self.size == len(self._times):
+            limit = self.max_samples(len(self.names))
+            if self.size < limit:
+                self.grow(min(2 * self.size, limit))
+            else:
+                self.thin()
+
+        self._times[self.size] = time
+        self._values[self.size] = state
+        self.size += 1
+
+    def grow(self, samples):
+        times = np.empty(samples)
+        values = np.empty((samples, len(self.names)))
+        times[:self.size] = self.times
+        values[:self.size] = self.values
+        self._times, self._values = times, values
+
+    def thin(self):
+        """Keeps every other sample (including the first) and halves the sampling rate from now on"""
+        keep = np.arange(0, self.size, 2)
+        self.size = len(keep)
+        self._times[:self.size] = self._times[keep]
+        self._values[:self.size] = self._values[keep]
+        self.stride *= 2
+
+    def record(self, time, state):
+        self.candidates += 1
+        if self.candidates % self.stride != 0:
+            return
+
+        if self.min_change > 0 and self.size > 0 and np.max(np.abs(state - self._values[self.size - 1]), initial=0) < self.min_change:
+            return
+
+        self.append(time, state)
+
+    def finish(self, time, state):
+        """Records the final state unless it is the last sample already"""
+        if self.size == 0 or self._times[self.size - 1] != time:
+            self.append(time, state)
+
+    def series(self, name):
+        """Times and strength values of one argument"""
+        return self.times, self.values[:, self.names.index(name)]
+
+    def as_dict(self):
+        """The recording in the former graph_data format {name: [(time, strength), ...]}"""
+        times = self.times.tolist()
+        return {name: list(zip(times, self.values[:, i].tolist())) for i, name in enumerate(self.names)}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return f"TrajectoryRecorder(arguments={len(self.names)}, samples={self.size}, stride={self.stride})"
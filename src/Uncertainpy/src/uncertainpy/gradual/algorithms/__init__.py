@@ -1,2 +1,15 @@
+from .Instrumentation import *
+from .Trajectory import *
 from .RK4 import *
-from .Acyclic import *
\ No newline at end of file
+from .DormandPrince import *
+from .Equilibrium import *
+from .Condensation import *
+from .Incremental import *
+from .Batch import *
+from .Solve import *
+from .Memo import *
+from .Sweep import *
+from .Acyclic import *
+from .Sensitivity import *
+from .Counterfactual import *
+from .Query import *
\ No newline at end of file
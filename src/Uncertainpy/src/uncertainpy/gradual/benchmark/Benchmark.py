@@ -0,0 +1,233 @@
+import datetime
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from .Generators import randomDAG, cyclicBAG, starBAG, bundledBAGs
+from ..algorithms import RK4, DormandPrince, SCCHybrid, Equilibrium
+from ..semantics import (QuadraticEnergyModel, ContinuousDFQuADModel, ContinuousEulerBasedModel, SquaredEnergyModel,
+                         ContinuousSquaredDFQuADModel)
+
+
+BASELINE_VERSION = 1
+
+MODELS = {
+    "QuadraticEnergy": QuadraticEnergyModel,
+    "ContinuousDFQuAD": ContinuousDFQuADModel,
+    "ContinuousEulerBased": ContinuousEulerBasedModel,
+    "SquaredEnergy": SquaredEnergyModel,
+    "ContinuousSquaredDFQuAD": ContinuousSquaredDFQuADModel,
+}
+
+APPROXIMATORS = {
+    "RK4": RK4,
+    "DormandPrince": DormandPrince,
+    "SCCHybrid": SCCHybrid,
+    "Equilibrium": Equilibrium,
+}
+
+
+class BenchmarkCase:
+    """A named BAG of a generator family; size is the requested number of arguments"""
+
+    def __init__(self, name, family, size, bag) -> None:
+        self.name = name
+        self.family = family
+        self.size = size
+        self.bag = bag
+
+    def __repr__(self) -> str:
+        return f"BenchmarkCase({self.name})"
+
+
+def standardCases(sizes=(10, 100, 1000, 10000, 100000), families=("dag", "cyclic", "star", "bundled"), degree=2.0,
+                  cycle_density=0.1, seed=0, compact_from=10000):
+    """
+    Benchmark cases of the synthetic families (random DAGs, graphs with cycle_density backward edges, hypothesis stars)
+    for every size, plus the bundled .bag files. BAGs with at least compact_from arguments are CompactBAGs.
+    """
+    cases = []
+    for size in sizes:
+        compact = size >= compact_from
+        if "dag" in families:
+            cases.append(BenchmarkCase(f"dag-{size}", "dag", size, randomDAG(size, degree, seed=seed, compact=compact)))
+        if "cyclic" in families:
+            cases.append(BenchmarkCase(f"cyclic-{size}", "cyclic", size,
+                                       cyclicBAG(size, degree, cycle_density, seed=seed, compact=compact)))
+        if "star" in families:
+            cases.append(BenchmarkCase(f"star-{size}", "star", size, starBAG(size, seed=seed, compact=compact)))
+
+    if "bundled" in families:
+        for name, bag in bundledBAGs().items():
+            cases.append(BenchmarkCase(name, "bundled", len(bag.arguments), bag))
+
+    return cases
+
+
+def timedSolve(model, delta, epsilon, time_budget):
+    """Solves with the approximator (never by forward propagation), stopping after time_budget seconds of wall time"""
+    deadline = time.perf_counter() + time_budget
+    model.approximator.add_callback(lambda approximator, compiled, t, state, max_derivative: time.perf_counter() > deadline)
+    model.BAG.reset_strength_values()
+
+    start = time.perf_counter()
+    model.solve(delta, epsilon, verbose=False, propagate_acyclic=False)
+    return time.perf_counter() - start
+
+
+class BenchmarkResult:
+    """
+    Records of a benchmark run, one dictionary per (case, model, approximator) with the case description, the
+    metrics of algorithms.SolveResult.as_dict, the best wall time over the repetitions (time_best) and the peak
+    memory allocated during a traced solve (peak_memory, bytes). metadata describes the machine and the settings.
+    """
+
+    def __init__(self, records, metadata) -> None:
+        self.records = records
+        self.metadata = metadata
+
+    def save(self, path):
+        """Writes the records as machine-readable baseline (JSON)"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": BASELINE_VERSION, "metadata": self.metadata, "records": self.records}, f, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        if baseline.get("version") != BASELINE_VERSION:
+            raise ValueError(f"unsupported baseline version {baseline.get('version')} in {path}")
+
+        return cls(baseline["records"], baseline["metadata"])
+
+    def table(self):
+        """One text line per record"""
+        lines = [f"{'case':<22}{'model':<26}{'approximator':<15}{'status':<12}{'steps':>9}{'evals':>10}{'time [s]':>11}{'peak [MB]':>11}"]
+        for r in self.records:
+            peak = "" if r.get("peak_memory") is None else f"{r['peak_memory'] / 2**20:.1f}"
+            time_best = "" if r.get("time_best") is None else f"{r['time_best']:.4f}"
+            lines.append(f"{r['case']:<22}{r['semantics']:<26}{r['solver']:<15}{r['status']:<12}{r.get('steps', 0):>9}"
+                         f"{r.get('derivative_evaluations', 0):>10}{time_best:>11}{peak:>11}")
+        return "\n".join(lines)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __repr__(self) -> str:
+        return f"BenchmarkResult(records={len(self.records)})"
+
+
+def runBenchmark(cases, models=None, approximators=None, delta=1e-2, epsilon=1e-4, repeat=1, time_budget=60.0,
+                 track_memory=True, verbose=False):
+    """
+    Solves every case with every model (name -> model class, by default all named semantics) and approximator
+    (name -> approximator class or (class, options), by default RK4, DormandPrince, SCCHybrid and Equilibrium).
+    Every combination is timed repeat times; with track_memory, one more solve runs under tracemalloc to measure the
+    peak memory (it is slower, so it is not timed). A solve is stopped after time_budget seconds (status "stopped")
+    and the combination is then skipped (status "skipped") for the larger cases of the same family.
+    Returns a BenchmarkResult.
+    """
+    models = MODELS if models is None else models
+    approximators = APPROXIMATORS if approximators is None else approximators
+
+    records = []
+    exhausted = set()
+    for case in sorted(cases, key=lambda c: c.size):
+        for model_name, model_class in models.items():
+            for approximator_name, approximator in approximators.items():
+                approximator_class, options = approximator if isinstance(approximator, tuple) else (approximator, {})
+                record = {"case": case.name, "family": case.family, "size": case.size,
+                          "semantics": model_name, "solver": approximator_name}
+
+                if (case.family, model_name, approximator_name) in exhausted:
+                    record["status"] = "skipped"
+                    records.append(record)
+                    continue
+
+                times = []
+                model = None
+                for _ in range(max(repeat, 1)):
+                    model = model_class()
+                    model.BAG = case.bag
+                    model.approximator = approximator_class(model, **options)
+                    times.append(timedSolve(model, delta, epsilon, time_budget))
+                    if model.result.status == "stopped":
+                        break
+
+                record.update(model.result.as_dict())
+                record["time_best"] = min(times)
+                record["times"] = times
+
+                if track_memory and model.result.status != "stopped":
+                    model = model_class()
+                    model.BAG = case.bag
+                    model.approximator = approximator_class(model, **options)
+                    tracemalloc.start()
+                    try:
+                        timedSolve(model, delta, epsilon, time_budget)
+                        record["peak_memory"] = tracemalloc.get_traced_memory()[1]
+                    finally:
+                        tracemalloc.stop()
+                else:
+                    record["peak_memory"] = None
+
+                if model.result.status == "stopped":
+                    exhausted.add((case.family, model_name, approximator_name))
+
+                records.append(record)
+                if verbose:
+                    print(f"{case.name} {model_name} {approximator_name}: {record['status']}, "
+                          f"{record['steps']} steps, {record['time_best']:.4f}s")
+
+    metadata = {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "delta": delta,
+        "epsilon": epsilon,
+        "repeat": repeat,
+        "time_budget": time_budget,
+    }
+    return BenchmarkResult(records, metadata)
+
+
+def compareBaselines(baseline, current, tolerance=0.25, min_time=1e-3):
+    """
+    Differences between two BenchmarkResults (or paths of saved baselines) for the combinations present in both:
+    a list of (case, semantics, solver, what, old, new) for best times that grew by more than tolerance (relative,
+    ignoring times below min_time seconds), step counts that grew at all and changes of the status
+    """
+    if isinstance(baseline, str):
+        baseline = BenchmarkResult.load(baseline)
+    if isinstance(current, str):
+        current = BenchmarkResult.load(current)
+
+    def key(record):
+        return record["case"], record["semantics"], record["solver"]
+
+    old_records = {key(r): r for r in baseline.records}
+    regressions = []
+    for new in current.records:
+        old = old_records.get(key(new))
+        if old is None:
+            continue
+
+        if old["status"] != new["status"]:
+            regressions.append((*key(new), "status", old["status"], new["status"]))
+            continue
+
+        if old["status"] == "skipped":
+            continue
+
+        if new["steps"] > old["steps"]:
+            regressions.append((*key(new), "steps", old["steps"], new["steps"]))
+
+        if new["time_best"] > max(old["time_best"], min_time) * (1 + tolerance):
+            regressions.append((*key(new), "time_best", old["time_best"], new["time_best"]))
+
+    return regressions
@@ -0,0 +1,100 @@
+import glob
+import os
+import numpy as np
+from ..Argument import Argument
+from ..BAG import BAG
+from ..CompactBAG import CompactBAG, ATTACK, SUPPORT
+
+
+BUNDLED_BAGS = os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "bags")
+
+
+def buildBAG(base_scores, sources, targets, supports, compact=False, prefix="a"):
+    """
+    BAG (or CompactBAG if compact) with arguments prefix0, prefix1, ... with the given base scores and one relation per
+    (source, target) pair, a support where supports is True and an attack otherwise
+    """
+    names = [f"{prefix}{i}" for i in range(len(base_scores))]
+
+    if compact:
+        bag = CompactBAG(capacity=len(names), edge_capacity=len(sources))
+        ids = bag.add_arguments(names, base_scores)
+        bag.add_edges(ids[sources[~supports]], ids[targets[~supports]], ATTACK)
+        bag.add_edges(ids[sources[supports]], ids[targets[supports]], SUPPORT)
+        return bag
+
+    bag = BAG()
+    arguments = [Argument(name, float(score)) for name, score in zip(names, base_scores)]
+    for argument in arguments:
+        bag.arguments[argument.name] = argument
+
+    for source, target, support in zip(sources.tolist(), targets.tolist(), supports.tolist()):
+        if support:
+            bag.add_support(arguments[source], arguments[target])
+        else:
+            bag.add_attack(arguments[source], arguments[target])
+
+    return bag
+
+
+def randomEdges(rng, n, m):
+    """Up to m distinct (source, target) pairs with source < target"""
+    if n < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    a = rng.integers(n, size=m)
+    b = rng.integers(n, size=m)
+    keep = a != b
+    pairs = np.unique(np.minimum(a, b)[keep] * n + np.maximum(a, b)[keep])
+    return pairs // n, pairs % n
+
+
+def randomDAG(n, degree=2.0, support_ratio=0.5, seed=None, compact=False):
+    """Acyclic BAG with n arguments and about degree * n relations between random pairs of a random topological order"""
+    return cyclicBAG(n, degree, 0.0, support_ratio, seed, compact)
+
+
+def cyclicBAG(n, degree=2.0, cycle_density=0.1, support_ratio=0.5, seed=None, compact=False):
+    """
+    BAG with n arguments and about degree * n random relations of which a fraction cycle_density points backwards
+    in a random topological order, so that cycle_density=0 gives a DAG and larger values give more and larger cycles
+    """
+    rng = np.random.default_rng(seed)
+    sources, targets = randomEdges(rng, n, int(degree * n))
+
+    backwards = rng.random(len(sources)) < cycle_density
+    sources, targets = np.where(backwards, targets, sources), np.where(backwards, sources, targets)
+
+    order = rng.permutation(n)
+    supports = rng.random(len(sources)) < support_ratio
+    return buildBAG(rng.random(n), order[sources], order[targets], supports, compact)
+
+
+def starBAG(n, hubs=3, cross=0.1, support_ratio=0.5, seed=None, compact=False):
+    """
+    BAG shaped like the hypothesis graphs of the LLM pipeline: hubs hypotheses with base score 0.5 that every other
+    argument attacks or supports, plus a fraction cross of arguments that also attack or support another argument
+    """
+    rng = np.random.default_rng(seed)
+    hubs = max(1, min(hubs, n))
+    leaves = np.arange(hubs, n)
+
+    crossing = rng.choice(leaves, size=int(cross * len(leaves)), replace=False)
+    crossing = crossing[crossing < n - 1]
+
+    # leaves only point to leaves with larger index, so the graph stays acyclic
+    sources = np.concatenate((leaves, crossing))
+    targets = np.concatenate((rng.integers(hubs, size=len(leaves)),
+                              crossing + 1 + (rng.random(len(crossing)) * (n - 1 - crossing)).astype(np.int64)))
+
+    base_scores = rng.random(n)
+    base_scores[:hubs] = 0.5
+    supports = rng.random(len(sources)) < support_ratio
+    return buildBAG(base_scores, sources, targets, supports, compact)
+
+
+def bundledBAGs(directory=None):
+    """The .bag files of a directory (by default the bags shipped with Uncertainpy) as a dictionary file name -> BAG"""
+    directory = BUNDLED_BAGS if directory is None else directory
+    return {os.path.splitext(os.path.basename(path))[0]: BAG(path)
+            for path in sorted(glob.glob(os.path.join(directory, "*.bag")))}
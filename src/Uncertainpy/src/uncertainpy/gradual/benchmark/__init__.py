@@ -0,0 +1,2 @@
+from .Generators import *
+from .Benchmark import *
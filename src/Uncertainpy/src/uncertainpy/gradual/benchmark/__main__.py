@@ -0,0 +1,34 @@
+import argparse
+from .Benchmark import MODELS, APPROXIMATORS, standardCases, runBenchmark, compareBaselines
+
+parser = argparse.ArgumentParser(prog="python -m uncertainpy.gradual.benchmark",
+                                 description="Times every semantics and approximator on synthetic and bundled BAGs")
+parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+parser.add_argument("--families", nargs="+", default=["dag", "cyclic", "star", "bundled"])
+parser.add_argument("--semantics", nargs="+", default=list(MODELS), choices=list(MODELS))
+parser.add_argument("--solvers", nargs="+", default=list(APPROXIMATORS), choices=list(APPROXIMATORS))
+parser.add_argument("--cycle-density", type=float, default=0.1)
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--delta", type=float, default=1e-2)
+parser.add_argument("--epsilon", type=float, default=1e-4)
+parser.add_argument("--repeat", type=int, default=1)
+parser.add_argument("--time-budget", type=float, default=60.0, help="seconds per solve")
+parser.add_argument("--no-memory", action="store_true", help="skip the traced solve measuring peak memory")
+parser.add_argument("--output", default="benchmark.json", help="baseline file to write")
+parser.add_argument("--compare", help="baseline file to compare against")
+parser.add_argument("--tolerance", type=float, default=0.25, help="relative slowdown reported as regression")
+args = parser.parse_args()
+
+cases = standardCases(args.sizes, args.families, cycle_density=args.cycle_density, seed=args.seed)
+result = runBenchmark(cases, {name: MODELS[name] for name in args.semantics},
+                      {name: APPROXIMATORS[name] for name in args.solvers},
+                      args.delta, args.epsilon, args.repeat, args.time_budget, not args.no_memory, verbose=True)
+result.save(args.output)
+print(result.table())
+
+if args.compare:
+    regressions = compareBaselines(args.compare, result, args.tolerance)
+    for case, semantics, solver, what, old, new in regressions:
+        print(f"REGRESSION {case} {semantics} {solver}: {what} {old} -> {new}")
+    if regressions:
+        raise SystemExit(1)
@@ -9,11 +9,11 @@ def strengthplot(model, delta, epsilon, title="Untitled graph"):
     if (type(epsilon) != float and type(epsilon) != int):
         raise TypeError("epsilon must be a float or integer")
 
+    recorder = model.approximator.recorder
+
     fig, ax = plt.subplots()
-    for x in model.approximator.graph_data:
-        x_values = [x[0] for x in model.approximator.graph_data[x]]
-        y_values = [y[1] for y in model.approximator.graph_data[x]]
-        ax.plot(x_values, y_values, label=x)
+    for i, name in enumerate(recorder.names):
+        ax.plot(recorder.times, recorder.values[:, i], label=name)
 
     ax.set_xlabel('Time (t)')  # Add an x-label to the axes.
     ax.set_ylabel('Strength (t)')  # Add a y-label to the axes.
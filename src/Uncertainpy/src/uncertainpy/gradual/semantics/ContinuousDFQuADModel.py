@@ -1,8 +1,17 @@
+import numpy as np
 from .Model import Model
+from .modular.ProductAggregation import ProductAggregation
+from .modular.LinearInfluence import LinearInfluence
 
 
 class ContinuousDFQuADModel(Model):
-    def __init__(self, aggregation=None, influence=None, BAG=None, approximator=None, arguments=..., argument_strength=..., attacker=..., supporter=..., name="") -> None:
+    def __init__(self, aggregation=None, influence=None, BAG=None, approximator=None, arguments=None, argument_strength=None, attacker=None, supporter=None, name="") -> None:
+        # decomposition into aggregation and influence function, used for forward propagation in acyclic BAGs
+        if aggregation is None:
+            aggregation = ProductAggregation()
+        if influence is None:
+            influence = LinearInfluence(1)
+
         super().__init__(BAG, approximator, aggregation, influence, arguments, argument_strength, attacker, supporter, name)
         self.name = __class__.__name__
 
@@ -33,6 +42,13 @@ class ContinuousDFQuADModel(Model):
 
         return derivatives
 
+    def compute_derivatives(self, compiled, state):
+        geometric_energy = np.subtract(*compiled.products(state, weighted=False))
+        weight = compiled.base_scores
+
+        derivative = weight + np.where(geometric_energy > 0, (1 - weight) * geometric_energy, weight * geometric_energy)
+        return derivative - state
+
     def __repr__(self) -> str:
         return super().__repr__(__name__)
 
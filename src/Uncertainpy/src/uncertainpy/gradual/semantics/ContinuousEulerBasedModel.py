@@ -1,9 +1,18 @@
 import math
+import numpy as np
 from .Model import Model
+from .modular.SumAggregation import SumAggregation
+from .modular.EulerBasedInfluence import EulerBasedInfluence
 
 
 class ContinuousEulerBasedModel(Model):
-    def __init__(self, aggregation=None, influence=None, BAG=None, approximator=None, arguments=..., argument_strength=..., attacker=..., supporter=..., name="") -> None:
+    def __init__(self, aggregation=None, influence=None, BAG=None, approximator=None, arguments=None, argument_strength=None, attacker=None, supporter=None, name="") -> None:
+        # decomposition into aggregation and influence function, used for forward propagation in acyclic BAGs
+        if aggregation is None:
+            aggregation = SumAggregation(weighted=False)
+        if influence is None:
+            influence = EulerBasedInfluence()
+
         super().__init__(BAG, approximator, aggregation, influence, arguments, argument_strength, attacker, supporter, name)
         self.name = __class__.__name__
 
@@ -29,6 +38,13 @@ class ContinuousEulerBasedModel(Model):
 
         return derivatives
 
+    def compute_derivatives(self, compiled, state):
+        energy = compiled.net_sum(state, weighted=False)
+        weight = compiled.base_scores
+
+        derivative = 1 - (1 - weight**2) / (1 + weight * np.exp(energy))
+        return derivative - state
+
     def __repr__(self) -> str:
         return super().__repr__(__name__)
 
@@ -1,8 +1,10 @@
+import numpy as np
 from .Model import Model
+from .modular.Kernels import findKernel
 
 
 class ContinuousModularModel(Model):
-    def __init__(self, aggregation=None, influence=None, BAG=None, approximator=None, arguments=..., argument_strength=..., attacker=..., supporter=..., name="") -> None:
+    def __init__(self, aggregation=None, influence=None, BAG=None, approximator=None, arguments=None, argument_strength=None, attacker=None, supporter=None, name="") -> None:
         super().__init__(BAG, approximator, aggregation, influence, arguments, argument_strength, attacker, supporter, name)
         self.name = __class__.__name__
 
@@ -17,6 +19,37 @@ class ContinuousModularModel(Model):
 
         return derivatives
 
+    def compute_derivatives(self, compiled, state):
+        kernel = findKernel(self.aggregation, self.influence)
+        if kernel is not None:
+            return kernel(self.aggregation, self.influence, compiled, state)
+
+        # generic fallback for pairs without fused kernel: vectorised methods where available, scalar ones otherwise
+        if hasattr(self.aggregation, "aggregate_strengths"):
+            aggregate_strength = self.aggregation.aggregate_strengths(compiled, state)
+        else:
+            aggregate_strength = self.aggregate_each(compiled, state)
+
+        if hasattr(self.influence, "compute_strengths"):
+            derivative = self.influence.compute_strengths(compiled.base_scores, aggregate_strength)
+        else:
+            derivative = np.array([self.influence.compute_strength(w, a)
+                                   for w, a in zip(compiled.base_scores.tolist(), aggregate_strength.tolist())])
+
+        return derivative - state
+
+    def aggregate_each(self, compiled, state):
+        """Calls the scalar aggregate_strength for every argument, with attackers and supporters keyed by index"""
+        aggregates = np.empty(compiled.n)
+        for i in range(compiled.n):
+            attacks = slice(compiled.att_indptr[i], compiled.att_indptr[i + 1])
+            supports = slice(compiled.sup_indptr[i], compiled.sup_indptr[i + 1])
+            attackers = dict(zip(compiled.att_indices[attacks].tolist(), compiled.att_weights[attacks].tolist()))
+            supporters = dict(zip(compiled.sup_indices[supports].tolist(), compiled.sup_weights[supports].tolist()))
+            aggregates[i] = self.aggregation.aggregate_strength(attackers, supporters, state)
+
+        return aggregates
+
     def __repr__(self) -> str:
         return super().__repr__(__name__)
 
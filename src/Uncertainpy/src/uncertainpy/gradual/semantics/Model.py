@@ -1,16 +1,78 @@
+import numpy as np
+from ..algorithms.Acyclic import computeStrengthValues
+from ..algorithms.Sensitivity import computeSensitivity
+from ..algorithms.Counterfactual import computeCounterfactuals
+from ..algorithms.Query import solveQuery
+from ..algorithms.Instrumentation import PhaseTimer, SolveResult
+from ..CompactBAG import CompactBAG
+from .modular.Kernels import findDifferential
+
+
 class Model:
-    def __init__(self, BAG=None, approximator=None, aggregation=None, influence=None, arguments=[], argument_strength=[], attacker={}, supporter={}, name="") -> None:
+    def __init__(self, BAG=None, approximator=None, aggregation=None, influence=None, arguments=None, argument_strength=None, attacker=None, supporter=None, name="") -> None:
         self.BAG = BAG
         self.approximator = approximator
         self.aggregation = aggregation
         self.influence = influence
-        self.arguments = arguments
-        self.argument_strength = argument_strength
-        self.attacker = attacker
-        self.supporter = supporter
+        self.arguments = [] if arguments is None else arguments
+        self.argument_strength = {} if argument_strength is None else argument_strength
+        self.attacker = {} if attacker is None else attacker
+        self.supporter = {} if supporter is None else supporter
         self.name = name
+        self.result = None
+
+    def compute_derivatives(self, compiled, state):
+        """
+        Vectorised counterpart of compute_derivative_at: takes a CompiledBAG and a strength array indexed like it
+        and returns the array of all derivatives. Subclasses override this with a kernel; the default falls back
+        to compute_derivative_at (which requires the dictionaries set up by the approximator).
+        """
+        arguments = compiled.arguments
+        derivatives = self.compute_derivative_at({a: state[i] for i, a in enumerate(arguments)})
+        return np.array([derivatives[a] for a in arguments], dtype=np.float64)
+
+    def has_kernel(self):
+        """Tests if the model provides a vectorised compute_derivatives"""
+        return type(self).compute_derivatives is not Model.compute_derivatives
+
+    def compute_differential(self, compiled, state):
+        """
+        Analytic partial derivatives of compute_derivatives at state, from the aggregation and influence function (see
+        modular.Kernels.DIFFERENTIALS), or None if the pair has none; callers then fall back to finite differences.
+        """
+        if not self.has_differential():
+            return None
+        return findDifferential(self.aggregation, self.influence)(self.aggregation, self.influence, compiled, state)
 
-    def solve(self, delta, epsilon, verbose=True, generate_plot=False):
+    def has_differential(self):
+        """Tests if compute_differential is available for the aggregation and influence function of the model"""
+        return findDifferential(self.aggregation, self.influence) is not None
+
+    def lipschitz_constant(self, compiled):
+        """
+        Lipschitz constant of the update map s -> s + compute_derivatives(compiled, s) in the maximum norm for strength
+        values in [0, 1], from the aggregation and influence function: the largest product of their constants over all
+        arguments. Below 1 the map is a contraction (see algorithms.RankingMonitor). None if either function has none.
+        """
+        if not hasattr(self.aggregation, "lipschitz") or not hasattr(self.influence, "lipschitz"):
+            return None
+
+        aggregation = self.aggregation.lipschitz(compiled)
+        if aggregation is None:
+            return None
+        return float(np.max(self.influence.lipschitz(compiled.base_scores) * aggregation, initial=0.0))
+
+    def solve(self, delta, epsilon, verbose=True, generate_plot=False, propagate_acyclic=True, metrics=None, targets=None):
+        """
+        Computes strength values of the attached BAG with the attached approximator. If the BAG is acyclic and the model
+        has an aggregation and influence function, the strength values are computed exactly by forward propagation
+        instead (unless propagate_acyclic is False or a plot of the trajectory is requested). CompactBAGs are
+        always solved by the approximator; SCCHybrid propagates their acyclic parts without Argument objects.
+        A SolveResult with counters and timings is stored in self.result and, if given, passed as dictionary to
+        the metrics sink (any callable, e.g. algorithms.JSONLinesSink). If targets (argument names) are given, only the
+        slice of the BAG that can reach them is solved and all other arguments keep their base score.
+        Returns the final maximum derivative.
+        """
         if type(verbose) != bool:
             raise TypeError("verbose must be a boolean")
 
@@ -29,8 +91,110 @@ class Model:
         if self.BAG is None:
             raise AttributeError("Model does not have BAG attached")
 
-        result = self.approximator.approximate_solution(delta, epsilon, verbose, generate_plot)
-        return result
+        if targets is not None:
+            return self.solve_slice(targets, delta, epsilon, verbose, generate_plot, propagate_acyclic, metrics)
+
+        self.result = None
+        compact = isinstance(self.BAG, CompactBAG)
+        if propagate_acyclic and not generate_plot and not compact and self.aggregation is not None and self.influence is not None:
+            timer = PhaseTimer()
+            with timer.phase("propagate"):
+                strength_values = computeStrengthValues(self.BAG, self.aggregation, self.influence, verbose=False)
+
+            if strength_values is not None:
+                self.arguments = list(strength_values)
+                self.argument_strength = strength_values
+                self.approximator.status = "converged"
+                self.result = SolveResult(self.name, "forward propagation", len(self.arguments),
+                                          len(self.BAG.attacks) + len(self.BAG.supports), "converged", 0,
+                                          phase_times=timer.times,
+                                          strengths={arg.name: strength for arg, strength in strength_values.items()})
+
+                if (verbose):
+                    print_args = '\n'.join([str(x) for x in self.arguments])
+                    print(f"{self.name}, forward propagation (acyclic BAG)\n{print_args}\n")
+
+        if self.result is None:
+            self.approximator.approximate_solution(delta, epsilon, verbose, generate_plot)
+            self.result = self.approximator.result
+
+        if metrics is not None:
+            metrics(self.result.as_dict())
+
+        return self.result.max_derivative
+
+    def solve_slice(self, targets, delta, epsilon, verbose=True, generate_plot=False, propagate_acyclic=True, metrics=None):
+        """Solves the ancestors of the targets only (see BAG.slice); the result reports all other arguments at their base score"""
+        if isinstance(targets, str):
+            targets = [targets]
+
+        bag = self.BAG
+        sliced = bag.slice(targets)
+        self.BAG = sliced
+        try:
+            self.solve(delta, epsilon, verbose, generate_plot, propagate_acyclic)
+        finally:
+            self.BAG = bag
+
+        bag.merge_slice_strengths(sliced)
+        if isinstance(bag, CompactBAG):
+            base_scores = dict(zip(bag.names, bag.base_scores.tolist()))
+        else:
+            base_scores = {name: argument.initial_weight for name, argument in bag.arguments.items()}
+        self.result.strengths = {**base_scores, **self.result.strengths}
+
+        if metrics is not None:
+            metrics(self.result.as_dict())
+
+        return self.result.max_derivative
+
+    def solve_query(self, targets, delta, epsilon, margin=None, level=None, top=None, lipschitz=None, estimate=False, verbose=False,
+                    metrics=None):
+        """
+        Like solve, but stops as soon as the ranking of the target arguments (names) is settled: the first top positions
+        (all if None) cannot change, the gap between the first two targets is known to be above or below margin and the
+        strength of the first one above or below level (if given), within a bound on the remaining change of all strength
+        values (see algorithms.RankingMonitor). The bound is proven if the semantics is a contraction on the BAG (or
+        lipschitz is given); with estimate, it is otherwise estimated from the decay of the derivatives.
+        Returns a QueryResult with the (partial) strength values and the bound.
+        """
+        if self.approximator is None:
+            raise AttributeError("Model does not have approximator attached")
+
+        if isinstance(targets, str):
+            targets = [targets]
+
+        return solveQuery(self, targets, delta, epsilon, margin, level, top, lipschitz, estimate=estimate, verbose=verbose,
+                          metrics=metrics)
+
+    def sensitivity(self, targets):
+        """
+        Gradients of the strengths of the target arguments (names) with respect to all base scores and edge weights
+        of the attached BAG, computed at its current strength values (call solve first). Returns a SensitivityResult.
+        """
+        if self.BAG is None:
+            raise AttributeError("Model does not have BAG attached")
+
+        if isinstance(targets, str):
+            targets = [targets]
+
+        compiled = self.BAG.compile()
+        return computeSensitivity(self, compiled, compiled.strengths, targets)
+
+    def counterfactuals(self, targets, delta=1e-2, epsilon=1e-4, removals=None):
+        """
+        Strength changes of the target arguments (names) when each single argument, attack or support of the attached
+        BAG (or each of the given removals) is removed, warm-started from its current strength values (call solve
+        first). The BAG is not modified. Returns a CounterfactualResult.
+        """
+        if self.BAG is None:
+            raise AttributeError("Model does not have BAG attached")
+
+        if isinstance(targets, str):
+            targets = [targets]
+
+        compiled = self.BAG.compile()
+        return computeCounterfactuals(self, compiled, compiled.strengths, targets, delta, epsilon, removals)
 
     def __repr__(self, name) -> str:
         return f"{name}({self.BAG}, {self.approximator}, {self.arguments}, {self.argument_strength}, {self.attacker}, {self.supporter})"
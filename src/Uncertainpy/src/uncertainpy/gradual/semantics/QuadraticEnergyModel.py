@@ -1,8 +1,17 @@
+import numpy as np
 from .Model import Model
+from .modular.SumAggregation import SumAggregation
+from .modular.QuadraticMaximumInfluence import QuadraticMaximumInfluence
 
 
 class QuadraticEnergyModel(Model):
-    def __init__(self, aggregation=None, influence=None, BAG=None, approximator=None, arguments=..., argument_strength=..., attacker=..., supporter=..., name="") -> None:
+    def __init__(self, aggregation=None, influence=None, BAG=None, approximator=None, arguments=None, argument_strength=None, attacker=None, supporter=None, name="") -> None:
+        # decomposition into aggregation and influence function, used for forward propagation in acyclic BAGs
+        if aggregation is None:
+            aggregation = SumAggregation(weighted=False)
+        if influence is None:
+            influence = QuadraticMaximumInfluence(1)
+
         super().__init__(BAG, approximator, aggregation, influence, arguments, argument_strength, attacker, supporter, name)
         self.name = __class__.__name__
 
@@ -32,6 +41,14 @@ class QuadraticEnergyModel(Model):
 
         return derivatives
 
+    def compute_derivatives(self, compiled, state):
+        energy = compiled.net_sum(state, weighted=False)
+        weight = compiled.base_scores
+        h = energy**2 / (1 + energy**2)
+
+        derivative = weight + np.where(energy > 0, (1 - weight) * h, -weight * h)
+        return derivative - state
+
     def __repr__(self) -> str:
         return super().__repr__(__name__)
 
@@ -1,8 +1,17 @@
+import numpy as np
 from .Model import Model
+from .modular.SquaredSumAggregation import SquaredSumAggregation
+from .modular.LinearMaximumInfluence import LinearMaximumInfluence
 
 
 class SquaredEnergyModel(Model):
-    def __init__(self, aggregation=None, influence=None, BAG=None, approximator=None, arguments=..., argument_strength=..., attacker=..., supporter=..., name="") -> None:
+    def __init__(self, aggregation=None, influence=None, BAG=None, approximator=None, arguments=None, argument_strength=None, attacker=None, supporter=None, name="") -> None:
+        # decomposition into aggregation and influence function, used for forward propagation in acyclic BAGs
+        if aggregation is None:
+            aggregation = SquaredSumAggregation(weighted=False)
+        if influence is None:
+            influence = LinearMaximumInfluence(1)
+
         super().__init__(BAG, approximator, aggregation, influence, arguments, argument_strength, attacker, supporter, name)
         self.name = __class__.__name__
 
@@ -32,6 +41,16 @@ class SquaredEnergyModel(Model):
 
         return derivatives
 
+    def compute_derivatives(self, compiled, state):
+        squared = state**2
+        energy = compiled.net_sum(squared, weighted=False)
+        weight = compiled.base_scores
+
+        # energy / (1 + |energy|) equals energy / (1 + energy) for positive and energy / (1 - energy) for negative energy
+        h = energy / (1 + np.abs(energy))
+        derivative = weight + np.where(energy > 0, (1 - weight) * h, weight * h)
+        return derivative - state
+
     def __repr__(self) -> str:
         return super().__repr__(__name__)
 
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 class EulerBasedInfluence:
     def __init__(self) -> None:
@@ -7,5 +8,12 @@ class EulerBasedInfluence:
     def compute_strength(self, weight, aggregate):
         return 1 - (1-weight**2) / (1 + weight * math.exp(aggregate))
 
+    def compute_strengths(self, weights, aggregates):
+        return 1 - (1-weights**2) / (1 + weights * np.exp(aggregates))
+
+    def lipschitz(self, weights):
+        """Lipschitz constants of compute_strengths in the aggregate, for every base score"""
+        return (1 - weights**2) / 4
+
     def __str__(self) -> str:
         return __class__.__name__
\ No newline at end of file
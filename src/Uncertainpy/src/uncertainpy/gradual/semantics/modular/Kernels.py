@@ -0,0 +1,239 @@
+import numpy as np
+from .SumAggregation import SumAggregation
+from .ProductAggregation import ProductAggregation
+from .SquaredSumAggregation import SquaredSumAggregation
+from .SquaredProductAggregation import SquaredProductAggregation
+from .LinearInfluence import LinearInfluence
+from .QuadraticMaximumInfluence import QuadraticMaximumInfluence
+from .LinearMaximumInfluence import LinearMaximumInfluence
+from .EulerBasedInfluence import EulerBasedInfluence
+from .MLPBasedInfluence import MLPBasedInfluence
+
+
+# Aggregates of all arguments in a single pass over the edges (one bincount)
+
+def sumAggregates(aggregation, compiled, state):
+    return compiled.net_sum(state, aggregation.weighted)
+
+
+def squaredSumAggregates(aggregation, compiled, state):
+    return compiled.net_sum(state * state, aggregation.weighted)
+
+
+def productAggregates(aggregation, compiled, state):
+    attack_product, support_product = compiled.products(state, weighted=aggregation.weighted)
+    return attack_product - support_product
+
+
+def squaredProductAggregates(aggregation, compiled, state):
+    attack_product, support_product = compiled.products(state, power=2, weighted=aggregation.weighted)
+    return attack_product - support_product
+
+
+# Derivatives influence(base score, aggregate) - state, computed in place on the aggregate array
+
+def linearDerivatives(influence, weights, aggregates, state):
+    slope = np.where(aggregates > 0, 1 - weights, weights)
+    aggregates *= slope
+    aggregates /= influence.conservativeness
+    aggregates += weights
+    aggregates -= state
+    return aggregates
+
+
+def maximumDerivatives(h, weights, aggregates, state):
+    """weights + h * (1 - weights) for positive aggregates and weights - h * weights otherwise, minus state"""
+    h *= np.where(aggregates > 0, 1 - weights, -weights)
+    h += weights
+    h -= state
+    return h
+
+
+def quadraticMaximumDerivatives(influence, weights, aggregates, state):
+    aggregates = aggregates / influence.conservativeness
+    h = aggregates * aggregates
+    h /= 1 + h
+    return maximumDerivatives(h, weights, aggregates, state)
+
+
+def linearMaximumDerivatives(influence, weights, aggregates, state):
+    h = np.abs(aggregates) / influence.conservativeness
+    h /= 1 + h
+    return maximumDerivatives(h, weights, aggregates, state)
+
+
+def eulerBasedDerivatives(influence, weights, aggregates, state):
+    np.exp(aggregates, out=aggregates)
+    aggregates *= weights
+    aggregates += 1
+    return 1 - (1 - weights * weights) / aggregates - state
+
+
+def mlpBasedDerivatives(influence, weights, aggregates, state):
+    # 1 / (1 + exp(-logit(w) - a)) rewritten as w / (w + (1 - w) exp(-a)), which avoids the logit
+    np.negative(aggregates, out=aggregates)
+    np.exp(aggregates, out=aggregates)
+    aggregates *= 1 - weights
+    aggregates += weights
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return weights / aggregates - state
+
+
+AGGREGATES = {
+    SumAggregation: sumAggregates,
+    ProductAggregation: productAggregates,
+    SquaredSumAggregation: squaredSumAggregates,
+    SquaredProductAggregation: squaredProductAggregates,
+}
+
+DERIVATIVES = {
+    LinearInfluence: linearDerivatives,
+    QuadraticMaximumInfluence: quadraticMaximumDerivatives,
+    LinearMaximumInfluence: linearMaximumDerivatives,
+    EulerBasedInfluence: eulerBasedDerivatives,
+    MLPBasedInfluence: mlpBasedDerivatives,
+}
+
+
+def fuse(aggregates, derivatives):
+    def kernel(aggregation, influence, compiled, state):
+        return derivatives(influence, compiled.base_scores, aggregates(aggregation, compiled, state), state)
+
+    return kernel
+
+
+# one kernel per (aggregation, influence) pair: kernel(aggregation, influence, compiled, state) -> derivatives
+FUSED_KERNELS = {(aggregation, influence): fuse(aggregates, derivatives)
+                 for aggregation, aggregates in AGGREGATES.items()
+                 for influence, derivatives in DERIVATIVES.items()}
+
+
+# Analytic partial derivatives. Aggregation partials return (aggregates, d aggregate / d state of the source, d aggregate /
+# d weight) with one entry per edge (attacks followed by supports, see CompiledBAG.edges); influence partials return
+# (d strength / d aggregate, d strength / d base score) per argument.
+
+def sumPartials(aggregation, compiled, state):
+    sources, _, weights, signs = compiled.edges()
+    if not aggregation.weighted:
+        return compiled.net_sum(state, False), signs, np.zeros(len(signs))
+    return compiled.net_sum(state), signs * weights, signs * state[sources]
+
+
+def squaredSumPartials(aggregation, compiled, state):
+    sources, _, weights, signs = compiled.edges()
+    values = state[sources]
+    if not aggregation.weighted:
+        return compiled.net_sum(state * state, False), 2 * signs * values, np.zeros(len(signs))
+    return compiled.net_sum(state * state), 2 * signs * weights * values, signs * values * values
+
+
+def powerProductPartials(aggregation, compiled, state, power):
+    """Partials of the product aggregations: d (attack product - support product) / d (weight * value) of an edge is its
+    sign times power * factor**(power - 1) times the product of the other factors"""
+    sources, _, weights, signs = compiled.edges()
+    attack_product, support_product = compiled.products(state, power=power, weighted=aggregation.weighted)
+
+    values = state[sources]
+    scaled = weights * values if aggregation.weighted else values
+    slopes = signs * compiled.edge_products(state, power=power, weighted=aggregation.weighted)
+    if power != 1:
+        slopes *= power * (1 - scaled)**(power - 1)
+
+    if not aggregation.weighted:
+        return attack_product - support_product, slopes, np.zeros(len(signs))
+    return attack_product - support_product, slopes * weights, slopes * values
+
+
+def productPartials(aggregation, compiled, state):
+    return powerProductPartials(aggregation, compiled, state, 1)
+
+
+def squaredProductPartials(aggregation, compiled, state):
+    return powerProductPartials(aggregation, compiled, state, 2)
+
+
+def linearPartials(influence, weights, aggregates):
+    positive = aggregates > 0
+    slopes = np.where(positive, 1 - weights, weights) / influence.conservativeness
+    return slopes, 1 + np.where(positive, -aggregates, aggregates) / influence.conservativeness
+
+
+def maximumPartials(h, dh, weights, aggregates):
+    """Partials of weights + h * (1 - weights) for positive aggregates and weights - h * weights otherwise"""
+    return dh * np.where(aggregates > 0, 1 - weights, -weights), 1 - h
+
+
+def quadraticMaximumPartials(influence, weights, aggregates):
+    scaled = aggregates / influence.conservativeness
+    squared = 1 + scaled * scaled
+    return maximumPartials(scaled * scaled / squared, 2 * scaled / (squared * squared * influence.conservativeness),
+                           weights, aggregates)
+
+
+def linearMaximumPartials(influence, weights, aggregates):
+    scaled = np.abs(aggregates) / influence.conservativeness
+    # one-sided derivative from the negative side at 0, like the branch compute_strengths takes there
+    dh = np.where(aggregates > 0, 1.0, -1.0) / (influence.conservativeness * (1 + scaled)**2)
+    return maximumPartials(scaled / (1 + scaled), dh, weights, aggregates)
+
+
+def eulerBasedPartials(influence, weights, aggregates):
+    # exp(a) / (1 + w exp(a)) written as 1 / (exp(-a) + w), which stays finite for large aggregates
+    with np.errstate(over="ignore"):
+        denominator = 1 + weights * np.exp(aggregates)
+        ratio = 1 / (np.exp(-aggregates) + weights)
+    slopes = weights * (1 - weights * weights) * ratio / denominator
+    return slopes, (2 * weights + (1 - weights * weights) * ratio) / denominator
+
+
+AGGREGATE_PARTIALS = {
+    SumAggregation: sumPartials,
+    ProductAggregation: productPartials,
+    SquaredSumAggregation: squaredSumPartials,
+    SquaredProductAggregation: squaredProductPartials,
+}
+
+# MLPBasedInfluence has no analytic partials, its pairs are differentiated by finite differences
+INFLUENCE_PARTIALS = {
+    LinearInfluence: linearPartials,
+    QuadraticMaximumInfluence: quadraticMaximumPartials,
+    LinearMaximumInfluence: linearMaximumPartials,
+    EulerBasedInfluence: eulerBasedPartials,
+}
+
+
+def fuseDifferential(aggregate_partials, influence_partials):
+    def differential(aggregation, influence, compiled, state):
+        aggregates, state_partials, weight_partials = aggregate_partials(aggregation, compiled, state)
+        slopes, base_partials = influence_partials(influence, compiled.base_scores, aggregates)
+        return slopes, base_partials, state_partials, weight_partials
+
+    return differential
+
+
+# differential(aggregation, influence, compiled, state) -> (slopes, base_partials, state_partials, weight_partials): the
+# derivative f_i of argument i depends on the aggregate with slope slopes[i] and on its base score with base_partials[i]
+DIFFERENTIALS = {(aggregation, influence): fuseDifferential(aggregate_partials, influence_partials)
+                 for aggregation, aggregate_partials in AGGREGATE_PARTIALS.items()
+                 for influence, influence_partials in INFLUENCE_PARTIALS.items()}
+
+
+def registerKernel(aggregation_class, influence_class, kernel):
+    """Registers kernel(aggregation, influence, compiled, state) -> derivatives for a pair of aggregation and influence classes"""
+    FUSED_KERNELS[(aggregation_class, influence_class)] = kernel
+
+
+def findKernel(aggregation, influence):
+    """The fused kernel of the exact classes of aggregation and influence, or None"""
+    return FUSED_KERNELS.get((type(aggregation), type(influence)))
+
+
+
+def registerDifferential(aggregation_class, influence_class, differential):
+    """Registers the analytic differential (see DIFFERENTIALS) for a pair of aggregation and influence classes"""
+    DIFFERENTIALS[(aggregation_class, influence_class)] = differential
+
+
+def findDifferential(aggregation, influence):
+    """The analytic differential of the exact classes of aggregation and influence, or None"""
+    return DIFFERENTIALS.get((type(aggregation), type(influence)))
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class LinearInfluence:
     def __init__(self, conservativeness) -> None:
         self.conservativeness = conservativeness
@@ -11,5 +14,12 @@ class LinearInfluence:
 
         return strength
 
+    def compute_strengths(self, weights, aggregates):
+        return weights + np.where(aggregates > 0, aggregates * (1-weights), aggregates * weights) / self.conservativeness
+
+    def lipschitz(self, weights):
+        """Lipschitz constants of compute_strengths in the aggregate, for every base score"""
+        return np.maximum(weights, 1 - weights) / self.conservativeness
+
     def __str__(self) -> str:
         return __class__.__name__ + f"({self.conservativeness})"
@@ -0,0 +1,32 @@
+import numpy as np
+
+
+class LinearMaximumInfluence:
+    def __init__(self, conservativeness) -> None:
+        self.conservativeness = conservativeness
+
+    def compute_strength(self, weight, aggregate):
+        strength = weight
+
+        scaled_aggregate = abs(aggregate) / self.conservativeness
+        h = scaled_aggregate / (1 + scaled_aggregate)
+
+        if (aggregate > 0):
+            strength += h * (1 - weight)
+        else:
+            strength -= h * weight
+
+        return strength
+
+    def compute_strengths(self, weights, aggregates):
+        scaled_aggregates = np.abs(aggregates) / self.conservativeness
+        h = scaled_aggregates / (1 + scaled_aggregates)
+
+        return weights + np.where(aggregates > 0, h * (1 - weights), -h * weights)
+
+    def lipschitz(self, weights):
+        """Lipschitz constants of compute_strengths in the aggregate, for every base score"""
+        return np.maximum(weights, 1 - weights) / self.conservativeness
+
+    def __str__(self) -> str:
+        return __class__.__name__ + f"({self.conservativeness})"
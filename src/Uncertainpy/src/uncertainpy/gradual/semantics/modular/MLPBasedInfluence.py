@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 class MLPBasedInfluence:
     def __init__(self) -> None:
@@ -7,5 +8,12 @@ class MLPBasedInfluence:
     def compute_strength(self, weight, aggregate):
         return 1/(1 + math.exp(- math.log(weight/(1-weight)) - aggregate))
 
+    def compute_strengths(self, weights, aggregates):
+        return 1/(1 + np.exp(- np.log(weights/(1-weights)) - aggregates))
+
+    def lipschitz(self, weights):
+        """Lipschitz constants of compute_strengths in the aggregate, for every base score (the slope of the logistic function)"""
+        return np.full(len(weights), 0.25)
+
     def __str__(self) -> str:
         return __class__.__name__
\ No newline at end of file
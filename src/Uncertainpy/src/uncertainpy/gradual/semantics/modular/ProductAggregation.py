@@ -1,17 +1,36 @@
+import numpy as np
+
+
 class ProductAggregation:
-    def __init__(self) -> None:
-        pass
+    # weighted: multiply the strengths of attackers and supporters by the weights of their relations
+    def __init__(self, weighted=False) -> None:
+        self.weighted = weighted
 
     def aggregate_strength(self, attackers, supporters, state):
         support_value = 1
         for a in attackers:
-            support_value *= 1-state[a]
+            attack_weight = attackers[a] if self.weighted else 1
+            support_value *= 1-state[a]*attack_weight
 
         attack_value = 1
         for s in supporters:
-            attack_value *= 1-state[s]
+            support_weight = supporters[s] if self.weighted else 1
+            attack_value *= 1-state[s]*support_weight
 
         return support_value - attack_value
 
+    def aggregate_strengths(self, compiled, state):
+        return np.subtract(*compiled.products(state, weighted=self.weighted))
+
+    def lipschitz(self, compiled):
+        """
+        Lipschitz constants of aggregate_strengths of every argument in the maximum norm of strengths in [0, 1];
+        None for weights outside [0, 1], whose factors are not bounded by 1
+        """
+        if self.weighted and (np.any(compiled.att_weights < 0) or np.any(compiled.att_weights > 1) or
+                              np.any(compiled.sup_weights < 0) or np.any(compiled.sup_weights > 1)):
+            return None
+        return compiled.incoming_weight(self.weighted)
+
     def __str__(self) -> str:
         return __class__.__name__
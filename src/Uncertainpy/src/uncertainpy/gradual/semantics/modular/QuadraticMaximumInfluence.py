@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class QuadraticMaximumInfluence:
     def __init__(self, conservativeness) -> None:
         self.conservativeness = conservativeness
@@ -15,5 +18,15 @@ class QuadraticMaximumInfluence:
 
         return strength
 
+    def compute_strengths(self, weights, aggregates):
+        scaled_aggregates = aggregates / self.conservativeness
+        h = scaled_aggregates**2 / (1 + scaled_aggregates**2)
+
+        return weights + np.where(aggregates > 0, h * (1 - weights), -h * weights)
+
+    def lipschitz(self, weights):
+        """Lipschitz constants of compute_strengths in the aggregate, for every base score (h has slope at most 3√3/8)"""
+        return 3 * np.sqrt(3) / 8 * np.maximum(weights, 1 - weights) / self.conservativeness
+
     def __str__(self) -> str:
         return __class__.__name__ + f"({self.conservativeness})"
@@ -0,0 +1,27 @@
+class SquaredSumAggregation:
+    # weighted: multiply the strengths of attackers and supporters by the weights of their relations
+    def __init__(self, weighted=True) -> None:
+        self.weighted = weighted
+
+    def aggregate_strength(self, attackers, supporters, state):
+        aggregate = 0
+        for a in attackers:
+            attack_weight = attackers[a] if self.weighted else 1
+            aggregate -= state[a]**2 * attack_weight
+
+        for s in supporters:
+            support_weight = supporters[s] if self.weighted else 1
+            aggregate += state[s]**2 * support_weight
+
+        return aggregate
+
+    def aggregate_strengths(self, compiled, state):
+        squared = state**2
+        return compiled.net_sum(squared, self.weighted)
+
+    def lipschitz(self, compiled):
+        """Lipschitz constants of aggregate_strengths of every argument in the maximum norm of strengths in [0, 1]"""
+        return 2 * compiled.incoming_weight(self.weighted)
+
+    def __str__(self) -> str:
+        return __class__.__name__
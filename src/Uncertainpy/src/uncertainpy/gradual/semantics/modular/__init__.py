@@ -1,6 +1,10 @@
 from .ProductAggregation import *
 from .SumAggregation import *
+from .SquaredProductAggregation import *
+from .SquaredSumAggregation import *
 from .QuadraticMaximumInfluence import *
 from .EulerBasedInfluence import *
 from .LinearInfluence import *
-from .MLPBasedInfluence import *
\ No newline at end of file
+from .LinearMaximumInfluence import *
+from .MLPBasedInfluence import *
+from .Kernels import FUSED_KERNELS, DIFFERENTIALS, registerKernel, findKernel, registerDifferential, findDifferential
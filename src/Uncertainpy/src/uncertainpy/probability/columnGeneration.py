@@ -0,0 +1,216 @@
+import numpy as np
+import scipy.sparse as sp
+
+from uncertainpy.propositional.truthtable import TruthTable
+
+
+def alignedTable(scope, table, union):
+    """table over scope (one axis per atom) broadcast to the axes of the atom list union"""
+    axes = sorted(range(len(scope)), key=lambda k: union.index(scope[k]))
+    shape = [2 if a in scope else 1 for a in union]
+    return np.transpose(table, axes).reshape(shape)
+
+
+def minimizeFactors(atoms, factors, constant=0.0, maxTable=2 ** 24):
+    """
+    Minimum over all worlds of constant plus the sum of factors, (scope, table) pairs whose table has one axis of
+    length 2 per atom of scope, by min-sum variable elimination (next the atom whose elimination creates the smallest
+    table). Returns (value, world) with world a dictionary atom -> bool. Raises ValueError if an intermediate table
+    would exceed maxTable entries (the knowledge base is too densely connected).
+    """
+    factors = list(factors)
+    eliminated = []
+
+    while True:
+        # atoms of the factors that contain each atom
+        unions = {}
+        for scope, _ in factors:
+            for a in scope:
+                union = unions.setdefault(a, [])
+                union += [b for b in scope if b not in union]
+        if not unions:
+            break
+
+        atom = min(unions, key=lambda a: len(unions[a]))
+        union = unions[atom]
+        if pow(2, len(union)) > maxTable:
+            raise ValueError(f"pricing needs a table over {len(union)} atoms, the knowledge base is too densely connected")
+
+        total = np.zeros([2] * len(union))
+        rest = []
+        for scope, table in factors:
+            if atom in scope:
+                total = total + alignedTable(scope, table, union)
+            else:
+                rest.append((scope, table))
+
+        axis = union.index(atom)
+        scope = union[:axis] + union[axis + 1:]
+        eliminated.append((atom, scope, total.argmin(axis=axis)))
+        factors = rest + [(scope, total.min(axis=axis))]
+
+    value = constant + sum(float(table) for _, table in factors)
+    world = {a: False for a in atoms}
+    for atom, scope, argmin in reversed(eliminated):
+        world[atom] = bool(argmin[tuple(int(world[a]) for a in scope)])
+    return value, world
+
+
+class ColumnGenerationSolver:
+    """
+    Solves the probabilistic entailment LP of ProbEntailmentEngine by column generation instead of with one variable
+    per world. The restricted master LP contains the slack variables, the normalization variable, an artificial
+    variable in the query row and the worlds generated so far; it stays loaded in the backend, which only receives new
+    world columns and query rows, so warm-started backends continue from the previous basis. The reduced cost of a world
+    is a sum of functions of the atoms of single conditionals, tabulated with TruthTables; the world minimizing it (see
+    minimizeFactors) is added while it is below -tolerance (which has to exceed the optimality tolerance of the LP
+    solver), otherwise the restricted optimum is the optimum of the full LP. Memory is proportional to the worlds
+    generated.
+    The artificial variable satisfies the query row on its own at cost 2, more than any objective value P(b|a) or
+    -P(b|a) can reach, so it is only used if the knowledge base and the query condition are inconsistent, in which case
+    the bounds are None.
+    """
+
+    def __init__(self, backend, atoms, condsp, condsl, condsu, tolerance=1e-7, maxIterations=10000):
+        self.backend = backend
+        self.atoms = list(atoms)
+        self.tolerance = tolerance
+        self.maxIterations = maxIterations
+
+        # conditional rows (point, lower, upper) with their probability and the coefficient of their slack variable
+        self.rows = ([(cond, cond.l, 0) for cond in condsp] + [(cond, cond.l, -1) for cond in condsl] +
+                     [(cond, cond.u, 1) for cond in condsu])
+
+        self.worlds = []
+        self.keys = set()
+        # truth tables over the atoms of single conditionals and queries, in which formula masks stay cached
+        self.tables = {}
+
+        # columns: slack variables, normalization variable t, artificial variable, then the generated worlds
+        slacks = [(r, sign) for r, (_, _, sign) in enumerate(self.rows) if sign != 0]
+        self.noFixed = len(slacks) + 2
+        A = sp.coo_matrix(([sign for _, sign in slacks] + [-1.0],
+                           ([r for r, _ in slacks] + [len(self.rows)], list(range(len(slacks) + 1)))),
+                          shape=(len(self.rows) + 1, self.noFixed))
+        self.backend.load(A.tocsr(), np.zeros(len(self.rows) + 1))
+
+        # query condition and conclusion of the generated worlds for the current query
+        self.query = None
+        self.condition = []
+        self.verified = []
+
+    def worldKey(self, world):
+        return tuple(world[a] for a in self.atoms)
+
+    def kbColumn(self, world):
+        """Coefficients of a world in the conditional rows and the fractional normalization row"""
+        column = []
+        for cond, p, _ in self.rows:
+            if cond.a is None or cond.a.satisfied_by(world):
+                column.append((1.0 if cond.b.satisfied_by(world) else 0.0) - p)
+            else:
+                column.append(0.0)
+        column.append(1.0)
+        return column
+
+    def queryEntries(self, world):
+        """Whether world satisfies the condition of the current query and whether it verifies the query"""
+        condition = self.query.a is None or self.query.a.satisfied_by(world)
+        return float(condition), float(condition and self.query.b.satisfied_by(world))
+
+    def setQuery(self, query):
+        """Replaces the query row of the master LP by the normalization of the condition of query"""
+        self.query = query
+        entries = [self.queryEntries(world) for world in self.worlds]
+        self.condition = [c for c, _ in entries]
+        self.verified = [v for _, v in entries]
+
+        row = np.zeros(self.noFixed + len(self.worlds))
+        row[self.noFixed - 1] = 1
+        row[self.noFixed:] = self.condition
+        self.backend.setQuery(sp.csr_matrix(row), np.ones(1))
+
+    def addWorld(self, world):
+        """Adds world as column of the master LP; False if it already is one"""
+        key = self.worldKey(world)
+        if key in self.keys:
+            return False
+
+        condition, verified = self.queryEntries(world)
+        self.keys.add(key)
+        self.worlds.append(world)
+        self.condition.append(condition)
+        self.verified.append(verified)
+        self.backend.addColumns(sp.csc_matrix(np.array(self.kbColumn(world) + [condition]).reshape(-1, 1)))
+        return True
+
+    def literalTable(self, literals):
+        """(scope, table) of the indicator of a conjunction of (formula, polarity) literals, one axis per scope atom"""
+        scope = set()
+        for f, _ in literals:
+            fatoms = f.atoms()
+            scope |= set(self.atoms) if fatoms is None else fatoms
+        scope = tuple(a for a in self.atoms if a in scope)
+
+        if scope not in self.tables:
+            self.tables[scope] = TruthTable(scope)
+        table = self.tables[scope]
+
+        mask = np.ones(table.noWorlds, dtype=bool)
+        for f, polarity in literals:
+            mask &= table.mask(f) if polarity else ~table.mask(f)
+        # world i of the table has atom k as bit k, so the last axis is the first atom
+        return list(reversed(scope)), mask.reshape([2] * len(scope)).astype(float)
+
+    def pricingFactors(self, y, query, sign):
+        """Factors and constant of the reduced cost of a world for the dual values y and objective sign * P(b|a)"""
+        terms = []
+        for (cond, p, _), yr in zip(self.rows, y):
+            condition = [] if cond.a is None else [(cond.a, True)]
+            terms.append((-yr * (1 - p), condition + [(cond.b, True)]))
+            terms.append((yr * p, condition + [(cond.b, False)]))
+
+        condition = [] if query.a is None else [(query.a, True)]
+        terms.append((sign - y[-1], condition + [(query.b, True)]))
+        terms.append((-y[-1], condition + [(query.b, False)]))
+
+        factors = []
+        for weight, literals in terms:
+            if weight != 0:
+                scope, table = self.literalTable(literals)
+                factors.append((scope, weight * table))
+        return factors, -y[len(self.rows)]
+
+    def optimize(self, sign):
+        """Column generation loop for the current query; returns the optimal value of sign * P(b|a) (2 if inconsistent)"""
+        for _ in range(self.maxIterations):
+            c = np.zeros(self.noFixed + len(self.worlds))
+            c[self.noFixed - 1] = 2
+            c[self.noFixed:] = sign * np.array(self.verified)
+
+            value = self.backend.optimize(c)
+            if value is None:
+                return None
+
+            factors, constant = self.pricingFactors(self.backend.duals(), self.query, sign)
+            reducedCost, world = minimizeFactors(self.atoms, factors, constant)
+            if reducedCost >= -self.tolerance:
+                return value
+
+            if not self.addWorld(world):
+                raise RuntimeError(f"pricing returned a world that already is a column (reduced cost {reducedCost}); "
+                                   f"tolerance {self.tolerance} is probably below the optimality tolerance of the LP solver")
+
+        raise RuntimeError(f"column generation did not converge within {self.maxIterations} iterations")
+
+    def bounds(self, query):
+        """Lower and upper bound of P(b|a) for Conditional query, or (None, None) if the knowledge base is inconsistent"""
+        self.setQuery(query)
+        lower = self.optimize(1)
+        if lower is None or lower > 1.5:
+            return None, None
+
+        upper = self.optimize(-1)
+        if upper is None:
+            return None, None
+        return lower, -upper
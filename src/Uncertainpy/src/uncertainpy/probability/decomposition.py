@@ -0,0 +1,56 @@
+class KBComponent:
+    """Atoms and conditionals of one connected component of a knowledge base"""
+
+    def __init__(self, atoms, conds):
+        self.atoms = atoms
+        self.conds = conds
+
+    def __repr__(self):
+        return f"KBComponent(atoms={self.atoms}, conditionals={len(self.conds)})"
+
+
+def kbComponents(kb, atoms):
+    """
+    Splits the knowledge base kb over the sequence atoms into the connected components of the graph in which two
+    atoms are connected if they occur in the same conditional. Conditionals without atoms form a component without
+    atoms, conditionals whose atoms are unknown (see Formula.atoms) connect all atoms. Atoms keep their order.
+    """
+    parent = {a: a for a in atoms}
+
+    def find(a):
+        while parent[a] is not a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    def union(group):
+        roots = [find(a) for a in group]
+        for root in roots[1:]:
+            parent[root] = roots[0]
+
+    condAtoms = []
+    for cond in kb:
+        catoms = cond.atoms()
+        if catoms is None:
+            catoms = set(atoms)
+        for a in catoms:
+            if a not in parent:
+                raise KeyError(f"{a} occurs in {cond} but is not one of the atoms")
+        union(list(catoms))
+        condAtoms.append(catoms)
+
+    components = {}
+    for a in atoms:
+        components.setdefault(find(a), KBComponent([], [])).atoms.append(a)
+
+    unconnected = KBComponent([], [])
+    for cond, catoms in zip(kb, condAtoms):
+        if catoms:
+            components[find(next(iter(catoms)))].conds.append(cond)
+        else:
+            unconnected.conds.append(cond)
+
+    result = list(components.values())
+    if unconnected.conds:
+        result.append(unconnected)
+    return result
@@ -1,3 +1,4 @@
+import numpy as np
 from uncertainpy.propositional.semantics import BooleanInterpretation
 from uncertainpy.propositional.syntax import Formula
 from uncertainpy.propositional.syntax import Conditional
@@ -15,25 +16,19 @@ class ProbabilityDist:
         return str
     
     def computeProb(self, f):
+        """Probability of formula f or conditional probability of conditional f, as masked sums over the worlds"""
+        probs = np.asarray(self.probs, dtype=float)
         
-        prob = 0
         if isinstance(f, Formula):
-            for i in range(len(self.probs)):
-                if self.interp.satisfies(i, f):
-                    prob += self.probs[i]
-            return prob
+            return float(probs @ self.interp.models(f))
         
         if isinstance(f, Conditional):
-            num = 0
-            denomin = 0
-            for i in range(len(self.probs)):
-                if (f.a==None or self.interp.satisfies(i, f.a)):
-                    denomin += self.probs[i]
-                    if self.interp.satisfies(i, f.b):
-                        num += self.probs[i]
+            table = self.interp.truthTable()
+            condition, verified = table.conditionalMasks(f)
+            denomin = float(probs @ condition)
             
             if denomin>0:
-                return num/denomin
+                return float(probs @ verified)/denomin
             else:
                 return 'Undefined (condition has probability 0)'  
             
@@ -0,0 +1,221 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import linprog
+
+
+class LPBackend:
+    """
+    Interface of the LP solvers used by ProbEntailmentEngine. The problem has non-negative variables and equality
+    constraints only: load sets the constraints A x = b of the knowledge base once, setQuery replaces the query rows
+    A_query x = b_query of the previous query, addColumns appends variables, and optimize minimizes or maximizes c x
+    subject to both.
+    """
+
+    # whether optimize starts from the basis of the previous solve
+    warmStart = False
+
+    def load(self, A, b):
+        raise NotImplementedError
+
+    def setQuery(self, A_query, b_query):
+        raise NotImplementedError
+
+    def addColumns(self, A):
+        """Appends non-negative variables whose coefficients in the knowledge base rows and then the query rows are the columns of A"""
+        raise NotImplementedError
+
+    def optimize(self, c, maximize=False):
+        """Optimal objective value, or None if the problem is infeasible or unbounded"""
+        raise NotImplementedError
+
+    def duals(self):
+        """
+        Dual values y of the rows (knowledge base rows, then query rows) at the last optimum of a minimization, so that
+        the reduced cost of a column A_j with objective coefficient c_j is c_j - y A_j
+        """
+        raise NotImplementedError
+
+
+class ScipyBackend(LPBackend):
+    """
+    HiGHS through scipy.optimize.linprog; always available, but linprog keeps no model between calls, so SciPy solves
+    every query cold, from scratch. Only the assembled constraint matrix is kept until the query rows or the
+    columns change.
+    """
+
+    def __init__(self, method="highs"):
+        self.method = method
+        self.A = None
+        self.b = None
+        self.A_query = None
+        self.b_query = None
+        self.A_eq = None
+        self.b_eq = None
+        self.result = None
+
+    def load(self, A, b):
+        self.A = sp.csr_matrix(A, dtype=np.float64)
+        self.b = np.asarray(b, dtype=np.float64)
+        self.A_query = sp.csr_matrix((0, self.A.shape[1]))
+        self.b_query = np.zeros(0)
+        self.A_eq = None
+
+    def setQuery(self, A_query, b_query):
+        self.A_query = sp.csr_matrix(A_query, dtype=np.float64)
+        self.b_query = np.asarray(b_query, dtype=np.float64)
+        self.A_eq = None
+
+    def addColumns(self, A):
+        A = sp.csr_matrix(A, dtype=np.float64)
+        self.A = sp.hstack((self.A, A[:self.A.shape[0]])).tocsr()
+        self.A_query = sp.hstack((self.A_query, A[self.A.shape[0]:])).tocsr()
+        self.A_eq = None
+
+    def optimize(self, c, maximize=False):
+        c = np.asarray(c, dtype=np.float64)
+        if self.A_eq is None:
+            self.A_eq = sp.vstack((self.A, self.A_query)).tocsr()
+            self.b_eq = np.concatenate((self.b, self.b_query))
+
+        result = linprog(-c if maximize else c, A_eq=self.A_eq, b_eq=self.b_eq, bounds=(0, None), method=self.method)
+        self.result = result
+        if result.status != 0:
+            return None
+        return -result.fun if maximize else result.fun
+
+    def duals(self):
+        return self.result.eqlin.marginals
+
+
+class HighspyBackend(LPBackend):
+    """
+    HiGHS through its own Python interface highspy (optional dependency). The model is kept between solves and only
+    the query rows, the objective and added columns change, so HiGHS starts every solve from the previous basis.
+    """
+
+    warmStart = True
+
+    def __init__(self):
+        import highspy
+
+        self.highspy = highspy
+        self.highs = None
+        self.noRows = 0
+        self.noQueryRows = 0
+
+    def load(self, A, b):
+        A = sp.csr_matrix(A, dtype=np.float64)
+        b = np.asarray(b, dtype=np.float64)
+
+        self.highs = self.highspy.Highs()
+        self.highs.setOptionValue("output_flag", False)
+        self.highs.addVars(A.shape[1], np.zeros(A.shape[1]), np.full(A.shape[1], self.highspy.kHighsInf))
+        self.addRows(A, b)
+        self.noRows = A.shape[0]
+        self.noQueryRows = 0
+
+    def addRows(self, A, b):
+        if A.shape[0] > 0:
+            self.highs.addRows(A.shape[0], b, b, A.nnz, A.indptr[:-1].astype(np.int32), A.indices.astype(np.int32), A.data)
+
+    def setQuery(self, A_query, b_query):
+        A_query = sp.csr_matrix(A_query, dtype=np.float64)
+        if self.noQueryRows > 0:
+            self.highs.deleteRows(self.noQueryRows, np.arange(self.noRows, self.noRows + self.noQueryRows, dtype=np.int32))
+
+        self.addRows(A_query, np.asarray(b_query, dtype=np.float64))
+        self.noQueryRows = A_query.shape[0]
+
+    def addColumns(self, A):
+        A = sp.csc_matrix(A, dtype=np.float64)
+        self.highs.addCols(A.shape[1], np.zeros(A.shape[1]), np.zeros(A.shape[1]), np.full(A.shape[1], self.highspy.kHighsInf),
+                           A.nnz, A.indptr[:-1].astype(np.int32), A.indices.astype(np.int32), A.data)
+
+    def optimize(self, c, maximize=False):
+        c = np.asarray(c, dtype=np.float64)
+        self.highs.changeColsCost(len(c), np.arange(len(c), dtype=np.int32), c)
+        self.highs.changeObjectiveSense(self.highspy.ObjSense.kMaximize if maximize else self.highspy.ObjSense.kMinimize)
+        self.highs.run()
+
+        if self.highs.getModelStatus() != self.highspy.HighsModelStatus.kOptimal:
+            return None
+        return self.highs.getInfo().objective_function_value
+
+    def duals(self):
+        return np.array(self.highs.getSolution().row_dual)
+
+
+class GurobiBackend(LPBackend):
+    """
+    Gurobi through gurobipy (optional dependency, needs a license). The model is kept between solves and only the
+    query constraint, the objective and added columns change, so Gurobi starts every solve from the previous basis.
+    """
+
+    warmStart = True
+
+    def __init__(self):
+        import gurobipy
+
+        self.gp = gurobipy
+        self.model = None
+        self.x = None
+        self.kb = None
+        self.query = None
+
+    def load(self, A, b):
+        A = sp.csr_matrix(A, dtype=np.float64)
+        self.model = self.gp.Model("Probabilistic Entailment")
+        self.x = self.model.addMVar(shape=A.shape[1], lb=0.0, name="Vars")  # lb=0.0 for non-negativity
+        self.kb = None
+        if A.shape[0] > 0:
+            self.kb = self.model.addConstr(A @ self.x == np.asarray(b, dtype=np.float64), name="Knowledge base")
+        self.query = None
+
+    def setQuery(self, A_query, b_query):
+        if self.query is not None:
+            self.model.remove(self.query)
+
+        self.query = self.model.addConstr(sp.csr_matrix(A_query, dtype=np.float64) @ self.x == np.asarray(b_query, dtype=np.float64),
+                                          name="Query normalization")
+
+    def addColumns(self, A):
+        A = sp.csc_matrix(A, dtype=np.float64)
+        constrs = [c for constr in (self.kb, self.query) if constr is not None for c in constr.tolist()]
+        variables = self.x.tolist()
+        for j in range(A.shape[1]):
+            column = slice(A.indptr[j], A.indptr[j + 1])
+            variables.append(self.model.addVar(lb=0.0, column=self.gp.Column(A.data[column].tolist(),
+                                                                             [constrs[i] for i in A.indices[column]])))
+        self.model.update()
+        self.x = self.gp.MVar.fromlist(variables)
+
+    def optimize(self, c, maximize=False):
+        GRB = self.gp.GRB
+        self.model.setObjective(np.asarray(c, dtype=np.float64) @ self.x, GRB.MAXIMIZE if maximize else GRB.MINIMIZE)
+        self.model.optimize()
+        if self.model.status != GRB.OPTIMAL:
+            return None
+        return self.model.objVal
+
+    def duals(self):
+        return np.concatenate([np.atleast_1d(constr.Pi) for constr in (self.kb, self.query) if constr is not None] + [np.zeros(0)])
+
+
+def createBackend(backend=None):
+    """
+    LPBackend for backend: an LPBackend is returned as is, "scipy", "highspy" and "gurobi" select a backend, and
+    "highs" or None select HiGHS through highspy if it is installed (warm-started) and through SciPy otherwise
+    """
+    if isinstance(backend, LPBackend):
+        return backend
+
+    if backend is None or backend == "highs":
+        try:
+            return HighspyBackend()
+        except ImportError:
+            return ScipyBackend()
+
+    backends = {"scipy": ScipyBackend, "highspy": HighspyBackend, "gurobi": GurobiBackend}
+    if backend not in backends:
+        raise ValueError(f"Unknown LP backend '{backend}', expected one of {['highs'] + list(backends)}")
+    return backends[backend]()
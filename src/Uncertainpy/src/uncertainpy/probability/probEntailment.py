@@ -1,19 +1,35 @@
+import copy
 import scipy.sparse as sp
 import numpy as np
-import gurobipy as gp
 
-from gurobipy import GRB
+from uncertainpy.propositional.semantics import BooleanInterpretation
+from uncertainpy.propositional.syntax import Conditional, Conjunction
+from uncertainpy.probability.columnGeneration import ColumnGenerationSolver
+from uncertainpy.probability.decomposition import kbComponents
 from uncertainpy.probability.distribution import ProbabilityDist
+from uncertainpy.probability.lpBackend import createBackend
 
 class ProbEntailmentEngine:
 
-    def __init__(self):
-        self.model = None
+    def __init__(self, backend=None, decompose=False, columnGeneration=False):
+        """
+        backend selects the LP solver (see createBackend): an LPBackend, "highs" (default), "scipy", "highspy"
+        or "gurobi". With decompose, the knowledge base is split into components that share no atoms
+        (see kbComponents) and every query is answered by an LP over the worlds of the components of its atoms only.
+        With columnGeneration, worlds are not enumerated but generated as needed (see ColumnGenerationSolver).
+        """
+        self.backend = createBackend(backend)
+        self.decompose = decompose
+        self.columnGeneration = columnGeneration
+        self.solver = None
         self.ints = None
-        self.x = None
         self.noVars = 0
         self.noWorlds = 0
 
+        self.components = None
+        self.engines = {}
+        self.consistent = None
+
     def createConstraints(self, kb, ints):
         """
         Takes a knowledge base kb and a BooleanInterpretation object ints
@@ -21,7 +37,13 @@ class ProbEntailmentEngine:
         """
 
         self.ints = ints
-        self.model = gp.Model("Probabilistic Entailment")
+
+        if self.decompose:
+            # LPs are built per query, over the components it needs
+            self.components = kbComponents(kb, ints.atoms)
+            self.engines = {}
+            self.consistent = None
+            return
 
         # partition conditionals based on their nature
         condsl = []  # only lower bound
@@ -39,62 +61,57 @@ class ProbEntailmentEngine:
                 condsl.append(cond)
                 condsu.append(cond)
 
+        if self.columnGeneration:
+            self.solver = ColumnGenerationSolver(self.backend, ints.atoms, condsp, condsl, condsu)
+            return
+
         # create non-negative variables (probabilities, slack variables, auxiliary variable for conditional queries)
         self.noWorlds = ints.noWorlds()
         self.noVars = self.noWorlds + len(condsl) + len(condsu) + 1
-        self.x = self.model.addMVar(shape=self.noVars, lb=0.0, name="Vars")  # lb=0.0 for non-negativity
-
-        # create conditional constraints
-        A = sp.dok_matrix((len(condsp) + len(condsl) + len(condsu), self.noVars), dtype=np.float32)
-
-        # create point probability constraints
-        rows = 0
-        for cond in condsp:
-            # print(f"Create point constraint for {cond}")
-            for i in range(self.noWorlds):
-                if cond.a is None or ints.satisfies(i, cond.a):
-                    if ints.satisfies(i, cond.b):
-                        A[rows, i] = 1 - cond.l
-                    else:
-                        A[rows, i] = -cond.l
-            rows += 1
-
-        # create lower constraints
-        slack_i = self.noWorlds
-        for cond in condsl:
-            # print(f"Create lower constraint for {cond}")
-            for i in range(self.noWorlds):
-                if cond.a is None or ints.satisfies(i, cond.a):
-                    if ints.satisfies(i, cond.b):
-                        A[rows, i] = 1 - cond.l
-                    else:
-                        A[rows, i] = -cond.l
-            A[rows, slack_i] = -1
-            rows += 1
-            slack_i += 1
-
-        # create upper constraints
-        for cond in condsu:
-            # print(f"Create upper constraint for {cond}")
-            for i in range(self.noWorlds):
-                if cond.a is None or ints.satisfies(i, cond.a):
-                    if ints.satisfies(i, cond.b):
-                        A[rows, i] = 1 - cond.u
-                    else:
-                        A[rows, i] = -cond.u
-            A[rows, slack_i] = 1
-            rows += 1
-            slack_i += 1
-
-        if rows > 0:
-            rhs = np.zeros(rows)
-            self.model.addConstr(A @ self.x == rhs, name="Conditionals")
+
+        # create conditional constraints: point, lower and upper constraints, the latter two with a slack variable each
+        conds = condsp + condsl + condsu
+        probs = [cond.l for cond in condsp] + [cond.l for cond in condsl] + [cond.u for cond in condsu]
+        rows, cols, data = self.conditionalEntries(conds, probs)
+
+        slack_rows = np.arange(len(condsp), len(conds))
+        slack_cols = self.noWorlds + np.arange(len(condsl) + len(condsu))
+        slack_data = np.concatenate((-np.ones(len(condsl)), np.ones(len(condsu))))
+
+        A = sp.coo_matrix((np.concatenate((data, slack_data)),
+                           (np.concatenate((rows, slack_rows)), np.concatenate((cols, slack_cols)))),
+                          shape=(len(conds), self.noVars), dtype=np.float64).tocsr()
+        A.eliminate_zeros()
 
         # create fractional normalization constraint
-        A_norm = np.ones(self.noVars, dtype=np.float32)
+        A_norm = np.ones(self.noVars, dtype=np.float64)
         A_norm[-1] = -1
         A_norm[self.noWorlds:-1] = 0
-        self.model.addConstr(A_norm @ self.x == 0, name="Fractional normalization")
+
+        # the knowledge base is loaded once, queries only replace their own rows
+        self.backend.load(sp.vstack((A, sp.csr_matrix(A_norm))).tocsr(), np.zeros(len(conds) + 1))
+
+    def conditionalEntries(self, conds, probs):
+        """
+        COO entries (rows, cols, data) of the constraints P(b|a) = p for the conditionals conds with probabilities probs:
+        row r has 1 - p for every world that satisfies a and b of conds[r] and -p for every world that satisfies only a
+        """
+        table = self.ints.truthTable()
+        rows, cols, data = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)], [np.zeros(0)]
+        for r, (cond, p) in enumerate(zip(conds, probs)):
+            condition, verified = table.conditionalMasks(cond)
+            worlds = np.flatnonzero(condition)
+            rows.append(np.full(len(worlds), r, dtype=np.int64))
+            cols.append(worlds)
+            data.append(verified[worlds] - float(p))
+
+        return np.concatenate(rows), np.concatenate(cols), np.concatenate(data)
+
+    def worldRow(self, mask):
+        """Sparse row over all variables with 1 for the worlds in the boolean vector mask"""
+        worlds = np.flatnonzero(mask)
+        return sp.csr_matrix((np.ones(len(worlds)), (np.zeros(len(worlds), dtype=np.int64), worlds)),
+                             shape=(1, self.noVars), dtype=np.float64)
 
     def computeBounds(self, query):
         """
@@ -102,34 +119,108 @@ class ProbEntailmentEngine:
         lower and upper bounds computed by solving the probabilistic entailment problem.
         """
 
-        # create query normalization constraint
-        A_norm = sp.dok_matrix((1, self.noVars), dtype=np.float32)
-        for i in range(self.noWorlds):
-            if query.a is None or self.ints.satisfies(i, query.a):
-                A_norm[0, i] = 1
-        self.model.addConstr(A_norm @ self.x == 1, name="Query normalization")
+        if self.decompose:
+            return self.computeComponentBounds(query)
+
+        if self.columnGeneration:
+            query.l, query.u = self.solver.bounds(query)
+            return query
 
+        condition, verified = self.ints.truthTable().conditionalMasks(query)
+
+        # replace the query normalization constraint of the previous query
+        self.backend.setQuery(self.worldRow(condition), np.ones(1))
+        return self.optimizeQuery(query, verified)
+
+    def optimizeQuery(self, query, verified):
+        """Sets query.l and query.u for the query whose normalization constraint is loaded, with verified its worlds"""
         # create query objective
-        A_obj = sp.dok_matrix((1, self.noVars), dtype=np.float32)
-        for i in range(self.noWorlds):
-            if (query.a is None or self.ints.satisfies(i, query.a)) and self.ints.satisfies(i, query.b):
-                A_obj[0, i] = 1
-
-        # compute lower bound
-        self.model.setObjective(A_obj @ self.x, GRB.MINIMIZE)
-        self.model.optimize()
-        if self.model.status == GRB.OPTIMAL:
-            query.l = self.model.objVal
-        else:
-            query.l = None
+        A_obj = np.zeros(self.noVars)
+        A_obj[:self.noWorlds] = verified
 
-        # compute upper bound
-        self.model.setObjective(A_obj @ self.x, GRB.MAXIMIZE)
-        self.model.optimize()
-        if self.model.status == GRB.OPTIMAL:
-            query.u = self.model.objVal
-        else:
-            query.u = None
+        # compute lower and upper bound (None if the condition of the query is impossible)
+        query.l = self.backend.optimize(A_obj, maximize=False)
+        query.u = self.backend.optimize(A_obj, maximize=True)
 
         # print(f"kb |= {query}")
-        return query
\ No newline at end of file
+        return query
+
+    def computeBoundsBatch(self, queries):
+        """
+        Computes bounds for a list of Conditional queries as computeBounds does and returns them. Queries with the
+        same condition share one constraint matrix: its normalization row is set once and only the objective
+        changes between them (warm-started if the backend supports it)
+        """
+        queries = list(queries)
+        if self.decompose:
+            groups = {}
+            for query in queries:
+                engine = self.queryEngine(query)
+                if engine is None:
+                    query.l = None
+                    query.u = None
+                else:
+                    groups.setdefault(id(engine), (engine, []))[1].append(query)
+            for engine, group in groups.values():
+                engine.computeBoundsBatch(group)
+            return queries
+
+        if self.columnGeneration:
+            return [self.computeBounds(query) for query in queries]
+
+        table = self.ints.truthTable()
+        groups = {}
+        for query in queries:
+            condition, verified = table.conditionalMasks(query)
+            groups.setdefault(np.packbits(condition).tobytes(), (condition, []))[1].append((query, verified))
+
+        for condition, group in groups.values():
+            self.backend.setQuery(self.worldRow(condition), np.ones(1))
+            for query, verified in group:
+                self.optimizeQuery(query, verified)
+        return queries
+
+    def componentEngine(self, indices):
+        """ProbEntailmentEngine over the atoms and conditionals of the components with the given indices (cached)"""
+        key = tuple(sorted(indices))
+        if key not in self.engines:
+            atoms = set()
+            conds = []
+            for i in key:
+                atoms.update(self.components[i].atoms)
+                conds += self.components[i].conds
+
+            engine = ProbEntailmentEngine(copy.copy(self.backend), columnGeneration=self.columnGeneration)
+            engine.createConstraints(conds, BooleanInterpretation([a for a in self.ints.atoms if a in atoms]))
+            self.engines[key] = engine
+
+        return self.engines[key]
+
+    def queryEngine(self, query):
+        """
+        Component engine that answers query for decompose, or None if the knowledge base is inconsistent: other
+        components do not restrict the query as long as the knowledge base is consistent, which is checked once per
+        component
+        """
+        if self.consistent is None:
+            tautology = Conjunction()
+            self.consistent = all(self.componentEngine([i]).computeBounds(Conditional(tautology, None, None, None)).l is not None
+                                  for i, component in enumerate(self.components) if component.conds)
+
+        if not self.consistent:
+            return None
+
+        qatoms = query.atoms()
+        indices = [i for i, component in enumerate(self.components)
+                   if qatoms is None or any(a in qatoms for a in component.atoms)]
+        return self.componentEngine(indices)
+
+    def computeComponentBounds(self, query):
+        """computeBounds for decompose, on the components the query needs (see queryEngine)"""
+        engine = self.queryEngine(query)
+        if engine is None:
+            query.l = None
+            query.u = None
+            return query
+
+        return engine.computeBounds(query)
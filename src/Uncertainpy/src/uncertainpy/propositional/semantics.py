@@ -1,4 +1,5 @@
 from uncertainpy.propositional.syntax import Formula
+from uncertainpy.propositional.truthtable import TruthTable
   
 
 class BooleanInterpretation:
@@ -8,11 +9,22 @@ class BooleanInterpretation:
     def __init__(self, atoms):
         """Expects a sequence of atoms that is to be interpreted"""
         self.atoms = atoms
+        self.tables = {}  # packed -> TruthTable
         
     def satisfies(self, i: int, f: Formula):
         """Tests if interpretation i represented by an integer satisfies formula f"""
         truthmap = self.int_to_map(i)
         return f.satisfied_by(truthmap)
+    
+    def truthTable(self, packed=False):
+        """TruthTable over all interpretations, created on first use per form (packed or not); formulas compiled with it stay cached"""
+        if packed not in self.tables:
+            self.tables[packed] = TruthTable(self.atoms, packed)
+        return self.tables[packed]
+    
+    def models(self, f: Formula):
+        """Boolean vector whose entry i tells if interpretation i satisfies formula f, evaluated for all interpretations at once"""
+        return self.truthTable().mask(f)
         
     def noWorlds(self):
         return pow(2,len(self.atoms))
@@ -22,8 +34,7 @@ class BooleanInterpretation:
         """Translates integer representation of interpretation to mapping representation"""
         truthmap = {}
         for a in self.atoms:
-            v = i%2
-            truthmap[a] = (v==1)
-            i = (i-v)/2
+            truthmap[a] = (i%2 == 1)
+            i = i//2
             
         return truthmap
\ No newline at end of file
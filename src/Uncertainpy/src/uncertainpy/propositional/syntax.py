@@ -5,6 +5,14 @@ class Formula:
         """tests if formula is satisfied by interpretation"""
         return None
     
+    def compile(self, table):
+        """vector of the interpretations of TruthTable table that satisfy the formula (see TruthTable.compile)"""
+        return table.enumerate(self)
+    
+    def atoms(self):
+        """set of atoms the formula depends on, None if unknown"""
+        return None
+    
     def negate(self):
         return Negation(self)
     
@@ -13,6 +21,17 @@ class Formula:
         pass
     
     
+def unionOfAtoms(formulas):
+    """set of atoms of all formulas, None if the atoms of one of them are unknown"""
+    atoms = set()
+    for f in formulas:
+        fatoms = f.atoms()
+        if fatoms is None:
+            return None
+        atoms |= fatoms
+    return atoms
+
+
 class Atom(Formula):
     """Super class for all atomic formulas, including BooleanAtoms and Variables"""
     pass   
@@ -29,6 +48,12 @@ class BooleanAtom(Atom):
         """tests if formula is satisfied by interpretation"""
         return interpretation[self]
     
+    def compile(self, table):
+        return table.atom(self)
+    
+    def atoms(self):
+        return {self}
+    
         
     def __str__(self):
         return self.name
@@ -50,6 +75,12 @@ class Negation(Formula):
     def satisfied_by(self, interpretation):
         """tests if formula is satisfied by interpretation"""
         return not self.f.satisfied_by(interpretation)
+    
+    def compile(self, table):
+        return ~table.compile(self.f)
+    
+    def atoms(self):
+        return self.f.atoms()
         
     def __str__(self):
         return "!"+self.f.__str__()
@@ -66,6 +97,15 @@ class Conjunction(Formula):
             if not c.satisfied_by(interpretation):
                 return False
         return True 
+    
+    def compile(self, table):
+        vector = table.constant(True)
+        for c in self.conjuncts:
+            vector = vector & table.compile(c)
+        return vector
+    
+    def atoms(self):
+        return unionOfAtoms(self.conjuncts)
         
         
     def __str__(self):
@@ -86,6 +126,15 @@ class Disjunction(Formula):
             if d.satisfied_by(interpretation):
                 return True
         return False 
+    
+    def compile(self, table):
+        vector = table.constant(False)
+        for d in self.disjuncts:
+            vector = vector | table.compile(d)
+        return vector
+    
+    def atoms(self):
+        return unionOfAtoms(self.disjuncts)
         
     def __str__(self):
         str = "("
@@ -110,6 +159,10 @@ class Conditional:
         """tests if conditional is falsified (a is satisfied, but b is falsified)"""
         return self.a.satisfied_by(interpretation) and not self.b.satisfied_by(interpretation)
     
+    def atoms(self):
+        """set of atoms of b and a (if given), None if unknown"""
+        return unionOfAtoms([self.b] if self.a is None else [self.b, self.a])
+    
     def __str__(self):
         if self.a == None:
             str = f"({self.b})["
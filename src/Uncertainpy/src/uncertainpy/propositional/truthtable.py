@@ -0,0 +1,67 @@
+import numpy as np
+
+
+class TruthTable:
+    """Evaluates formulas over all 2^n interpretations of a sequence of n atoms at once. Interpretation i makes
+    atom k true iff bit k of i is set (as BooleanInterpretation.int_to_map). A formula is compiled into a vector
+    with one entry per interpretation, NumPy booleans or, if packed, bits packed into uint8 (8 times smaller).
+    The vectors of all formulas and subformulas are cached, so every formula is compiled only once."""
+
+    def __init__(self, atoms, packed=False):
+        self.atoms = list(atoms)
+        self.index = {a: k for k, a in enumerate(self.atoms)}
+        self.noWorlds = pow(2, len(self.atoms))
+        self.packed = packed
+        self.cache = {}
+
+    def pack(self, mask):
+        """Converts a boolean vector into the representation of this table"""
+        if self.packed:
+            return np.packbits(mask, bitorder="little")
+        return mask
+
+    def constant(self, value):
+        """Vector of the formula that is always value"""
+        return self.pack(np.full(self.noWorlds, value, dtype=bool))
+
+    def atom(self, a):
+        """Vector of atom a: blocks of 2^k false followed by 2^k true entries for the k-th atom"""
+        if a not in self.index:
+            raise KeyError(f"{a} is not an atom of this truth table")
+
+        period = pow(2, self.index[a])
+        block = np.repeat(np.array([False, True]), period)
+        return self.pack(np.tile(block, self.noWorlds // (2 * period)))
+
+    def enumerate(self, f):
+        """Vector of f computed world by world with f.satisfied_by, for formulas without a compiled form"""
+        interpretation = lambda i: {a: (i >> k) & 1 == 1 for k, a in enumerate(self.atoms)}
+        mask = np.fromiter((f.satisfied_by(interpretation(i)) for i in range(self.noWorlds)), dtype=bool, count=self.noWorlds)
+        return self.pack(mask)
+
+    def compile(self, f):
+        """Vector of the interpretations that satisfy f in the representation of this table (cached)"""
+        vector = self.cache.get(f)
+        if vector is None:
+            vector = f.compile(self)
+            self.cache[f] = vector
+        return vector
+
+    def mask(self, f):
+        """Boolean vector whose entry i tells if interpretation i satisfies f"""
+        vector = self.compile(f)
+        if self.packed:
+            return np.unpackbits(vector, count=self.noWorlds, bitorder="little").view(bool)
+        return vector
+
+    def conditionalMasks(self, cond):
+        """Boolean vectors of the interpretations that satisfy the condition of cond (all if it has none) and of those
+        that verify cond (satisfy both its condition and its conclusion)"""
+        if cond.a is None:
+            condition = np.ones(self.noWorlds, dtype=bool)
+        else:
+            condition = self.mask(cond.a)
+        return condition, condition & self.mask(cond.b)
+
+    def clear(self):
+        self.cache = {}
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the library is not installed, it is imported from the src directory next to the tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.algorithms import computeTopOrder
+
+
+NAMED = [grad.semantics.QuadraticEnergyModel, grad.semantics.ContinuousDFQuADModel, grad.semantics.SquaredEnergyModel,
+         grad.semantics.ContinuousEulerBasedModel, grad.semantics.ContinuousSquaredDFQuADModel]
+
+
+def randomBAG(n, m, seed, acyclic=True):
+    """n arguments and up to m random relations, all pointing from lower to higher index if acyclic"""
+    rng = np.random.default_rng(seed)
+    bag = grad.BAG()
+    arguments = [grad.Argument(f"a{i}", float(score)) for i, score in enumerate(rng.random(n))]
+    for argument in arguments:
+        bag.arguments[argument.name] = argument
+
+    for i, j in {tuple(pair) for pair in rng.integers(n, size=(m, 2)).tolist()}:
+        if i == j:
+            continue
+        if acyclic:
+            i, j = min(i, j), max(i, j)
+        (bag.add_support if rng.random() < 0.5 else bag.add_attack)(arguments[i], arguments[j])
+    return bag
+
+
+def solved(model_class, bag, **options):
+    model = model_class()
+    model.BAG = bag
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(1e-2, 1e-10, verbose=False, **options)
+    strengths = np.array([a.strength for a in bag.arguments.values()])
+    bag.reset_strength_values()
+    return model, strengths
+
+
+@pytest.mark.parametrize("model_class", NAMED + [grad.semantics.ContinuousModularModel])
+def test_models_get_containers_of_their_own(model_class):
+    first, second = model_class(), model_class()
+    for container in ("arguments", "argument_strength", "attacker", "supporter"):
+        assert getattr(first, container) == type(getattr(first, container))()
+        assert getattr(first, container) is not getattr(second, container)
+
+    attacker = {}
+    assert model_class(attacker=attacker).attacker is attacker
+
+
+@pytest.mark.parametrize("model_class", NAMED)
+def test_decomposition_reproduces_the_kernel(model_class):
+    model = model_class()
+    modular = grad.semantics.ContinuousModularModel(model.aggregation, model.influence)
+    compiled = randomBAG(40, 120, seed=1, acyclic=False).compile()
+
+    state = np.random.default_rng(2).random(compiled.n)
+    assert np.allclose(model.compute_derivatives(compiled, state), modular.compute_derivatives(compiled, state), atol=1e-12)
+
+
+@pytest.mark.parametrize("model_class", NAMED)
+def test_acyclic_bags_are_propagated_exactly(model_class):
+    bag = randomBAG(60, 150, seed=3)
+    model, propagated = solved(model_class, bag)
+    assert model.approximator.status == "converged"
+    assert model.argument_strength and set(model.argument_strength) == set(bag.arguments.values())
+
+    _, integrated = solved(model_class, bag, propagate_acyclic=False)
+    assert np.allclose(propagated, integrated, atol=1e-8)
+
+
+def test_cyclic_bags_and_plots_fall_back_to_the_approximator():
+    cyclic = randomBAG(30, 90, seed=4, acyclic=False)
+    assert computeTopOrder(cyclic, verbose=False) is None
+    model, strengths = solved(grad.semantics.QuadraticEnergyModel, cyclic)
+    assert model.approximator.status == "converged"
+    assert np.array_equal(strengths, solved(grad.semantics.QuadraticEnergyModel, cyclic, propagate_acyclic=False)[1])
+
+    acyclic = randomBAG(10, 20, seed=5)
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = acyclic
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(1e-2, 1e-6, verbose=False, generate_plot=True)
+    assert all(len(points) > 1 for points in model.approximator.graph_data.values())
+
+
+def test_explicit_decomposition_is_kept_and_cycles_are_reported_quietly(capsys):
+    aggregation, influence = grad.semantics.modular.ProductAggregation(), grad.semantics.modular.LinearInfluence(2)
+    model = grad.semantics.QuadraticEnergyModel(aggregation, influence)
+    assert model.aggregation is aggregation and model.influence is influence
+
+    cyclic = randomBAG(8, 30, seed=6, acyclic=False)
+    assert computeTopOrder(cyclic, verbose=False) is None
+    assert capsys.readouterr().out == ""
+    assert computeTopOrder(cyclic) is None
+    assert "cycles" in capsys.readouterr().out
+
+    order = computeTopOrder(randomBAG(50, 100, seed=7), verbose=False)
+    position = {a: k for k, a in enumerate(order)}
+    assert all(position[attacker] < position[a] for a in order for attacker in list(a.attackers) + list(a.supporters))
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.benchmark import cyclicBAG, randomDAG, starBAG
+
+
+SEMANTICS = [grad.semantics.QuadraticEnergyModel, grad.semantics.ContinuousDFQuADModel, grad.semantics.SquaredEnergyModel,
+             grad.semantics.ContinuousEulerBasedModel]
+
+APPROXIMATORS = [grad.algorithms.DormandPrince, grad.algorithms.SCCHybrid, grad.algorithms.Equilibrium]
+
+
+def strengths(bag, semantics, approximator, delta=1e-2, epsilon=1e-7, **options):
+    model = semantics()
+    model.BAG = bag
+    model.approximator = approximator(model, **options)
+    model.solve(delta, epsilon, verbose=False, propagate_acyclic=False)
+    return model, np.array([a.strength for a in bag.arguments.values()])
+
+
+@pytest.mark.parametrize("semantics", SEMANTICS)
+@pytest.mark.parametrize("approximator", APPROXIMATORS)
+@pytest.mark.parametrize("bag", [lambda: cyclicBAG(60, cycle_density=0.2, seed=1), lambda: starBAG(80, seed=2),
+                                 lambda: randomDAG(50, seed=3)], ids=["cyclic", "star", "dag"])
+def test_agrees_with_rk4(semantics, approximator, bag):
+    bag = bag()
+    _, reference = strengths(bag, semantics, grad.algorithms.RK4)
+    bag.reset_strength_values()
+    model, result = strengths(bag, semantics, approximator)
+    assert model.approximator.status == "converged"
+    assert np.allclose(result, reference, atol=1e-5)
+
+
+@pytest.mark.parametrize("approximator", [grad.algorithms.RK4, grad.algorithms.DormandPrince])
+def test_max_time(approximator):
+    bag = cyclicBAG(40, cycle_density=0.3, seed=4)
+    model, _ = strengths(bag, grad.semantics.QuadraticEnergyModel, approximator, epsilon=1e-9, max_time=0.5)
+    assert model.approximator.status == "max_time"
+    assert model.result.status == "max_time"
+
+
+@pytest.mark.parametrize("semantics,seed", [(grad.semantics.QuadraticEnergyModel, 2), (grad.semantics.ContinuousDFQuADModel, 1)])
+def test_scc_hybrid_solves_cycles_faster_than_rk4(semantics, seed):
+    bag = cyclicBAG(300, cycle_density=0.1, seed=seed)
+    rk4, reference = strengths(bag, semantics, grad.algorithms.RK4)
+    bag.reset_strength_values()
+    model, result = strengths(bag, semantics, grad.algorithms.SCCHybrid)
+
+    assert np.allclose(result, reference, atol=1e-5)
+    assert model.result.derivative_evaluations < rk4.result.derivative_evaluations / 10
+    # the status and residual are those of the whole graph, not of the last component
+    compiled = bag.compile()
+    residual = np.abs(model.compute_derivatives(compiled, compiled.strengths)).max()
+    assert model.result.status == "converged" and model.result.max_derivative < 1e-7 and residual < 1e-7
+
+
+def test_scc_hybrid_finishes_on_the_whole_graph():
+    # loose inner solves leave the later levels off by more than epsilon
+    bag = cyclicBAG(300, cycle_density=0.1, seed=2)
+    compiled = bag.compile()
+    model = grad.semantics.QuadraticEnergyModel()
+    approximator = grad.algorithms.SCCHybrid(model)
+    inner = approximator.inner.integrate
+    calls = []
+
+    def integrate(sub, state, delta, epsilon, free=None, generate_plot=False):
+        calls.append(sub.n)
+        return inner(sub, state, delta, epsilon if sub is compiled else 1e-3, free, generate_plot)
+
+    approximator.inner.integrate = integrate
+    state, _, max_derivative = approximator.integrate(compiled, compiled.strengths.copy(), 1e-2, 1e-8)
+    assert calls[-1] == compiled.n and approximator.status == "converged"
+    assert max_derivative < 1e-8 and np.abs(model.compute_derivatives(compiled, state)).max() < 1e-8
+
+    approximator = grad.algorithms.SCCHybrid(model, inner=grad.algorithms.RK4, max_time=0.5)
+    approximator.integrate(compiled, compiled.strengths.copy(), 1e-2, 1e-8)
+    assert approximator.status == "max_time"
+
+
+def test_acyclic_propagation_is_exact():
+    bag = randomDAG(200, seed=5)
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = bag
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(1e-2, 1e-4, verbose=False)
+    assert model.result.approximator == "forward propagation"
+    propagated = np.array([a.strength for a in bag.arguments.values()])
+
+    bag.reset_strength_values()
+    _, integrated = strengths(bag, grad.semantics.QuadraticEnergyModel, grad.algorithms.RK4, epsilon=1e-10)
+    assert np.allclose(propagated, integrated, atol=1e-7)
+
+
+def test_compact_bag_matches_bag():
+    bag = cyclicBAG(60, cycle_density=0.2, seed=6)
+    compact = cyclicBAG(60, cycle_density=0.2, seed=6, compact=True)
+    _, reference = strengths(bag, grad.semantics.QuadraticEnergyModel, grad.algorithms.RK4)
+
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = compact
+    model.approximator = grad.algorithms.SCCHybrid(model)
+    model.solve(1e-2, 1e-7, verbose=False)
+    assert np.allclose(compact.strengths, reference, atol=1e-5)
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.algorithms import solveBatch
+
+
+def ringBAG(n, seed):
+    """n arguments in a cycle of alternating attacks and supports, with random base scores and a few chords"""
+    rng = np.random.default_rng(seed)
+    bag = grad.BAG()
+    arguments = [grad.Argument(f"a{i}", float(score)) for i, score in enumerate(rng.random(n))]
+    for i in range(n):
+        relation = bag.add_attack if i % 2 == 0 else bag.add_support
+        relation(arguments[i], arguments[(i + 1) % n])
+    for i, j in rng.integers(n, size=(n // 3, 2)):
+        if i != j:
+            bag.add_attack(arguments[i], arguments[j])
+    return bag
+
+
+def singleSolve(bag, delta, epsilon):
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = bag
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(delta, epsilon, verbose=False)
+    strengths = {a.name: a.strength for a in bag.arguments.values()}
+    bag.reset_strength_values()
+    return strengths
+
+
+def test_every_graph_matches_its_own_solve():
+    bags = [ringBAG(4 + 7 * k, seed=k) for k in range(6)]
+    result = solveBatch(grad.semantics.QuadraticEnergyModel(), bags, delta=1e-2, epsilon=1e-9)
+
+    assert len(result) == len(bags) and all(result.converged)
+    for bag, strengths in zip(bags, result.strengths):
+        reference = singleSolve(bag, 1e-2, 1e-9)
+        assert list(strengths) == list(reference)
+        assert np.allclose(list(strengths.values()), list(reference.values()), atol=1e-6)
+
+
+def test_converged_graphs_are_frozen_while_others_continue():
+    unrelated = grad.BAG()
+    unrelated.arguments["x"] = grad.Argument("x", 0.3)
+    bags = [unrelated, ringBAG(30, seed=1), grad.BAG()]
+
+    result = solveBatch(grad.semantics.ContinuousDFQuADModel(), bags, delta=1e-2, epsilon=1e-8)
+    assert result.converged == [True, True, True]
+    # a graph without relations is already at equilibrium after the first step, an empty graph takes none
+    assert result.steps[0] == 1 and result.steps[1] > 1 and result.steps[2] == 0
+    assert result[0] == {"x": 0.3}
+    assert result[2] == {}
+    assert result.max_derivatives[1] < 1e-8
+
+
+def test_bags_are_not_modified_and_compiled_graphs_are_accepted():
+    bag = ringBAG(20, seed=2)
+    before = [a.strength for a in bag.arguments.values()]
+
+    from_bag = solveBatch(grad.semantics.QuadraticEnergyModel(), [bag], epsilon=1e-8)
+    from_compiled = solveBatch(grad.semantics.QuadraticEnergyModel(), [bag.compile()], epsilon=1e-8)
+
+    assert [a.strength for a in bag.arguments.values()] == before
+    assert list(from_bag[0].values()) == list(from_compiled[0].values())
+
+
+def test_max_steps_leaves_graphs_unconverged():
+    result = solveBatch(grad.semantics.QuadraticEnergyModel(), [ringBAG(20, seed=3)], epsilon=1e-12, max_steps=5)
+    assert result.converged == [False] and result.steps == [5]
+    assert result.max_derivatives[0] > 1e-12
+
+
+def test_models_without_kernel_are_rejected():
+    class DictionaryModel(grad.semantics.Model):
+        def compute_derivative_at(self, state):
+            return {a: 0.0 for a in state}
+
+    with pytest.raises(TypeError):
+        solveBatch(DictionaryModel(), [ringBAG(5, seed=4)])
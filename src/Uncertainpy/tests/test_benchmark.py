@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from scipy.sparse.csgraph import connected_components
+
+from uncertainpy.gradual.algorithms import RK4, Equilibrium
+from uncertainpy.gradual.benchmark import (randomDAG, cyclicBAG, starBAG, bundledBAGs, standardCases, runBenchmark,
+                                           compareBaselines, BenchmarkResult)
+from uncertainpy.gradual.semantics import QuadraticEnergyModel
+
+
+def edgeSet(compiled):
+    """Attacks and supports as a set of (kind, source name, target name, weight)"""
+    names = compiled.names
+    return ({("att", names[s], names[t], w) for s, t, w in zip(compiled.att_indices.tolist(), compiled.att_targets.tolist(), compiled.att_weights.tolist())} |
+            {("sup", names[s], names[t], w) for s, t, w in zip(compiled.sup_indices.tolist(), compiled.sup_targets.tolist(), compiled.sup_weights.tolist())})
+
+
+def cycleCount(compiled):
+    """Number of strongly connected components with more than one argument"""
+    _, labels = connected_components(compiled.adjacency(), directed=True, connection="strong")
+    return int(np.sum(np.bincount(labels) > 1))
+
+
+@pytest.mark.parametrize("generator", [randomDAG, cyclicBAG, starBAG])
+def test_generators_are_deterministic_and_compact_graphs_match(generator):
+    first = generator(200, seed=3).compile()
+    second = generator(200, seed=3).compile()
+    compact = generator(200, seed=3, compact=True).compile()
+    other = generator(200, seed=4).compile()
+
+    assert first.names == second.names == compact.names
+    np.testing.assert_array_equal(first.base_scores, second.base_scores)
+    np.testing.assert_array_equal(first.base_scores, compact.base_scores)
+    assert edgeSet(first) == edgeSet(second) == edgeSet(compact)
+    assert edgeSet(first) != edgeSet(other)
+
+
+def test_families_have_the_promised_shape():
+    assert cycleCount(randomDAG(500, 3.0, seed=0).compile()) == 0
+    assert cycleCount(starBAG(500, hubs=4, seed=0).compile()) == 0
+    assert cycleCount(cyclicBAG(500, 3.0, 0.3, seed=0).compile()) > 0
+
+    star = starBAG(500, hubs=4, cross=0.0, seed=0).compile()
+    targets = set(star.att_targets.tolist()) | set(star.sup_targets.tolist())
+    assert len(star.att_indices) + len(star.sup_indices) == 496
+    assert targets <= {0, 1, 2, 3}
+    np.testing.assert_array_equal(star.base_scores[:4], 0.5)
+
+
+def test_bundled_bags_and_standard_cases():
+    bags = bundledBAGs()
+    assert len(bags) > 0
+
+    cases = standardCases(sizes=(10, 50), families=("dag", "cyclic", "star"), compact_from=50)
+    assert [case.name for case in cases] == ["dag-10", "cyclic-10", "star-10", "dag-50", "cyclic-50", "star-50"]
+    assert all(len(case.bag.compile().names) == case.size for case in cases)
+    assert type(cases[0].bag) is not type(cases[-1].bag)
+
+
+def test_run_save_load_and_compare(tmp_path):
+    cases = standardCases(sizes=(20, 40), families=("dag", "cyclic"))
+    models = {"QuadraticEnergy": QuadraticEnergyModel}
+    approximators = {"RK4": RK4, "Equilibrium": Equilibrium}
+    result = runBenchmark(cases, models, approximators, delta=0.1, epsilon=1e-4, track_memory=True)
+
+    assert len(result) == len(cases) * len(approximators)
+    assert all(record["status"] == "converged" for record in result.records)
+    assert all(record["peak_memory"] > 0 and record["time_best"] > 0 for record in result.records)
+    assert len(result.table().splitlines()) == len(result) + 1
+
+    path = str(tmp_path / "baseline.json")
+    result.save(path)
+    loaded = BenchmarkResult.load(path)
+    assert loaded.records == result.records
+    assert compareBaselines(path, loaded) == []
+
+    slower = BenchmarkResult([dict(record) for record in result.records], result.metadata)
+    slower.records[0]["steps"] += 1
+    slower.records[1]["time_best"] = 10.0
+    slower.records[2]["status"] = "stopped"
+    regressions = compareBaselines(result, slower)
+    assert sorted(what for *_, what, old, new in regressions) == ["status", "steps", "time_best"]
+
+
+def test_budget_stops_and_skips_larger_cases():
+    cases = standardCases(sizes=(30, 60), families=("cyclic",))
+    result = runBenchmark(cases, {"QuadraticEnergy": QuadraticEnergyModel}, {"RK4": RK4}, delta=1e-4, epsilon=1e-12,
+                          time_budget=0.0, track_memory=False)
+
+    assert [record["status"] for record in result.records] == ["stopped", "skipped"]
+    assert result.records[0]["peak_memory"] is None
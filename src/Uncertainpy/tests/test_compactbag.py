@@ -0,0 +1,73 @@
+import numpy as np
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual import ATTACK, BAG, CompactBAG, SUPPORT
+
+
+def solve(bag):
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = bag
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(1e-2, 1e-6, propagate_acyclic=False)
+    return np.array([bag.arguments[name].strength for name in ("a", "b")])
+
+
+def test_reset_initial_weight_invalidates_compiled_graph():
+    bag = CompactBAG()
+    bag.add_argument("a", 0.5)
+    bag.add_argument("b", 0.5)
+    bag.add_attack("a", "b")
+    assert np.allclose(solve(bag), [0.5, 0.4], atol=1e-4)
+    before = grad.algorithms.structuralHash(bag)
+
+    bag.arguments["a"].reset_initial_weight(0.9)
+    assert np.allclose(solve(bag), [0.9, 0.27624], atol=1e-4)
+    assert grad.algorithms.structuralHash(bag) != before
+
+
+def test_compile_sees_base_scores_written_through_the_array():
+    bag = CompactBAG()
+    bag.add_arguments(["a", "b"], [0.5, 0.5])
+    bag.compile()
+    bag.base_scores[0] = 0.9
+    assert bag.compile().base_scores.tolist() == [0.9, 0.5]
+
+
+def test_weights_and_hash_match_bag():
+    bag = BAG()
+    a, b = grad.Argument("a", 0.3), grad.Argument("b", 0.7)
+    bag.add_attack(a, b, 0.1)
+    bag.add_support(b, a, 0.3)
+    compact = CompactBAG.from_bag(bag)
+
+    assert compact.weights.dtype == np.float64
+    assert compact.compile().att_weights.tolist() == [0.1]
+    assert grad.algorithms.structuralHash(compact) == grad.algorithms.structuralHash(bag)
+    assert np.allclose(solve(compact), solve(bag), atol=1e-12)
+
+
+def test_merge_keeps_strengths():
+    first = CompactBAG()
+    first.add_arguments(["a", "b"], [0.5, 0.5])
+    first.strengths[:] = [0.1, 0.2]
+    second = CompactBAG()
+    second.add_arguments(["b", "c"], [0.5, 0.5])
+    second.strengths[:] = [0.3, 0.4]
+    second.add_edges([0], [1], SUPPORT)
+
+    merged = CompactBAG.merge([first, second], prefixes=["", ""])
+    assert merged.names == ["a", "b", "c"]
+    assert merged.strengths.tolist() == [0.1, 0.2, 0.4]
+
+    merged = CompactBAG.merge([first, first], prefixes=["", ""])
+    assert merged.strengths.tolist() == [0.1, 0.2]
+    assert len(merged.supports) == 0 and len(merged.attacks) == 0
+
+
+def test_edges_by_kind():
+    bag = CompactBAG()
+    ids = bag.add_arguments(["a", "b", "c"], [0.5, 0.3, 0.8])
+    bag.add_edges(ids[[0, 2]], ids[[1, 1]], ATTACK)
+    bag.add_support("c", "a", 0.5)
+    assert sorted(view.name for view in bag.arguments["b"].attackers) == ["a", "c"]
+    assert [(view.name, w) for view, w in bag.arguments["a"].supporters.items()] == [("c", 0.5)]
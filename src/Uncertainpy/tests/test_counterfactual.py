@@ -0,0 +1,155 @@
+import pickle
+
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.algorithms import computeCounterfactuals, removalCandidates, removalVariant, solveBatch
+
+from .test_acyclic import randomBAG
+
+
+TARGETS = ["a0", "a1"]
+
+
+def smallBAG():
+    """a attacks b and c, b and c support each other, d supports b; e is attacked by b but reaches nothing"""
+    bag = grad.BAG()
+    a, b, c, d, e = (grad.Argument(name, score) for name, score in
+                     [("a", 0.8), ("b", 0.5), ("c", 0.4), ("d", 0.6), ("e", 0.3)])
+    bag.add_attack(a, b)
+    bag.add_attack(a, c)
+    bag.add_support(b, c)
+    bag.add_support(c, b)
+    bag.add_support(d, b)
+    bag.add_attack(b, e)
+    return bag
+
+
+def solved(bag):
+    bag.reset_strength_values()
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = bag
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(0.1, 1e-10, verbose=False)
+    return model
+
+
+def resolved(bag, removal):
+    """Target strengths after applying removal to a copy of bag and solving it from the base scores"""
+    variant = pickle.loads(pickle.dumps(bag))
+    getattr(variant, f"remove_{removal[0]}")(*removal[1:])
+    solved(variant)
+    return [variant.arguments[t].strength if t in variant.arguments else np.nan for t in TARGETS]
+
+
+def test_bag_removals_update_arguments_and_relations():
+    bag = smallBAG()
+    bag.remove_attack("a", bag.arguments["c"])
+    assert bag.arguments["a"] not in bag.arguments["c"].attackers and len(bag.attacks) == 2
+    with pytest.raises(KeyError):
+        bag.remove_attack("a", "c")
+    with pytest.raises(KeyError):
+        bag.remove_support("b", "missing")
+
+    bag.remove_support("d", "b")
+    assert bag.arguments["b"].supporters == {bag.arguments["c"]: 1}
+
+    b = bag.arguments["b"]
+    bag.remove_argument("b")
+    assert list(bag.arguments) == ["a", "c", "d", "e"]
+    assert not bag.arguments["c"].supporters and not bag.arguments["e"].attackers
+    assert bag.attacks == [] and bag.supports == []
+    assert b.attackers == {} and b.supporters == {}
+
+
+def test_candidates_and_variant_regions():
+    # relations are listed by the argument they target
+    compiled = smallBAG().compile()
+    assert removalCandidates(compiled) == [
+        ("argument", "a"), ("argument", "b"), ("argument", "c"), ("argument", "d"), ("argument", "e"),
+        ("attack", "a", "b"), ("attack", "a", "c"), ("attack", "b", "e"),
+        ("support", "c", "b"), ("support", "d", "b"), ("support", "b", "c")]
+    assert removalCandidates(compiled, edges=False) == [("argument", name) for name in compiled.names]
+
+    # removing d changes b, c and e; the removed argument keeps its value and d's support is gone
+    region, sub, free = removalVariant(compiled, ("argument", "d"))
+    assert sorted(compiled.names[i] for i in region) == ["b", "c", "e"]
+    assert free.sum() == 3 and not free[len(region):].any()
+    assert sub.index["d"] not in sub.sup_indices.tolist()
+
+    region, sub, _ = removalVariant(compiled, ("attack", "a", "c"))
+    assert sorted(compiled.names[i] for i in region) == ["b", "c", "e"]
+    assert len(sub.att_indices) == len(compiled.att_indices) - 1
+    # nothing depends on e
+    assert removalVariant(compiled, ("argument", "e")) is None
+    with pytest.raises(KeyError):
+        removalVariant(compiled, ("support", "a", "b"))
+
+
+@pytest.fixture(scope="module")
+def expected():
+    """Changes of the target strengths under every single removal, by full re-solves"""
+    bag = randomBAG(30, 60, seed=7, acyclic=False)
+    solved(bag)
+    base = np.array([bag.arguments[t].strength for t in TARGETS])
+    return {removal: np.array(resolved(bag, removal)) - base for removal in removalCandidates(bag.compile())}
+
+
+@pytest.mark.parametrize("batch_arguments", [1000000, 10])
+def test_counterfactuals_match_resolves(expected, batch_arguments):
+    bag = randomBAG(30, 60, seed=7, acyclic=False)
+    model = solved(bag)
+    compiled = bag.compile()
+    base = [bag.arguments[t].strength for t in TARGETS]
+
+    result = computeCounterfactuals(model, compiled, compiled.strengths, TARGETS, delta=0.1, epsilon=1e-10,
+                                    batch_arguments=batch_arguments)
+    assert all(result.converged) and result.removals == list(expected)
+    assert result.base == pytest.approx(dict(zip(TARGETS, base)), abs=1e-9)
+    for removal, deltas in zip(result.removals, result.deltas):
+        assert np.allclose(deltas, expected[removal], atol=1e-7, equal_nan=True), removal
+
+    # removals that cannot reach a target change nothing, the target's own removal is undefined
+    ancestors = set(bag.ancestors(TARGETS))
+    for removal, deltas in zip(result.removals, result.deltas):
+        if removal[-1] not in ancestors:
+            assert not deltas.any()
+    assert np.isnan(result.effects("a0")[("argument", "a0")]) and not np.isnan(result.effects("a1")[("argument", "a0")])
+
+    # the BAG is not modified
+    assert bag.compile().n == compiled.n
+    assert [bag.arguments[t].strength for t in TARGETS] == base
+
+
+def test_model_counterfactuals_ranking_and_errors():
+    bag = smallBAG()
+    model = solved(bag)
+    result = model.counterfactuals("b", delta=0.1, epsilon=1e-10)
+    assert result.targets == ["b"] and result.residual < 1e-10
+
+    ranking = result.ranking("b")
+    assert ("argument", "b") not in dict(ranking) and len(result.ranking("b", k=2)) == 2
+    assert [abs(value) for _, value in ranking] == sorted((abs(value) for _, value in ranking), reverse=True)
+    # losing its supporter weakens b, losing its attacker strengthens it
+    assert result.effects("b")[("argument", "d")] < 0 < result.effects("b")[("argument", "a")]
+    assert result.effects("b")[("attack", "b", "e")] == 0
+
+    with pytest.raises(KeyError):
+        model.counterfactuals("b", removals=[("attack", "a", "missing")])
+    with pytest.raises(ValueError):
+        model.counterfactuals("b", removals=[("edge", "a", "b")])
+
+
+def test_batches_keep_arguments_outside_their_free_mask():
+    bags = [randomBAG(20, 40, seed=k, acyclic=False) for k in range(3)]
+    graphs = [bag.compile() for bag in bags]
+    model = grad.semantics.QuadraticEnergyModel()
+    masks = [np.arange(g.n) % 2 == 0 for g in graphs]
+    masks[2][:] = False
+
+    result = solveBatch(model, graphs, 0.1, 1e-10, free=masks)
+    assert result.converged == [True, True, True] and result.steps[2] == 0
+    for graph, mask, state in zip(graphs, masks, result.states):
+        assert np.array_equal(state[~mask], graph.base_scores[~mask])
+        assert np.all(np.abs(model.compute_derivatives(graph, state)[mask]) < 1e-9)
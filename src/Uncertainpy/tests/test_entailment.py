@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+
+from uncertainpy.probability.decomposition import kbComponents
+from uncertainpy.propositional.semantics import BooleanInterpretation
+from uncertainpy.propositional.syntax import BooleanAtom, Conditional, Conjunction, Disjunction, Negation
+
+from .test_truthtable import Parity
+
+probEntailment = pytest.importorskip("uncertainpy.probability.probEntailment")
+
+
+def chain(n):
+    atoms = [BooleanAtom(f"a{i}") for i in range(n)]
+    kb = [Conditional(atoms[0], None, 0.8, 0.9)] + [Conditional(atoms[i + 1], atoms[i], 0.8, 0.9) for i in range(n - 1)]
+    return atoms, kb
+
+
+def test_conditional_entries_match_a_dense_construction():
+    atoms = [BooleanAtom(f"a{i}") for i in range(5)]
+    ints = BooleanInterpretation(atoms)
+    conds = [Conditional(Disjunction(atoms[0], atoms[3]), Negation(atoms[1]), 0.3, 0.3),
+             Conditional(Conjunction(atoms[2], atoms[4]), None, 0.6, 0.6)]
+    engine = probEntailment.ProbEntailmentEngine()
+    engine.createConstraints(conds, ints)
+
+    rows, cols, data = engine.conditionalEntries(conds, [0.3, 0.6])
+    dense = np.zeros((2, ints.noWorlds()))
+    dense[rows, cols] = data
+    for r, cond in enumerate(conds):
+        for i in range(ints.noWorlds()):
+            condition = cond.a is None or ints.satisfies(i, cond.a)
+            expected = (ints.satisfies(i, cond.b) - 0.3 * (r == 0) - 0.6 * (r == 1)) if condition else 0
+            assert dense[r, i] == pytest.approx(expected)
+    # only the worlds that satisfy the condition have entries
+    assert len(cols) == 16 + 32 and data.dtype == np.float64
+
+    row = engine.worldRow(ints.models(atoms[2]))
+    assert row.shape == (1, engine.noVars) and row.nnz == 16 and row[0, :ints.noWorlds()].toarray()[0].tolist() == \
+        ints.models(atoms[2]).astype(float).tolist()
+
+
+def test_bounds_of_a_chain():
+    atoms, kb = chain(4)
+    engine = probEntailment.ProbEntailmentEngine()
+    engine.createConstraints(kb, BooleanInterpretation(atoms))
+
+    # a3 holds in at least 0.8^4 of the worlds; at most a tenth of the worlds with a2 (at least 0.8^3) lack it
+    query = engine.computeBounds(Conditional(atoms[3], None, None, None))
+    assert query.l == pytest.approx(0.8 ** 4, abs=1e-9) and query.u == pytest.approx(1 - 0.1 * 0.8 ** 3, abs=1e-9)
+    query = engine.computeBounds(Conditional(atoms[2], atoms[1], None, None))
+    assert query.l == pytest.approx(0.8, abs=1e-9) and query.u == pytest.approx(0.9, abs=1e-9)
+
+
+def test_inconsistent_knowledge_bases_have_no_bounds():
+    atoms = [BooleanAtom("a"), BooleanAtom("b")]
+    kb = [Conditional(atoms[0], None, 0.3, 0.3), Conditional(atoms[0], None, 0.5, None)]
+    engine = probEntailment.ProbEntailmentEngine()
+    engine.createConstraints(kb, BooleanInterpretation(atoms))
+    query = engine.computeBounds(Conditional(atoms[1], None, None, None))
+    assert query.l is None and query.u is None
+
+
+def clusters(k, size):
+    """k chains of size atoms each, the second one with its first atom attacked by a lower bound only"""
+    atoms, kb = [], []
+    for c in range(k):
+        catoms = [BooleanAtom(f"c{c}_{i}") for i in range(size)]
+        atoms += catoms
+        kb += [Conditional(catoms[0], None, 0.6, None if c == 1 else 0.9)]
+        kb += [Conditional(catoms[i + 1], catoms[i], 0.7, 0.95) for i in range(size - 1)]
+    return atoms, kb
+
+
+def test_components_and_atoms():
+    atoms = [BooleanAtom(f"a{i}") for i in range(6)]
+    assert Conditional(Negation(atoms[0]), Disjunction(atoms[1], atoms[0]), None, None).atoms() == {atoms[0], atoms[1]}
+    assert Conjunction().atoms() == set() and Conjunction(atoms[2], Parity(atoms[3])).atoms() is None
+
+    kb = [Conditional(atoms[0], atoms[1], 0.5, 0.6), Conditional(Disjunction(atoms[1], atoms[2]), None, 0.7, 0.7),
+          Conditional(atoms[4], None, 0.1, None), Conditional(Conjunction(), None, 1, 1)]
+    components = kbComponents(kb, atoms)
+    assert [[str(a) for a in c.atoms] for c in components] == [["a0", "a1", "a2"], ["a3"], ["a4"], ["a5"], []]
+    assert [c.conds for c in components] == [kb[:2], [], [kb[2]], [], [kb[3]]]
+
+    # conditionals with unknown atoms connect everything
+    assert len(kbComponents(kb + [Conditional(Parity(atoms[5]), None, 0.5, 0.5)], atoms)) == 2
+    with pytest.raises(KeyError):
+        kbComponents([Conditional(BooleanAtom("other"), None, 0.5, 0.5)], atoms)
+
+
+def test_decomposed_bounds_match_the_full_lp():
+    atoms, kb = clusters(3, 4)
+    full = probEntailment.ProbEntailmentEngine()
+    full.createConstraints(kb, BooleanInterpretation(atoms))
+    engine = probEntailment.ProbEntailmentEngine(decompose=True)
+    engine.createConstraints(kb, BooleanInterpretation(atoms))
+    assert len(engine.components) == 3
+
+    queries = [Conditional(atoms[3], None, None, None), Conditional(atoms[6], atoms[5], None, None),
+               Conditional(Conjunction(atoms[3], atoms[11]), atoms[0], None, None),
+               Conditional(Disjunction(atoms[0], Parity(atoms[7])), None, None, None)]
+    for query in queries:
+        expected = full.computeBounds(Conditional(query.b, query.a, None, None))
+        got = engine.computeBounds(query)
+        assert got.l == pytest.approx(expected.l, abs=1e-8) and got.u == pytest.approx(expected.u, abs=1e-8)
+
+    # one engine per consistency check and per set of components a query needs, over their atoms only
+    assert sorted(engine.engines) == [(0,), (0, 1, 2), (0, 2), (1,), (2,)]
+    assert engine.engines[(0, 2)].ints.atoms == atoms[:4] + atoms[8:]
+
+
+def test_inconsistent_components_make_every_query_unbounded():
+    atoms, kb = clusters(2, 3)
+    kb += [Conditional(atoms[4], atoms[3], 0.1, 0.1), Conditional(Conjunction(atoms[3], atoms[4]), None, 0.9, None)]
+    engine = probEntailment.ProbEntailmentEngine(decompose=True)
+    engine.createConstraints(kb, BooleanInterpretation(atoms))
+    query = engine.computeBounds(Conditional(atoms[0], None, None, None))
+    assert query.l is None and query.u is None and engine.consistent is False
+
+
+@pytest.mark.parametrize("backend", ["scipy", "highs"])
+@pytest.mark.parametrize("decompose", [False, True])
+def test_batches_share_the_constraints_of_queries_with_the_same_condition(backend, decompose, monkeypatch):
+    atoms, kb = clusters(2, 4)
+    queries = [Conditional(atoms[3], None, None, None), Conditional(atoms[2], atoms[1], None, None),
+               Conditional(atoms[1], None, None, None), Conditional(atoms[3], atoms[1], None, None),
+               Conditional(Conjunction(atoms[2], atoms[6]), None, None, None)]
+    single = probEntailment.ProbEntailmentEngine(backend)
+    single.createConstraints(kb, BooleanInterpretation(atoms))
+    expected = [single.computeBounds(Conditional(query.b, query.a, None, None)) for query in queries]
+
+    engine = probEntailment.ProbEntailmentEngine(backend, decompose=decompose)
+    engine.createConstraints(kb, BooleanInterpretation(atoms))
+    if decompose:
+        # the consistency check of every component solves a query of its own once
+        engine.queryEngine(queries[0])
+    calls = []
+    monkeypatch.setattr(probEntailment.ProbEntailmentEngine, "worldRow",
+                        lambda self, mask, worldRow=probEntailment.ProbEntailmentEngine.worldRow: calls.append(mask) or worldRow(self, mask))
+    got = engine.computeBoundsBatch(queries)
+
+    assert got == queries
+    for query, reference in zip(got, expected):
+        assert query.l == pytest.approx(reference.l, abs=1e-8) and query.u == pytest.approx(reference.u, abs=1e-8)
+    # one normalization row per condition (and component engine with decompose), the queries only change the objective
+    assert len(calls) == (3 if decompose else 2)
+
+
+def test_scipy_keeps_the_assembled_constraints_until_the_query_changes():
+    atoms, kb = chain(3)
+    engine = probEntailment.ProbEntailmentEngine("scipy")
+    engine.createConstraints(kb, BooleanInterpretation(atoms))
+    engine.computeBounds(Conditional(atoms[2], None, None, None))
+    A_eq = engine.backend.A_eq
+    engine.backend.optimize(np.zeros(engine.noVars))
+    assert engine.backend.A_eq is A_eq
+
+    engine.computeBounds(Conditional(atoms[2], atoms[1], None, None))
+    assert engine.backend.A_eq is not A_eq and engine.backend.A_eq.shape == A_eq.shape
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.CompiledBAG import CompiledBAG
+from uncertainpy.gradual.semantics import modular
+from uncertainpy.gradual.semantics.modular.Kernels import FUSED_KERNELS, findKernel, registerKernel
+
+from .test_acyclic import randomBAG
+
+
+def fanIn(n, weights):
+    """Argument 0 attacked by arguments 1..n and supported by arguments n+1..2n, with the given edge weights"""
+    sources = np.arange(1, n + 1)
+    return CompiledBAG(range(2 * n + 1), np.full(2 * n + 1, 0.5),
+                       np.concatenate(([0], np.full(2 * n + 1, n))), sources, weights[:n],
+                       np.concatenate(([0], np.full(2 * n + 1, n))), sources + n, weights[n:])
+
+
+def directProducts(compiled, values, power):
+    attack = [np.prod((1 - compiled.att_weights[compiled.att_indptr[i]:compiled.att_indptr[i + 1]]
+                       * values[compiled.att_indices[compiled.att_indptr[i]:compiled.att_indptr[i + 1]]]) ** power)
+              for i in range(compiled.n)]
+    support = [np.prod((1 - compiled.sup_weights[compiled.sup_indptr[i]:compiled.sup_indptr[i + 1]]
+                        * values[compiled.sup_indices[compiled.sup_indptr[i]:compiled.sup_indptr[i + 1]]]) ** power)
+               for i in range(compiled.n)]
+    return np.array(attack), np.array(support)
+
+
+@pytest.mark.parametrize("power", [1, 2])
+def test_log_space_products_match_direct_products(power):
+    rng = np.random.default_rng(1)
+    compiled = randomBAG(60, 300, seed=1, acyclic=False).compile()
+    values = rng.random(compiled.n)
+    for got, expected in zip(compiled.products(values, power), directProducts(compiled, values, power)):
+        assert np.allclose(got, expected, rtol=1e-12, atol=1e-300)
+
+    # factors of exactly 0 and negative factors (weights above 1) keep their value and sign
+    compiled = fanIn(3, np.array([1.0, 2.0, 1.0, 2.0, 1.0, 0.5]))
+    values = np.array([0.0, 1.0, 0.8, 0.3, 0.9, 0.7, 0.2])
+    for got, expected in zip(compiled.products(values, power), directProducts(compiled, values, power)):
+        assert np.allclose(got, expected, rtol=1e-12)
+    assert compiled.products(values, power)[0][0] == 0.0
+    assert (compiled.products(values, power)[1][0] < 0) == (power == 1)
+
+
+def test_products_do_not_underflow_at_high_in_degree():
+    n = 5000
+    compiled = fanIn(n, np.ones(2 * n))
+    values = np.full(compiled.n, 1e-4)
+    attack, support = compiled.products(values)
+    assert attack[0] == pytest.approx((1 - 1e-4) ** n, rel=1e-10)
+    assert support[0] == attack[0]
+
+    values[1:n + 1] = 0.9
+    assert compiled.products(values)[0][0] == pytest.approx(np.exp(n * np.log(0.1)), rel=1e-10, abs=0)
+
+
+def test_net_sum_and_edge_cache():
+    compiled = randomBAG(50, 200, seed=2, acyclic=False).compile()
+    values = np.random.default_rng(2).random(compiled.n)
+    assert np.allclose(compiled.net_sum(values), compiled.support_sum(values) - compiled.attack_sum(values))
+
+    # replacing a weight array invalidates the cached edge arrays
+    compiled.att_weights = 2 * compiled.att_weights
+    assert np.allclose(compiled.net_sum(values), compiled.support_sum(values) - compiled.attack_sum(values))
+
+
+AGGREGATIONS = [modular.SumAggregation, modular.ProductAggregation, modular.SquaredSumAggregation,
+                modular.SquaredProductAggregation]
+INFLUENCES = [lambda: modular.LinearInfluence(2), lambda: modular.QuadraticMaximumInfluence(0.5),
+              lambda: modular.LinearMaximumInfluence(1), modular.EulerBasedInfluence]
+
+
+@pytest.mark.parametrize("aggregation_class", AGGREGATIONS)
+@pytest.mark.parametrize("influence_class", INFLUENCES)
+def test_fused_kernels_match_separate_aggregation_and_influence(aggregation_class, influence_class):
+    aggregation, influence = aggregation_class(), influence_class()
+    model = grad.semantics.ContinuousModularModel(aggregation, influence)
+    assert findKernel(aggregation, influence) is FUSED_KERNELS[(aggregation_class, type(influence))]
+
+    compiled = randomBAG(80, 320, seed=3, acyclic=False).compile()
+    state = np.random.default_rng(3).random(compiled.n)
+    separate = influence.compute_strengths(compiled.base_scores, aggregation.aggregate_strengths(compiled, state)) - state
+    assert np.allclose(model.compute_derivatives(compiled, state), separate, atol=1e-12)
+    # the fused kernel works in place on its own aggregate array, not on the state
+    assert np.array_equal(state, np.random.default_rng(3).random(compiled.n))
+
+
+def test_pairs_without_kernel_fall_back_to_scalar_methods(monkeypatch):
+    class ScalarSum:
+        def aggregate_strength(self, attackers, supporters, state):
+            return sum(state[s] * w for s, w in supporters.items()) - sum(state[a] * w for a, w in attackers.items())
+
+    class ScalarQuadraticMaximum:
+        def compute_strength(self, weight, aggregate):
+            return modular.QuadraticMaximumInfluence(1).compute_strength(weight, aggregate)
+
+    compiled = randomBAG(40, 120, seed=4, acyclic=False).compile()
+    state = np.random.default_rng(4).random(compiled.n)
+    fused = grad.semantics.ContinuousModularModel(modular.SumAggregation(), modular.QuadraticMaximumInfluence(1))
+    scalar = grad.semantics.ContinuousModularModel(ScalarSum(), ScalarQuadraticMaximum())
+    assert findKernel(scalar.aggregation, scalar.influence) is None
+    assert np.allclose(scalar.compute_derivatives(compiled, state), fused.compute_derivatives(compiled, state), atol=1e-12)
+
+    # a registered kernel takes precedence over the fallback
+    monkeypatch.setitem(FUSED_KERNELS, (ScalarSum, ScalarQuadraticMaximum), None)
+    registerKernel(ScalarSum, ScalarQuadraticMaximum, lambda aggregation, influence, compiled, state: np.zeros(compiled.n))
+    assert not scalar.compute_derivatives(compiled, state).any()
+
+
+def test_registries_are_exported_without_the_kernel_helpers():
+    from uncertainpy.gradual.semantics.modular import Kernels
+
+    assert modular.FUSED_KERNELS is Kernels.FUSED_KERNELS and modular.DIFFERENTIALS is Kernels.DIFFERENTIALS
+    assert modular.registerKernel is registerKernel and grad.semantics.findDifferential is Kernels.findDifferential
+    assert not hasattr(modular, "fuse") and not hasattr(modular, "sumAggregates") and not hasattr(grad.semantics, "AGGREGATES")
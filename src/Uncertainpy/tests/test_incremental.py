@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.algorithms import IncrementalSolver
+
+from .test_acyclic import randomBAG
+
+
+def fullSolve(bag):
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = bag
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(1e-2, 1e-10, verbose=False, propagate_acyclic=False)
+    return {a.name: a.strength for a in bag.arguments.values()}
+
+
+def chainBAG(n):
+    """a0 -> a1 -> ... -> a(n-1), alternating attacks and supports"""
+    bag = grad.BAG()
+    arguments = [grad.Argument(f"a{i}", 0.2 + 0.6 * (i % 3) / 2) for i in range(n)]
+    for i in range(n - 1):
+        (bag.add_attack if i % 2 == 0 else bag.add_support)(arguments[i], arguments[i + 1])
+    return bag
+
+
+def assertMatches(strengths, bag):
+    reference = fullSolve(bag)
+    assert list(strengths) == list(reference)
+    assert np.allclose(list(strengths.values()), list(reference.values()), atol=1e-6)
+
+
+def test_first_solve_covers_everything_and_repeats_are_free():
+    bag = randomBAG(80, 200, seed=1, acyclic=False)
+    solver = IncrementalSolver(grad.semantics.QuadraticEnergyModel(), epsilon=1e-10)
+
+    first = solver.solve(bag)
+    assert solver.region_size == 80 and solver.status == "converged"
+    assert first == {a.name: a.strength for a in bag.arguments.values()}
+
+    assert solver.solve(bag) == first
+    assert solver.region_size == 0
+
+    assertMatches(first, bag)
+
+
+def test_new_leaf_only_resolves_downstream_arguments():
+    bag = chainBAG(60)
+    solver = IncrementalSolver(grad.semantics.QuadraticEnergyModel(), epsilon=1e-10, tolerance=1e-12)
+    before = solver.solve(bag)
+
+    bag.add_attack(grad.Argument("new", 0.9), bag.arguments["a55"])
+    after = solver.solve(bag)
+    # the new argument and a55, ..., a59
+    assert solver.region_size == 6
+    assert all(after[f"a{i}"] == before[f"a{i}"] for i in range(55))
+    assert after["a55"] < before["a55"]
+    assertMatches(after, bag)
+
+
+def test_changed_base_score_and_new_relations_in_a_cyclic_bag():
+    bag = randomBAG(100, 160, seed=2, acyclic=False)
+    solver = IncrementalSolver(grad.semantics.QuadraticEnergyModel(), epsilon=1e-10, tolerance=1e-11)
+    solver.solve(bag)
+
+    changed = bag.arguments["a17"]
+    changed.initial_weight = 1 - changed.initial_weight
+    bag.add_support(bag.arguments["a3"], bag.arguments["a90"])
+    assertMatches(solver.solve(bag), bag)
+    assert solver.status == "converged"
+
+
+def test_models_without_kernel_are_rejected():
+    class DictionaryModel(grad.semantics.Model):
+        def compute_derivative_at(self, state):
+            return {a: 0.0 for a in state}
+
+    with pytest.raises(TypeError):
+        IncrementalSolver(DictionaryModel())
+
+
+def test_rebase_starts_the_next_solve_from_given_strengths():
+    bag = chainBAG(40)
+    reference = fullSolve(chainBAG(40))
+    solver = IncrementalSolver(grad.semantics.QuadraticEnergyModel(), epsilon=1e-10, tolerance=1e-12)
+    solver.solve(chainBAG(10))
+
+    # e.g. strengths of bag found in a memo, the solver has never seen bag itself
+    solver.rebase(bag, reference)
+    assert solver.region_size == 0 and solver.strengths == reference
+    assert solver.solve(bag) == reference and solver.region_size == 0
+
+    bag.add_support(grad.Argument("new", 0.9), bag.arguments["a35"])
+    after = solver.solve(bag)
+    assert solver.region_size == 6
+    assertMatches(after, bag)
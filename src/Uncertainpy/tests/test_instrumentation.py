@@ -0,0 +1,69 @@
+import json
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.algorithms import IncrementalSolver, JSONLinesSink
+
+from .test_acyclic import randomBAG
+
+
+def solvedModel(approximator, metrics=None, callback=None, **options):
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = randomBAG(40, 100, seed=1, acyclic=False)
+    model.approximator = approximator(model, **options)
+    if callback is not None:
+        model.approximator.add_callback(callback)
+    model.solve(1e-2, 1e-6, verbose=False, propagate_acyclic=False, metrics=metrics)
+    return model
+
+
+def test_counters_and_report(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    model = solvedModel(grad.algorithms.RK4, metrics=JSONLinesSink(path, question=3))
+    result = model.result
+
+    assert result.converged and result.status == "converged" and result.max_derivative < 1e-6
+    # RK4 evaluates the derivatives four times per step
+    assert result.derivative_evaluations == 4 * result.steps > 0
+    assert result.strengths == {name: argument.strength for name, argument in model.BAG.arguments.items()}
+    assert {"compile", "integrate", "write_back"} <= set(result.phase_times)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert records == [{"question": 3, **result.as_dict()}]
+
+
+def test_callbacks_see_every_step_and_can_stop():
+    seen = []
+
+    def callback(approximator, compiled, time, state, max_derivative):
+        seen.append(time)
+        return len(seen) == 10
+
+    model = solvedModel(grad.algorithms.DormandPrince, callback=callback)
+    assert model.result.status == "stopped" and not model.result.converged
+    assert len(seen) == 10 == model.result.steps
+
+
+def test_equilibrium_counts_inner_evaluations():
+    model = solvedModel(grad.algorithms.Equilibrium, depth=1, max_iterations=3)
+    approximator = model.approximator
+    assert model.result.converged and approximator.method == "newton" and approximator.jacobian_evaluations > 0
+    assert model.result.derivative_evaluations == approximator.total_derivative_evaluations() > approximator.iterations
+
+
+def test_forward_propagation_and_incremental_solves_report_too():
+    records = []
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = randomBAG(30, 60, seed=2)
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(1e-2, 1e-6, verbose=False, metrics=records.append)
+    assert model.result.approximator == "forward propagation" and model.result.steps == 0
+    assert set(model.result.phase_times) == {"propagate"} and records == [model.result.as_dict()]
+
+    bag = randomBAG(40, 100, seed=3, acyclic=False)
+    solver = IncrementalSolver(grad.semantics.QuadraticEnergyModel(), epsilon=1e-8)
+    solver.solve(bag)
+    assert solver.result.converged and solver.result.steps > 0 and solver.result.max_derivative < 1e-8
+    assert {"compile", "diff", "integrate", "write_back"} <= set(solver.result.phase_times)
+
+    solver.solve(bag)
+    assert solver.result.steps == 0 and solver.result.derivative_evaluations == 1
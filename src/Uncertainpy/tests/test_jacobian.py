@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.algorithms.Jacobian import computeColoring, computeJacobian
+from uncertainpy.gradual.benchmark import cyclicBAG, starBAG
+from uncertainpy.gradual.semantics import modular
+
+from .test_kernels import NAMED, modularModels, weightedBAG
+
+
+def denseJacobian(model, compiled, state, h=1e-6):
+    """Central differences, one argument at a time"""
+    jacobian = np.zeros((compiled.n, compiled.n))
+    for j in range(compiled.n):
+        step = np.zeros(compiled.n)
+        step[j] = h
+        jacobian[:, j] = (model.compute_derivatives(compiled, state + step) - model.compute_derivatives(compiled, state - step)) / (2 * h)
+    return jacobian
+
+
+def hub(n, attacked):
+    """Argument 0 attacked by (or attacking) n leaves"""
+    leaves = np.arange(1, n + 1)
+    if attacked:
+        att_indptr, att_indices = np.r_[0, np.full(n + 1, n)], leaves
+    else:
+        att_indptr, att_indices = np.r_[0, np.arange(n + 1)], np.zeros(n, dtype=np.int64)
+    return grad.CompiledBAG(range(n + 1), np.full(n + 1, 0.5), att_indptr, att_indices, np.ones(n),
+                            np.zeros(n + 2, dtype=np.int64), [], [])
+
+
+@pytest.mark.parametrize("compiled", [weightedBAG().compile(), cyclicBAG(2000, seed=1).compile(),
+                                      starBAG(2000, seed=1).compile()], ids=repr)
+def test_coloring_separates_dependencies(compiled):
+    coloring = computeColoring(compiled)
+    dependency = (compiled.adjacency().T + sp.identity(compiled.n)).tocoo()
+    pairs = set(zip(dependency.row.tolist(), coloring[dependency.col].tolist()))
+    assert len(pairs) == dependency.nnz
+
+
+def test_coloring_of_hubs():
+    assert computeColoring(hub(500, attacked=True)).max() + 1 == 501
+    assert computeColoring(hub(500, attacked=False)).max() + 1 == 2
+
+
+def test_finite_difference_jacobian():
+    model = grad.semantics.ContinuousModularModel(modular.SumAggregation(), modular.MLPBasedInfluence())
+    compiled = weightedBAG().compile()
+    state = np.random.default_rng(1).uniform(0, 1, compiled.n)
+    expected = denseJacobian(model, compiled, state)
+    assert np.allclose(computeJacobian(model, compiled, state).toarray(), expected, atol=1e-6)
+
+    free = np.arange(compiled.n) % 3 != 0
+    expected[~free] = 0
+    expected[:, ~free] = 0
+    assert np.allclose(computeJacobian(model, compiled, state, free).toarray(), expected, atol=1e-6)
+
+
+@pytest.mark.parametrize("model", [cls() for cls in NAMED] + list(modularModels()), ids=str)
+def test_analytic_jacobian(model):
+    compiled = weightedBAG().compile()
+    state = np.random.default_rng(1).uniform(0, 1, compiled.n)
+    assert model.has_differential() == (type(model.influence) is not modular.MLPBasedInfluence)
+    assert np.allclose(computeJacobian(model, compiled, state).toarray(), denseJacobian(model, compiled, state), atol=1e-7)
+
+
+def test_product_partials_with_zero_factors():
+    model = grad.semantics.ContinuousDFQuADModel()
+    compiled = weightedBAG().compile()
+    state = np.random.default_rng(3).uniform(0, 1, compiled.n)
+    state[0] = 1.0
+    # factors 1 - strength of 0, but no aggregate at the kink of the influence function
+    parents = np.diff(compiled.att_indptr) + np.diff(compiled.sup_indptr) > 0
+    assert np.subtract(*compiled.products(state, weighted=False))[parents].all()
+    assert not compiled.edge_products(state, weighted=False).all()
+    jacobian = computeJacobian(model, compiled, state).toarray()
+    assert np.allclose(jacobian, denseJacobian(model, compiled, state), atol=1e-7)
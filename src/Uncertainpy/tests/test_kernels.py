@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.benchmark import randomDAG
+from uncertainpy.gradual.semantics import modular
+
+
+NAMED = [grad.semantics.QuadraticEnergyModel, grad.semantics.SquaredEnergyModel, grad.semantics.ContinuousEulerBasedModel,
+         grad.semantics.ContinuousDFQuADModel, grad.semantics.ContinuousSquaredDFQuADModel]
+
+AGGREGATIONS = [modular.SumAggregation, modular.ProductAggregation, modular.SquaredSumAggregation,
+                modular.SquaredProductAggregation]
+
+INFLUENCES = [lambda: modular.LinearInfluence(2), lambda: modular.QuadraticMaximumInfluence(2),
+              lambda: modular.LinearMaximumInfluence(2), modular.EulerBasedInfluence, modular.MLPBasedInfluence]
+
+
+def weightedBAG(n=12, m=30, seed=0):
+    """Cyclic BAG with random base scores and relation weights between 0.2 and 1.5"""
+    rng = np.random.default_rng(seed)
+    bag = grad.BAG()
+    arguments = [grad.Argument(f"a{i}", float(rng.uniform(0.05, 0.95))) for i in range(n)]
+    for _ in range(m):
+        source, target = rng.choice(n, size=2, replace=False)
+        if rng.random() < 0.5:
+            bag.add_attack(arguments[source], arguments[target], float(rng.uniform(0.2, 1.5)))
+        else:
+            bag.add_support(arguments[source], arguments[target], float(rng.uniform(0.2, 1.5)))
+    return bag
+
+
+def dictionaryDerivatives(model, bag, state):
+    """Derivatives of the scalar compute_derivative_at on the dictionaries the approximators set up"""
+    arguments = list(bag.arguments.values())
+    model.arguments = arguments
+    model.attacker = {a: dict(a.attackers) for a in arguments}
+    model.supporter = {a: dict(a.supporters) for a in arguments}
+    derivatives = model.compute_derivative_at(dict(zip(arguments, state)))
+    return np.array([derivatives[a] for a in arguments])
+
+
+def modularModels():
+    for aggregation in AGGREGATIONS:
+        for weighted in (False, True):
+            for influence in INFLUENCES:
+                yield grad.semantics.ContinuousModularModel(aggregation(weighted=weighted), influence())
+
+
+@pytest.mark.parametrize("model", [cls() for cls in NAMED] + list(modularModels()), ids=str)
+def test_kernel_matches_dictionary_path(model):
+    bag = weightedBAG()
+    compiled = bag.compile()
+    state = np.random.default_rng(1).uniform(0, 1, compiled.n)
+    assert np.allclose(model.compute_derivatives(compiled, state), dictionaryDerivatives(model, bag, state), atol=1e-12)
+
+
+@pytest.mark.parametrize("cls", NAMED)
+def test_named_semantics_ignore_weights(cls):
+    weighted = weightedBAG().compile()
+    unit = grad.CompiledBAG(weighted.names, weighted.base_scores, weighted.att_indptr, weighted.att_indices,
+                            np.ones_like(weighted.att_weights), weighted.sup_indptr, weighted.sup_indices,
+                            np.ones_like(weighted.sup_weights))
+    state = np.random.default_rng(2).uniform(0, 1, weighted.n)
+    assert np.array_equal(cls().compute_derivatives(weighted, state), cls().compute_derivatives(unit, state))
+
+
+@pytest.mark.parametrize("cls", NAMED)
+def test_acyclic_propagation_matches_integration(cls):
+    bag = randomDAG(30, seed=3)
+    for attack in bag.attacks:
+        attack.get_attacked().add_attacker(attack.get_attacker(), 0.5)
+
+    model = cls()
+    model.BAG = bag
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(1e-2, 1e-8, verbose=False)
+    propagated = np.array([a.strength for a in bag.arguments.values()])
+
+    model.solve(1e-2, 1e-8, verbose=False, propagate_acyclic=False)
+    integrated = np.array([a.strength for a in bag.arguments.values()])
+    assert model.approximator.status == "converged"
+    assert np.allclose(propagated, integrated, atol=1e-6)
+
+
+def test_products_of_many_attackers():
+    n = 300
+    compiled = grad.CompiledBAG(["h"] + [f"a{i}" for i in range(n)], np.full(n + 1, 0.5), np.r_[0, n, np.full(n, n)],
+                                np.arange(1, n + 1), np.ones(n), np.zeros(n + 2, dtype=np.int64), [], [])
+    attack_product, support_product = compiled.products(np.full(n + 1, 0.9))
+    assert np.isclose(attack_product[0], 1e-300, rtol=1e-9)
+    assert support_product[0] == 1
@@ -0,0 +1,115 @@
+import numpy as np
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.algorithms import StrengthMemo, describeConfig, structuralHash
+
+from .test_acyclic import randomBAG
+
+
+EDGES = [("a", "b", 0.5, True), ("b", "c", 1.0, False), ("c", "a", 0.8, True), ("d", "a", 1.0, False)]
+BASE_SCORES = {"a": 0.5, "b": 0.4, "c": 0.7, "d": 0.2}
+
+
+def build(edges):
+    bag = grad.BAG()
+    for source, target, weight, attack in edges:
+        source, target = grad.Argument(source, BASE_SCORES[source]), grad.Argument(target, BASE_SCORES[target])
+        (bag.add_attack if attack else bag.add_support)(source, target, weight)
+    return bag
+
+
+def test_hash_ignores_order_but_not_structure_or_configuration():
+    model = grad.semantics.QuadraticEnergyModel()
+    key = structuralHash(build(EDGES), model, 1e-2)
+    assert structuralHash(build(EDGES[::-1]), model, 1e-2) == key
+    assert structuralHash(grad.CompactBAG.from_bag(build(EDGES)), model, 1e-2) == key
+
+    changed = build(EDGES)
+    changed.arguments["d"].initial_weight = 0.3
+    assert structuralHash(changed, model, 1e-2) != key
+    assert structuralHash(build(EDGES[:-1] + [("d", "a", 0.9, False)]), model, 1e-2) != key
+    assert structuralHash(build(EDGES), model, 1e-3) != key
+    assert structuralHash(build(EDGES), grad.semantics.QuadraticEnergyModel(influence=grad.semantics.modular.QuadraticMaximumInfluence(2)), 1e-2) != key
+
+    # strength values are not part of the structure
+    solved = build(EDGES)
+    solved.arguments["a"].strength = 0.9
+    assert structuralHash(solved, model, 1e-2) == key
+
+
+def test_configurations_are_described_canonically():
+    assert describeConfig(grad.algorithms.RK4) == "uncertainpy.gradual.algorithms.RK4.RK4"
+    assert describeConfig({"b": 1, "a": [0.5, None]}) == describeConfig({"a": [0.5, None], "b": 1})
+    assert describeConfig(grad.semantics.modular.LinearInfluence(2)) != describeConfig(grad.semantics.modular.LinearInfluence(1))
+    assert "aggregation=" in describeConfig(grad.semantics.QuadraticEnergyModel())
+    assert describeConfig(np.float64(0.5)) == describeConfig(0.5) and describeConfig(np.int64(3)) == describeConfig(3)
+
+    # arrays by content, not by identity
+    state = np.linspace(0, 1, 5)
+    assert describeConfig(state) == describeConfig(state.copy()) == describeConfig(state[::-1][::-1])
+    assert describeConfig(state) != describeConfig(state + 1e-12)
+    assert describeConfig(state) != describeConfig(state.astype(np.float32))
+    assert describeConfig(state) != describeConfig(state.reshape(5, 1))
+
+    # objects without __dict__ are described by their class
+    class Slotted:
+        __slots__ = ("x",)
+
+    assert describeConfig(Slotted()).endswith("Slotted()")
+
+
+def test_state_arrays_of_a_solved_model_do_not_change_its_key():
+    bag = randomBAG(20, 40, seed=5, acyclic=False)
+    model = grad.semantics.QuadraticEnergyModel()
+    key = structuralHash(bag, model, 1e-2)
+    model.BAG = bag
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(1e-2, 1e-8, verbose=False)
+    assert structuralHash(bag, model, 1e-2) == key
+
+
+def test_memo_hits_and_persists(tmp_path):
+    bag = randomBAG(30, 60, seed=2, acyclic=False)
+    memo = StrengthMemo(maxsize=1, directory=str(tmp_path))
+    first = memo.solve(bag, grad.semantics.QuadraticEnergyModel, epsilon=1e-8)
+    assert memo.solve(bag, grad.semantics.QuadraticEnergyModel, epsilon=1e-8) is first
+    assert (memo.hits, memo.misses) == (1, 1)
+
+    memo.solve(randomBAG(30, 60, seed=3, acyclic=False), grad.semantics.QuadraticEnergyModel, epsilon=1e-8)
+    assert len(memo) == 1
+
+    # evicted from memory, read back from its file
+    again = StrengthMemo(directory=str(tmp_path)).solve(bag, grad.semantics.QuadraticEnergyModel, epsilon=1e-8)
+    assert again is not first and again.strengths == first.strengths
+    assert np.array_equal(again.values, first.values) and again.status == first.status
+
+
+def test_initial_states_are_part_of_the_key():
+    bag = randomBAG(30, 60, seed=2, acyclic=False)
+    memo = StrengthMemo()
+    cold = memo.solve(bag, grad.semantics.QuadraticEnergyModel, epsilon=1e-8)
+    warm = memo.solve(bag, grad.semantics.QuadraticEnergyModel, epsilon=1e-8, initial_state=cold.values)
+    assert warm is not cold and memo.misses == 2
+    assert memo.solve(bag, grad.semantics.QuadraticEnergyModel, epsilon=1e-8, initial_state=cold.values.copy()) is warm
+    assert memo.solve(bag, grad.semantics.QuadraticEnergyModel, epsilon=1e-8, initial_state=cold.strengths) is not warm
+
+
+def test_model_results_round_trip_and_lru_order(tmp_path):
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = randomBAG(20, 40, seed=4, acyclic=False)
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(1e-2, 1e-8, verbose=False)
+
+    memo = StrengthMemo(maxsize=2, directory=str(tmp_path))
+    memo.put("model", model.result)
+    memo.put("other", model.result)
+    assert memo.get("model") is model.result
+    memo.put("third", model.result)
+    # "model" was used more recently than "other"
+    assert list(memo.entries) == ["model", "third"]
+
+    memo.clear()
+    loaded = memo.get("model")
+    assert type(loaded) is type(model.result) and loaded.as_dict() == model.result.as_dict()
+    assert loaded.strengths == model.result.strengths
+    assert memo.get("missing") is None and memo.misses == 1
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual import BAGSyntaxError, loadSnapshot, saveSnapshot
+
+from .test_acyclic import randomBAG
+
+
+def edgeSet(compiled):
+    """Attacks and supports as a set of (kind, source, target, weight), independent of the order within rows"""
+    return ({("att", s, t, w) for s, t, w in zip(compiled.att_indices.tolist(), compiled.att_targets.tolist(), compiled.att_weights.tolist())} |
+            {("sup", s, t, w) for s, t, w in zip(compiled.sup_indices.tolist(), compiled.sup_targets.tolist(), compiled.sup_weights.tolist())})
+
+
+def arraysEqual(a, b):
+    return (a.names == b.names and np.array_equal(a.base_scores, b.base_scores) and np.array_equal(a.strengths, b.strengths)
+            and np.array_equal(a.att_indptr, b.att_indptr) and np.array_equal(a.sup_indptr, b.sup_indptr)
+            and edgeSet(a) == edgeSet(b))
+
+
+def test_bag_and_compact_bag_read_the_same_file(tmp_path):
+    path = tmp_path / "example.bag"
+    path.write_text("arg(a, 0.5)\narg(b,0.25).\n\n  arg( c , 1 )\natt(a, b)\nsup(c, b, 0.5).\natt(b, a, 2)\n")
+
+    bag = grad.BAG(str(path))
+    compact = grad.CompactBAG(str(path))
+    assert bag.arguments["b"].initial_weight == 0.25
+    assert bag.arguments["b"].supporters[bag.arguments["c"]] == 0.5
+    assert bag.arguments["a"].attackers[bag.arguments["b"]] == 2
+    assert arraysEqual(bag.compile(), compact.compile())
+
+
+@pytest.mark.parametrize("text,line_number", [("arg(a, 0.5)\nfoo(a)\n", 2), ("arg(a, 0.5)\narg(b, x)\n", 2),
+                                              ("arg(a, 0.5)\n\natt(a, b)\n", 3), ("arg(a, 0.5, 1)\n", 1)])
+def test_syntax_errors_name_the_line(tmp_path, text, line_number):
+    path = tmp_path / "broken.bag"
+    path.write_text(text)
+    for cls in (grad.BAG, grad.CompactBAG):
+        with pytest.raises(BAGSyntaxError) as error:
+            cls(str(path))
+        assert error.value.line_number == line_number
+        assert f"line {line_number}" in str(error.value)
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_snapshot_round_trip(tmp_path, compressed):
+    bags = [randomBAG(30 + k, 60, seed=k, acyclic=False) for k in range(3)]
+    path = tmp_path / "bags.npz"
+    saveSnapshot(bags, path, compressed)
+    loaded = loadSnapshot(path)
+    assert len(loaded) == 3
+    assert all(arraysEqual(bag.compile(), graph) for bag, graph in zip(bags, loaded))
+
+    saveSnapshot(bags[0], path)
+    single = loadSnapshot(path)
+    assert arraysEqual(bags[0].compile(), single)
+    assert arraysEqual(grad.CompactBAG.from_compiled(single).compile(), single)
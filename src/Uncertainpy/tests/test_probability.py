@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from scipy.optimize import linprog
+
+from uncertainpy.probability.columnGeneration import ColumnGenerationSolver
+from uncertainpy.probability.lpBackend import ScipyBackend
+from uncertainpy.probability.probEntailment import ProbEntailmentEngine
+from uncertainpy.propositional.semantics import BooleanInterpretation
+from uncertainpy.propositional.syntax import BooleanAtom, Conditional
+
+from .test_truthtable import randomFormula
+
+
+def randomKB(rng, atoms, size):
+    """Conditionals with point, interval, lower-only and upper-only probabilities"""
+    kb = []
+    for _ in range(size):
+        l = round(rng.uniform(0, 0.9), 2)
+        kind = rng.integers(4)
+        u = l if kind == 0 else round(min(1.0, l + rng.uniform(0, 0.4)), 2)
+        if kind == 2:
+            l = None
+        elif kind == 3:
+            u = None
+        condition = randomFormula(rng, atoms) if rng.random() < 0.6 else None
+        kb.append(Conditional(randomFormula(rng, atoms), condition, l, u))
+    return kb
+
+
+def bruteForceBounds(kb, atoms, query):
+    """Bounds of P(b|a) by a dense Charnes-Cooper LP over all worlds, built with satisfied_by only"""
+    ints = BooleanInterpretation(atoms)
+    worlds = [ints.int_to_map(i) for i in range(ints.noWorlds())]
+    holds = lambda f, w: f is None or f.satisfied_by(w)
+
+    # variables: one per world and the normalization variable t
+    A_ub, A_eq = [], []
+    for cond in kb:
+        condition = np.array([holds(cond.a, w) for w in worlds], dtype=float)
+        verified = condition * np.array([cond.b.satisfied_by(w) for w in worlds])
+        if cond.l is not None:
+            A_ub.append(np.append(cond.l * condition - verified, 0))
+        if cond.u is not None:
+            A_ub.append(np.append(verified - cond.u * condition, 0))
+
+    condition = np.array([holds(query.a, w) for w in worlds], dtype=float)
+    verified = condition * np.array([query.b.satisfied_by(w) for w in worlds])
+    A_eq.append(np.append(np.ones(len(worlds)), -1))
+    A_eq.append(np.append(condition, 0))
+    c = np.append(verified, 0)
+
+    bounds = []
+    for sign in (1, -1):
+        result = linprog(sign * c, A_ub=np.array(A_ub) if A_ub else None, b_ub=np.zeros(len(A_ub)) if A_ub else None,
+                         A_eq=np.array(A_eq), b_eq=[0, 1], bounds=(0, None), method="highs")
+        bounds.append(sign * result.fun if result.status == 0 else None)
+    return bounds
+
+
+MODES = [("scipy", {}), ("highspy", {}), ("scipy", {"decompose": True}), ("highspy", {"columnGeneration": True}),
+         ("scipy", {"columnGeneration": True}), ("highspy", {"decompose": True, "columnGeneration": True})]
+
+
+@pytest.mark.parametrize("backend,options", MODES, ids=[f"{b}-{'-'.join(o) or 'full'}" for b, o in MODES])
+def test_bounds_match_brute_force(backend, options):
+    if backend == "highspy":
+        pytest.importorskip("highspy")
+
+    rng = np.random.default_rng(2)
+    inconsistent = 0
+    for trial in range(25):
+        atoms = [BooleanAtom(f"a{i}") for i in range(int(rng.integers(3, 7)))]
+        kb = randomKB(rng, atoms, int(rng.integers(1, 6)))
+        engine = ProbEntailmentEngine(backend, **options)
+        engine.createConstraints(kb, BooleanInterpretation(atoms))
+
+        for _ in range(3):
+            b, a = randomFormula(rng, atoms), randomFormula(rng, atoms) if rng.random() < 0.5 else None
+            lower, upper = bruteForceBounds(kb, atoms, Conditional(b, a, None, None))
+            query = engine.computeBounds(Conditional(b, a, None, None))
+            if lower is None:
+                inconsistent += 1
+                assert query.l is None and query.u is None
+            else:
+                assert query.l == pytest.approx(lower, abs=1e-7) and query.u == pytest.approx(upper, abs=1e-7)
+
+    # the random knowledge bases cover inconsistent ones as well
+    assert inconsistent > 0
+
+
+def chain(n):
+    atoms = [BooleanAtom(f"a{i}") for i in range(n)]
+    kb = [Conditional(atoms[0], None, 0.8, 0.9)] + [Conditional(atoms[i + 1], atoms[i], 0.8, 0.9) for i in range(n - 1)]
+    return atoms, kb
+
+
+def test_column_generation_without_enumeration():
+    atoms, kb = chain(30)
+    engine = ProbEntailmentEngine("scipy", columnGeneration=True)
+    engine.createConstraints(kb, BooleanInterpretation(atoms))
+    query = engine.computeBounds(Conditional(atoms[-1], None, None, None))
+    assert query.l == pytest.approx(0.8 ** 30, abs=1e-9)
+    assert len(engine.solver.worlds) < 1000
+
+
+class FailingBackend(ScipyBackend):
+    def optimize(self, c, maximize=False):
+        return None
+
+
+class WrongDualsBackend(ScipyBackend):
+    def duals(self):
+        # claims that every world has a negative reduced cost, also the ones already in the master LP
+        y = np.zeros(len(super().duals()))
+        y[-2] = 1
+        return y
+
+
+def test_column_generation_failures():
+    atoms, kb = chain(3)
+    solver = ColumnGenerationSolver(FailingBackend(), atoms, [], kb, kb)
+    assert solver.bounds(Conditional(atoms[-1], None, None, None)) == (None, None)
+
+    solver = ColumnGenerationSolver(WrongDualsBackend(), atoms, [], kb, kb)
+    with pytest.raises(RuntimeError):
+        solver.bounds(Conditional(atoms[-1], None, None, None))
@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.algorithms import RankingMonitor
+
+from .test_acyclic import randomBAG
+
+
+TARGETS = ["a0", "a1", "a2", "a3"]
+
+
+def queryModel(approximator, acyclic=False):
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = randomBAG(80, 200, seed=3, acyclic=acyclic)
+    model.approximator = approximator(model)
+    return model
+
+
+def test_settled_ranking_margin_and_level():
+    monitor = RankingMonitor(["x", "y", "z"])
+    assert monitor.settled(np.array([0.9, 0.5, 0.1]), 0.1)
+    assert not monitor.settled(np.array([0.9, 0.5, 0.1]), 0.25)
+    assert not monitor.settled(np.array([0.9, 0.5, 0.45]), 0.1)
+    assert RankingMonitor(["x", "y", "z"], top=1).settled(np.array([0.9, 0.5, 0.45]), 0.1)
+
+    # the top-2 gap of 0.4 must be known to be above or below the margin, the leader above or below the level
+    assert not RankingMonitor(["x", "y"], margin=0.3).settled(np.array([0.9, 0.5]), 0.1)
+    assert RankingMonitor(["x", "y"], margin=0.3).settled(np.array([0.9, 0.5]), 0.04)
+    assert not RankingMonitor(["x", "y"], level=0.85).settled(np.array([0.9, 0.5]), 0.1)
+    assert RankingMonitor(["x", "y"], level=0.85).settled(np.array([0.9, 0.5]), 0.04)
+
+
+def test_remaining_change():
+    assert RankingMonitor(["x"], lipschitz=0.5).remaining_change(1e-3) == pytest.approx(2e-3)
+    assert RankingMonitor(["x"]).remaining_change(1e-3) == np.inf
+    assert RankingMonitor(["x"]).remaining_change(0) == 0
+
+    # the decay rate only gives a bound when the estimate is asked for
+    for estimate, expected in [(False, np.inf), (True, 2 * 1e-3 / 0.5)]:
+        monitor = RankingMonitor(["x"], estimate=estimate)
+        for time in np.arange(0, 2.05, 0.1):
+            monitor.update_rate(time, np.exp(-0.5 * time))
+        assert monitor.rate == pytest.approx(0.5) and monitor.remaining_change(1e-3) == pytest.approx(expected)
+        assert monitor.estimated == estimate
+    with pytest.raises(ValueError):
+        RankingMonitor(["x"], lipschitz=1.0)
+
+
+def test_query_stops_early_with_the_final_ranking():
+    model = queryModel(grad.algorithms.RK4)
+    # the semantics is no contraction on this graph, only an estimated bound lets the solve stop early
+    compiled = model.BAG.slice(TARGETS).compile()
+    assert model.lipschitz_constant(compiled) > 1
+    assert model.solve_query(TARGETS, 1e-2, 1e-10).status == "converged"
+
+    model.BAG.reset_strength_values()
+    query = model.solve_query(TARGETS, 1e-2, 1e-10, estimate=True)
+    assert query.estimated and "bound=~" in repr(query)
+
+    model.BAG.reset_strength_values()
+    model.solve(1e-2, 1e-10, verbose=False)
+    final = model.result.strengths
+
+    assert query.status == "decided" and query.steps < model.result.steps
+    assert query.ranking == sorted(TARGETS, key=lambda t: -final[t])
+    for target in TARGETS:
+        assert abs(query.strengths[target] - final[target]) <= query.bound
+    # the monitor is removed again
+    assert model.approximator.callbacks == []
+
+
+def ringBAG(n, seed):
+    """Cycle of n arguments, each attacked or supported by its predecessor only"""
+    rng = np.random.default_rng(seed)
+    bag = grad.BAG()
+    arguments = [grad.Argument(f"a{i}", float(rng.random())) for i in range(n)]
+    for i, argument in enumerate(arguments):
+        if rng.random() < 0.5:
+            bag.add_attack(arguments[i - 1], argument)
+        else:
+            bag.add_support(arguments[i - 1], argument)
+    return bag
+
+
+def test_contractions_give_a_proven_bound():
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = ringBAG(60, seed=1)
+    model.approximator = grad.algorithms.RK4(model)
+    compiled = model.BAG.compile()
+    weights = compiled.base_scores
+    assert model.lipschitz_constant(compiled) == pytest.approx(3 * np.sqrt(3) / 8 * np.maximum(weights, 1 - weights).max())
+
+    query = model.solve_query(TARGETS, 1e-2, 1e-10, margin=0.05)
+    assert query.status == "decided" and not query.estimated
+
+    model.BAG.reset_strength_values()
+    model.solve(1e-2, 1e-12, verbose=False)
+    for target in TARGETS:
+        assert abs(query.strengths[target] - model.result.strengths[target]) <= query.bound
+
+
+SEMANTICS = [grad.semantics.QuadraticEnergyModel, grad.semantics.ContinuousDFQuADModel, grad.semantics.SquaredEnergyModel,
+             grad.semantics.ContinuousEulerBasedModel, grad.semantics.ContinuousSquaredDFQuADModel,
+             lambda: grad.semantics.ContinuousModularModel(grad.semantics.modular.SumAggregation(),
+                                                           grad.semantics.modular.LinearMaximumInfluence(2)),
+             lambda: grad.semantics.ContinuousModularModel(grad.semantics.modular.ProductAggregation(weighted=True),
+                                                           grad.semantics.modular.MLPBasedInfluence())]
+
+
+@pytest.mark.parametrize("semantics", SEMANTICS)
+def test_lipschitz_constants_bound_the_update_map(semantics):
+    model = semantics()
+    compiled = randomBAG(40, 80, seed=5, acyclic=False).compile()
+    compiled.base_scores = np.clip(compiled.base_scores, 0.05, 0.95)
+    compiled.att_weights = np.random.default_rng(5).random(len(compiled.att_weights))
+    constant = model.lipschitz_constant(compiled)
+
+    rng = np.random.default_rng(6)
+    update = lambda s: s + model.compute_derivatives(compiled, s)
+    for _ in range(200):
+        s = rng.random(compiled.n)
+        t = np.clip(s + rng.normal(scale=10.0 ** rng.integers(-4, 0), size=compiled.n), 0, 1)
+        assert np.abs(update(s) - update(t)).max() <= constant * np.abs(s - t).max() * (1 + 1e-9) + 1e-15
+
+    # products of weights above 1 are not bounded
+    compiled.att_weights[0] = 2.0
+    product = grad.semantics.modular.ProductAggregation(weighted=True)
+    assert grad.semantics.ContinuousModularModel(product, grad.semantics.modular.LinearInfluence(1)).lipschitz_constant(compiled) is None
+
+
+def test_acyclic_bags_are_propagated_with_zero_bound():
+    model = queryModel(grad.algorithms.RK4, acyclic=True)
+    query = model.solve_query(TARGETS, 1e-2, 1e-10, margin=0.1)
+    assert query.status == "converged" and query.bound == 0 and query.steps == 0
+    assert query.target_strengths == {t: model.BAG.arguments[t].strength for t in TARGETS}
+
+
+def test_equilibrium_without_lipschitz_solves_to_epsilon():
+    model = queryModel(grad.algorithms.Equilibrium)
+    query = model.solve_query(TARGETS, 1e-2, 1e-8)
+    assert query.status == "converged"
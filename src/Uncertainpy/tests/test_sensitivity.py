@@ -0,0 +1,65 @@
+import copy
+
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.algorithms.Sensitivity import computeSensitivity
+from uncertainpy.gradual.benchmark import starBAG
+from uncertainpy.gradual.semantics import modular
+
+from .test_kernels import weightedBAG
+
+
+MODELS = [grad.semantics.QuadraticEnergyModel(), grad.semantics.ContinuousDFQuADModel(),
+          grad.semantics.ContinuousModularModel(modular.SumAggregation(), modular.LinearInfluence(3)),
+          grad.semantics.ContinuousModularModel(modular.ProductAggregation(weighted=True), modular.EulerBasedInfluence()),
+          grad.semantics.ContinuousModularModel(modular.SquaredSumAggregation(), modular.QuadraticMaximumInfluence(2)),
+          grad.semantics.ContinuousModularModel(modular.SumAggregation(), modular.MLPBasedInfluence())]
+
+
+def equilibrium(model, compiled):
+    return grad.algorithms.Equilibrium(model).integrate(compiled, compiled.strengths.copy(), 1e-2, 1e-13)[0]
+
+
+def resolvedDerivative(model, compiled, key, index, target, h=1e-5):
+    """Central difference of the equilibrium strength of target over two re-solves with a perturbed parameter"""
+    values = []
+    for step in (h, -h):
+        perturbed = copy.copy(compiled)
+        parameters = getattr(compiled, key).copy()
+        parameters[index] += step
+        setattr(perturbed, key, parameters)
+        values.append(equilibrium(model, perturbed)[target])
+    return (values[0] - values[1]) / (2 * h)
+
+
+@pytest.mark.parametrize("model", MODELS, ids=str)
+def test_gradients_match_resolves(model):
+    compiled = weightedBAG(8, 16, seed=4).compile()
+    compiled.strengths = equilibrium(model, compiled)
+    result = computeSensitivity(model, compiled, compiled.strengths, [compiled.names[0]])
+    assert result.residual < 1e-12
+
+    for key, gradient in (("base_scores", result.base_scores), ("att_weights", result.att_weights),
+                          ("sup_weights", result.sup_weights)):
+        for index in range(len(getattr(compiled, key))):
+            assert gradient[0, index] == pytest.approx(resolvedDerivative(model, compiled, key, index, 0), abs=1e-7)
+
+
+def test_named_semantics_have_no_edge_gradients():
+    model = grad.semantics.QuadraticEnergyModel()
+    compiled = weightedBAG().compile()
+    compiled.strengths = equilibrium(model, compiled)
+    result = computeSensitivity(model, compiled, compiled.strengths, compiled.names)
+    assert not result.att_weights.any() and not result.sup_weights.any()
+    assert result.base_scores.any()
+
+
+def test_hub_sensitivity_takes_one_differential():
+    compiled = starBAG(5000, hubs=2, seed=0).compile()
+    model = grad.semantics.QuadraticEnergyModel()
+    calls = []
+    model.compute_derivatives = lambda compiled, state: calls.append(1) or type(model).compute_derivatives(model, compiled, state)
+    computeSensitivity(model, compiled, compiled.strengths, compiled.names[:2])
+    assert len(calls) == 1
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+
+from .test_acyclic import randomBAG
+
+
+def smallBAG():
+    """t is attacked by r1 (supported by r2) and in a cycle with u; t attacks x, which y attacks as well"""
+    bag = grad.BAG()
+    t, u, r1, r2, x, y = (grad.Argument(name, score) for name, score in
+                          [("t", 0.5), ("u", 0.6), ("r1", 0.7), ("r2", 0.2), ("x", 0.4), ("y", 0.9)])
+    bag.add_attack(r1, t)
+    bag.add_support(r2, r1)
+    bag.add_attack(t, u)
+    bag.add_support(u, t)
+    bag.add_attack(t, x)
+    bag.add_attack(y, x)
+    return bag
+
+
+def test_ancestors_and_slice():
+    bag = smallBAG()
+    # in the order of the BAG
+    assert bag.ancestors(["t"]) == ["r1", "t", "r2", "u"]
+    assert bag.ancestors([bag.arguments["x"]]) == list(bag.arguments)
+    with pytest.raises(KeyError):
+        bag.ancestors(["missing"])
+
+    sliced = bag.slice(["t"])
+    assert list(sliced.arguments) == ["r1", "t", "r2", "u"]
+    assert all(sliced.arguments[name] is bag.arguments[name] for name in sliced.arguments)
+    assert len(sliced.attacks) == 2 and len(sliced.supports) == 2
+
+    compact = grad.CompactBAG.from_compiled(bag.compile())
+    assert sorted(compact.ancestors(["t"])) == sorted(bag.ancestors(["t"]))
+    assert sorted(compact.slice(["t"]).names) == sorted(sliced.arguments)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_solving_a_slice_gives_the_targets_their_full_solve_strengths(compact):
+    full = randomBAG(200, 200, seed=4, acyclic=False)
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = full
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(1e-2, 1e-10, verbose=False)
+    reference = model.result.strengths
+
+    bag = randomBAG(200, 200, seed=4, acyclic=False)
+    bag = grad.CompactBAG.from_compiled(bag.compile()) if compact else bag
+    targets = ["a20", "a150"]
+    ancestors = set(bag.ancestors(targets))
+    assert set(targets) <= ancestors and len(ancestors) < 150
+
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = bag
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(1e-2, 1e-10, verbose=False, targets=targets)
+    assert model.BAG is bag and model.result.arguments == len(ancestors)
+    assert set(model.result.strengths) == set(reference)
+
+    base_scores = {a.name: a.initial_weight for a in full.arguments.values()}
+    strengths = bag.compile().strength_dict(bag.compile().strengths)
+    for name, strength in model.result.strengths.items():
+        expected = reference[name] if name in ancestors else base_scores[name]
+        assert strength == pytest.approx(expected, abs=1e-8)
+        assert strengths[name] == strength
+
+
+def test_stale_strengths_outside_the_slice_are_reset():
+    bag = smallBAG()
+    for argument in bag.arguments.values():
+        argument.strength = 0.0
+
+    model = grad.semantics.ContinuousDFQuADModel()
+    model.BAG = bag
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(1e-2, 1e-8, verbose=False, targets="t")
+    assert bag.arguments["x"].strength == 0.4 and bag.arguments["y"].strength == 0.9
+    assert np.isclose(bag.arguments["t"].strength, model.result.strengths["t"]) and bag.arguments["t"].strength != 0.5
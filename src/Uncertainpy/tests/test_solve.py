@@ -0,0 +1,82 @@
+import pickle
+
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.algorithms import solve, solveParallel
+
+from .test_acyclic import randomBAG
+
+
+def test_solve_leaves_bag_arguments_and_model_untouched():
+    bag = randomBAG(50, 120, seed=5, acyclic=False)
+    compiled = bag.compile()
+    model = grad.semantics.QuadraticEnergyModel()
+
+    result = solve(bag, model, grad.algorithms.RK4, epsilon=1e-9)
+    assert all(a.strength == a.initial_weight for a in bag.arguments.values())
+    assert model.BAG is None and model.approximator is None and model.arguments == [] and model.result is None
+
+    from_compiled = solve(compiled, model, grad.algorithms.RK4, epsilon=1e-9)
+    assert compiled.arguments is not None and np.array_equal(compiled.strengths, compiled.base_scores)
+    assert np.array_equal(from_compiled.values, result.values)
+
+    assert result.converged and result.max_derivative < 1e-9
+    assert result.names == list(bag.arguments) and result["a3"] == result.values[3]
+    assert result.as_dict()["arguments"] == 50 and result.strengths == dict(zip(result.names, result.values.tolist()))
+
+
+def test_initial_state_as_dictionary_or_array():
+    bag = randomBAG(50, 120, seed=5, acyclic=False)
+    cold = solve(bag, grad.semantics.QuadraticEnergyModel, epsilon=1e-9)
+    warm = solve(bag, grad.semantics.QuadraticEnergyModel, epsilon=1e-9, initial_state=cold.strengths)
+    assert warm.steps < cold.steps
+    assert np.allclose(warm.values, cold.values, atol=1e-8)
+
+    from_array = solve(bag, grad.semantics.QuadraticEnergyModel, epsilon=1e-9, initial_state=cold.values)
+    assert np.array_equal(from_array.values, warm.values)
+
+    # arguments missing from a dictionary start at their base score
+    partial = solve(bag, grad.semantics.QuadraticEnergyModel, grad.algorithms.RK4, epsilon=1e9, initial_state={"a0": 0.0})
+    assert partial.steps == 1 and partial.values[0] != bag.arguments["a0"].initial_weight
+
+
+def test_deep_bags_pickle_without_recursion():
+    bag = grad.BAG()
+    arguments = [grad.Argument(f"a{i}", 0.5) for i in range(20000)]
+    for i in range(len(arguments) - 1):
+        bag.add_support(arguments[i], arguments[i + 1], 0.5)
+    arguments[-1].strength = 0.25
+
+    copy = pickle.loads(pickle.dumps(bag))
+    assert list(copy.arguments) == list(bag.arguments) and copy.arguments["a19999"].strength == 0.25
+    assert copy.arguments["a1"].supporters == {copy.arguments["a0"]: 0.5}
+    assert len(copy.supports) == len(bag.supports) and copy.supports[0].supporter is copy.arguments["a0"]
+
+    compact = grad.CompactBAG.from_compiled(bag.compile())
+    compact.compile()
+    restored = pickle.loads(pickle.dumps(compact))
+    # only the used part of the buffers is pickled and the compiled form is rebuilt
+    assert restored._compiled is None and len(restored._weights) == len(bag.supports)
+    assert restored.names == compact.names and np.array_equal(restored.strengths, compact.strengths)
+    assert np.array_equal(restored.compile().sup_indices, compact.compile().sup_indices)
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_pools_return_the_sequential_results_in_order(processes):
+    bags = [randomBAG(30 + k, 80, seed=k, acyclic=False) for k in range(6)]
+    model = grad.semantics.ContinuousDFQuADModel()
+    results = solveParallel(bags, model, workers=3, processes=processes, epsilon=1e-8)
+    assert [result.names for result in results] == [list(bag.arguments) for bag in bags]
+    for bag, result in zip(bags, results):
+        assert np.array_equal(result.values, solve(bag, model, epsilon=1e-8).values)
+
+
+def test_models_without_kernel_are_rejected():
+    class DictionaryModel(grad.semantics.Model):
+        def compute_derivative_at(self, state):
+            return {a: 0.0 for a in state}
+
+    with pytest.raises(TypeError):
+        solve(randomBAG(5, 5, seed=1), DictionaryModel)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.algorithms import SweepRun, sweep
+
+from .test_acyclic import randomBAG
+
+
+SEMANTICS = [grad.semantics.QuadraticEnergyModel, grad.semantics.ContinuousDFQuADModel, grad.semantics.SquaredEnergyModel,
+             grad.semantics.ContinuousEulerBasedModel]
+
+
+def graphs():
+    return [randomBAG(10 + 5 * k, 30 + 10 * k, seed=k, acyclic=False) for k in range(4)]
+
+
+@pytest.fixture(scope="module")
+def unpacked():
+    runs = [SweepRun(semantics(), grad.algorithms.RK4, delta=0.1, epsilon=1e-9) for semantics in SEMANTICS]
+    return runs, sweep(graphs(), runs, processes=1, packed=False)
+
+
+def test_unpacked_sweep_solves_every_graph_with_every_run(unpacked):
+    runs, result = unpacked
+    assert len(result) == 4 * len(runs) and not result.failures()
+    assert [(row["graph"], row["run"]) for row in result.rows] == [(k, run.label) for k in range(4) for run in runs]
+
+    bag = graphs()[2]
+    names, labels, table = result.strength_table(2)
+    assert names == list(bag.arguments) and labels == [run.label for run in runs] and table.shape == (len(names), len(runs))
+    for r, semantics in enumerate(SEMANTICS):
+        integrator = grad.algorithms.RK4(semantics())
+        compiled = bag.compile()
+        state, _, _ = integrator.integrate(compiled, compiled.strengths.copy(), 0.1, 1e-9)
+        assert np.array_equal(table[:, r], state)
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_packed_chunks_agree_with_separate_solves(unpacked, processes):
+    runs, reference = unpacked
+    bags = graphs()
+    result = sweep(bags, runs, processes=processes, chunk_size=2, packed=True)
+
+    assert not result.failures()
+    assert all(a.strength == a.initial_weight for bag in bags for a in bag.arguments.values())
+    for k in range(len(bags)):
+        assert np.allclose(result.strength_table(k)[2], reference.strength_table(k)[2], atol=1e-7)
+
+    # packed times are shares of one solve per chunk and run, proportional to the graph size
+    times = {(row["graph"], row["run"]): row["time"] for row in result.rows}
+    label = runs[0].label
+    assert times[(1, label)] / times[(0, label)] == pytest.approx(bags[1].compile().n / bags[0].compile().n)
+    assert set(result.timings()) == set(result.labels)
+
+
+def test_runs_from_models_compiled_graphs_and_labels():
+    bag = randomBAG(12, 30, seed=9, acyclic=False)
+    compiled = bag.compile()
+    result = sweep(compiled, [grad.semantics.QuadraticEnergyModel(), SweepRun(grad.semantics.QuadraticEnergyModel(), label="QE")],
+                   processes=1)
+    assert result.labels == ["QuadraticEnergyModel/DormandPrince", "QE"]
+    assert compiled.arguments is not None
+
+    with pytest.raises(ValueError):
+        sweep(bag, [grad.semantics.QuadraticEnergyModel(), grad.semantics.QuadraticEnergyModel()], processes=1)
+
+    class DictionaryModel(grad.semantics.Model):
+        def compute_derivative_at(self, state):
+            return {a: 0.0 for a in state}
+
+    with pytest.raises(TypeError):
+        SweepRun(DictionaryModel())
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import uncertainpy.gradual as grad
+from uncertainpy.gradual.algorithms import TrajectoryRecorder
+
+from .test_acyclic import randomBAG
+
+
+def test_recorder_stays_within_budget():
+    n = 50
+    recorder = TrajectoryRecorder(max_bytes=8 * (n + 1) * 64, capacity=4)
+    recorder.start(range(n), np.zeros(n))
+    for step in range(1, 10001):
+        recorder.record(float(step), np.full(n, step))
+    recorder.finish(10000.0, np.full(n, 10000))
+
+    assert recorder.nbytes <= recorder.max_bytes
+    assert len(recorder) <= 65 and recorder.stride > 1
+    assert recorder.times[0] == 0 and recorder.times[-1] == 10000
+    assert np.all(np.diff(recorder.times) > 0)
+    assert np.array_equal(recorder.values[:, 3], recorder.times)
+
+
+def test_recorder_sampling():
+    recorder = TrajectoryRecorder(every=3, min_change=0.5)
+    recorder.start(["a"], np.zeros(1))
+    for step in range(1, 31):
+        recorder.record(float(step), np.array([0.1 * step]))
+    # every third candidate, and only if it moved by at least 0.5 since the last kept sample
+    assert recorder.times.tolist() == [0, 6, 12, 18, 24, 30]
+
+    with pytest.raises(ValueError):
+        TrajectoryRecorder(every=0)
+
+
+def test_recordings_belong_to_approximators():
+    models = []
+    for seed in (1, 2):
+        model = grad.semantics.QuadraticEnergyModel()
+        model.BAG = randomBAG(20, 40, seed=seed, acyclic=False)
+        model.approximator = grad.algorithms.RK4(model)
+        model.solve(1e-1, 1e-6, verbose=False, generate_plot=True)
+        models.append(model)
+
+    for model in models:
+        data = model.approximator.graph_data
+        assert set(data) == set(model.BAG.arguments)
+        for name, argument in model.BAG.arguments.items():
+            assert data[name][0] == (0, argument.initial_weight)
+            assert data[name][-1][1] == argument.strength
+    assert models[0].approximator.recorder is not models[1].approximator.recorder
+
+
+def test_plots_of_re_solves_start_at_the_initial_weights():
+    model = grad.semantics.QuadraticEnergyModel()
+    model.BAG = randomBAG(20, 40, seed=3, acyclic=False)
+    model.approximator = grad.algorithms.RK4(model)
+    model.solve(1e-1, 1e-6, verbose=False)
+    assert any(argument.strength != argument.initial_weight for argument in model.BAG.arguments.values())
+
+    # the second solve integrates from the first equilibrium, its plot still starts at t=0 values
+    model.solve(1e-1, 1e-6, verbose=False, generate_plot=True)
+    data = model.approximator.graph_data
+    for name, argument in model.BAG.arguments.items():
+        assert data[name][0] == (0, argument.initial_weight)
+        assert data[name][-1][1] == argument.strength
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from uncertainpy.probability.distribution import ProbabilityDist
+from uncertainpy.propositional.semantics import BooleanInterpretation
+from uncertainpy.propositional.syntax import BooleanAtom, Conditional, Conjunction, Disjunction, Formula, Negation
+from uncertainpy.propositional.truthtable import TruthTable
+
+
+def randomFormula(rng, atoms, depth=2):
+    if depth == 0 or rng.random() < 0.4:
+        atom = atoms[rng.integers(len(atoms))]
+        return Negation(atom) if rng.random() < 0.3 else atom
+
+    parts = [randomFormula(rng, atoms, depth - 1) for _ in range(rng.integers(0, 3) + 1)]
+    return Conjunction(*parts) if rng.random() < 0.5 else Disjunction(*parts)
+
+
+class Parity(Formula):
+    """Formula without a compiled form: an odd number of its atoms is true"""
+
+    def __init__(self, *atoms):
+        self.parts = atoms
+
+    def satisfied_by(self, interpretation):
+        return sum(interpretation[a] for a in self.parts) % 2 == 1
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_truth_table_matches_satisfies(packed):
+    rng = np.random.default_rng(0)
+    atoms = [BooleanAtom(f"a{i}") for i in range(6)]
+    ints = BooleanInterpretation(atoms)
+    table = TruthTable(atoms, packed)
+    for _ in range(100):
+        f = randomFormula(rng, atoms, 4)
+        assert table.mask(f).tolist() == [ints.satisfies(i, f) for i in range(ints.noWorlds())]
+
+    # formulas without compile are enumerated world by world
+    parity = Parity(atoms[0], atoms[3], atoms[5])
+    assert table.mask(Negation(parity)).tolist() == [not ints.satisfies(i, parity) for i in range(ints.noWorlds())]
+
+
+def test_vectors_are_cached_and_packed():
+    atoms = [BooleanAtom(f"a{i}") for i in range(10)]
+    f = Conjunction(atoms[1], Negation(atoms[9]))
+    table = TruthTable(atoms)
+    assert table.compile(f) is table.compile(f) and atoms[1] in table.cache and table.compile(f).dtype == bool
+    # bit k of interpretation i is the value of atom k
+    assert table.mask(atoms[1]).tolist() == [(i >> 1) & 1 == 1 for i in range(1024)]
+    assert table.constant(True).all() and not table.constant(False).any()
+
+    packed = TruthTable(atoms, packed=True)
+    assert packed.compile(f).dtype == np.uint8 and packed.compile(f).nbytes == 1024 // 8
+    assert np.array_equal(packed.mask(f), table.mask(f))
+
+    table.clear()
+    assert table.cache == {}
+    with pytest.raises(KeyError):
+        table.atom(BooleanAtom("other"))
+
+
+def test_interpretations_and_models():
+    atoms = [BooleanAtom(f"a{i}") for i in range(60)]
+    ints = BooleanInterpretation(atoms)
+    # integer division keeps all bits of large interpretations
+    truthmap = ints.int_to_map(2 ** 59 + 1)
+    assert truthmap[atoms[0]] and truthmap[atoms[59]] and not any(truthmap[a] for a in atoms[1:59])
+
+    ints = BooleanInterpretation(atoms[:4])
+    f = Disjunction(atoms[0], atoms[2])
+    assert ints.truthTable() is ints.truthTable()
+    assert ints.models(f).tolist() == [ints.satisfies(i, f) for i in range(16)] and f in ints.truthTable().cache
+
+    # the packed and unpacked tables are kept side by side, switching does not recompile formulas
+    table = ints.truthTable()
+    packed = ints.truthTable(packed=True)
+    assert packed.packed and not table.packed and packed is ints.truthTable(packed=True)
+    assert ints.truthTable() is table and f in table.cache
+
+
+def test_probability_of_formulas_and_conditionals():
+    rng = np.random.default_rng(1)
+    atoms = [BooleanAtom(f"a{i}") for i in range(5)]
+    ints = BooleanInterpretation(atoms)
+    p = rng.random(ints.noWorlds())
+    p /= p.sum()
+    dist = ProbabilityDist(ints, list(p))
+
+    for _ in range(20):
+        f, g = randomFormula(rng, atoms, 3), randomFormula(rng, atoms, 3)
+        pf = sum(p[i] for i in range(ints.noWorlds()) if ints.satisfies(i, f))
+        pfg = sum(p[i] for i in range(ints.noWorlds()) if ints.satisfies(i, f) and ints.satisfies(i, g))
+        pg = sum(p[i] for i in range(ints.noWorlds()) if ints.satisfies(i, g))
+        assert np.isclose(dist.computeProb(f), pf)
+        if pg > 0:
+            assert np.isclose(dist.computeProb(Conditional(f, g, 0, 1)), pfg / pg)
+
+    assert np.isclose(dist.computeProb(Conditional(atoms[0], None, 0, 1)), dist.computeProb(atoms[0]))
+    assert isinstance(dist.computeProb(Conditional(atoms[0], Conjunction(atoms[1], Negation(atoms[1])), 0, 1)), str)